@@ -10,6 +10,9 @@ from streamlit import components
 
 from src.graph_final import drug_development_researcher_graph
 from src.configuration import Configuration
+from src.dailymed import cancel_label_prefetch, fetch_thumbnails
+from src.http_clients import close_http_clients
+from src.llm import log_llm_cache_stats
 from src.state import DrugDevelopmentResearchGraphState, PotentialRLD, RLD
 
 
@@ -230,6 +233,8 @@ For example:
             st.warning("Please upload a PDF first!")
             return
 
+        # The previous study is abandoned: stop warming its labels
+        cancel_label_prefetch(st.session_state.get("thread_id", ""))
         new_thread_id = str(uuid.uuid4())
         st.session_state["thread_id"] = new_thread_id
         st.success(f"New study initiated, Thread ID: {new_thread_id}")
@@ -264,6 +269,9 @@ For example:
 
         st.session_state["flat_potential_rlds"] = flat_rlds
         st.session_state["current_RLDs"] = current_RLDs
+        st.session_state["thumbnails"] = await fetch_thumbnails(
+            [rld.image_url for rld in flat_rlds], Configuration()
+        )
         # Set an empty human_response to prompt the user.
         st.session_state["human_response"] = {}
         st.session_state["initial_run_done"] = True
@@ -277,7 +285,10 @@ For example:
 
         st.write("### Potential Reference Products for DailyMed Research:")
         if st.session_state["flat_potential_rlds"]:
+            thumbnails = st.session_state.get("thumbnails", {})
             for i, rld in enumerate(st.session_state["flat_potential_rlds"]):
+                if rld.image_url in thumbnails:
+                    st.image(thumbnails[rld.image_url])
                 st.markdown(
                     f"""
                 **[{i}]**  
@@ -417,6 +428,9 @@ For example:
 
                 st.session_state["flat_potential_rlds"] = flat_rlds
                 st.session_state["current_RLDs"] = current_RLDs
+                st.session_state["thumbnails"] = await fetch_thumbnails(
+                    [rld.image_url for rld in flat_rlds], Configuration()
+                )
                 # Force a rerun so that the updated RLDs are displayed and the user can choose again.
                 st.rerun()
             else:
@@ -456,5 +470,14 @@ For example:
         reset_app()
 
 
+async def run_app():
+    """One Streamlit script run; the pooled HTTP clients of its event loop are closed with it."""
+    try:
+        await main()
+    finally:
+        await close_http_clients()
+        log_llm_cache_stats(Configuration())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run_app())
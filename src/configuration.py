@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass, field, fields
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
 from dataclasses import dataclass
@@ -26,6 +26,13 @@ SECTIONCODE_MAP = {
     "34076-0": "patient_counseling",
 }
 
+# Outbound HTTP budget per host (see src/rate_limit.py): requests per second, burst and requests in flight
+HTTP_RATE_LIMITS = {
+    "dailymed.nlm.nih.gov": {"rate": 10.0, "burst": 20, "concurrency": 8},
+    "pubchem.ncbi.nlm.nih.gov": {"rate": 5.0, "burst": 5, "concurrency": 5},
+    "api.tavily.com": {"rate": 5.0, "burst": 10, "concurrency": 5},
+}
+
 MAPPING_DRUG_LABEL_SECTION = {
     "API_name_with_UNII": "product_info_str",
     "inactive_ingredients_with_UNII_str": "product_info_str",
@@ -1178,6 +1185,48 @@ class Configuration:
     claude_35_sonnet: str = "claude-3-5-sonnet-latest"
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY")
     local_orange_book_zip_path: str = "./databases/orange_book_database.zip"
+    orange_book_store_dir: str = "./databases/orange_book_store"
+    orange_book_reload_interval: float = 5.0
+    orange_book_fuzzy_matching: bool = True
+    orange_book_fuzzy_min_score: float = 0.5
+    # "exact_or_family", "exact", "family" or "substring" (see src/orange_book/vocabulary.py)
+    orange_book_dosage_form_match: str = "exact_or_family"
+    # Shared async DailyMed client (see src/dailymed/client.py)
+    dailymed_max_connections: int = 20
+    dailymed_timeout: float = 15.0
+    dailymed_max_retries: int = 3
+    # Local DailyMed SPL snapshot (python -m src.dailymed.spl_index <bulk dir>), used before the network
+    dailymed_spl_index_path: str = "./databases/dailymed_spl_index.sqlite"
+    # DailyMed search results requested (pagesize) and kept per RLD
+    dailymed_search_results: int = 10
+    # On-disk caches (HTTP responses, parsed documents, ...) live under cache_dir
+    cache_dir: str = "./cache"
+    dailymed_cache_enabled: bool = True
+    dailymed_search_ttl: float = 86400.0
+    dailymed_label_ttl: float = 604800.0
+    dailymed_cache_max_mb: int = 512
+    # Parsed labels are reused while the SPL version (re-checked every dailymed_version_ttl s) is unchanged
+    dailymed_label_cache_enabled: bool = True
+    dailymed_version_ttl: float = 3600.0
+    # Labels of the top-ranked potential RLDs prefetched while the formulator feedback interrupt is pending (0 = off)
+    dailymed_prefetch_max_labels: int = 10
+    dailymed_prefetch_timeout: float = 300.0
+    dailymed_prefetch_concurrency: int = 4
+    # Potential RLD package photo thumbnails shown at the formulator feedback step ("webp" or "jpeg")
+    thumbnail_max_px: int = 160
+    thumbnail_format: str = "webp"
+    # Pooled async PubChem client (see src/pubchem/resolver.py)
+    pubchem_max_connections: int = 10
+    pubchem_timeout: float = 10.0
+    pubchem_max_retries: int = 3
+    # Local PubChem cache (names and PUG View headings); warm it with python -m src.pubchem.warm <portfolio>
+    pubchem_cache_enabled: bool = True
+    pubchem_cache_ttl: float = 7776000.0
+    pubchem_negative_ttl: float = 604800.0
+    # LLM response cache (see src/llm.py); nodes listed in llm_cache_disabled_nodes always call the model
+    llm_cache_enabled: bool = True
+    llm_cache_max_mb: int = 256
+    llm_cache_disabled_nodes: List = field(default_factory=list)
     number_of_queries: int = 9
     max_results_query: int = 5
     max_num_turns_interview_patent: int = 3
@@ -1201,6 +1250,7 @@ class Configuration:
         default_factory=lambda: MAPPING_DRUG_LABEL_SECTION
     )
     SECTIONCODE_MAP: Dict = field(default_factory=lambda: SECTIONCODE_MAP)
+    HTTP_RATE_LIMITS: Dict = field(default_factory=lambda: HTTP_RATE_LIMITS)
 
     @classmethod
     def from_runnable_config(cls, config):
@@ -0,0 +1,19 @@
+from src.dailymed.client import DailyMedClient, get_dailymed_client
+from src.dailymed.label_cache import LabelCache, get_label_cache
+from src.dailymed.spl_index import SplIndex, get_spl_index
+from src.dailymed.labels import get_label
+from src.dailymed.prefetch import cancel_label_prefetch, start_label_prefetch
+from src.dailymed.thumbnails import fetch_thumbnails
+
+__all__ = [
+    "DailyMedClient",
+    "get_dailymed_client",
+    "LabelCache",
+    "get_label_cache",
+    "SplIndex",
+    "get_spl_index",
+    "get_label",
+    "start_label_prefetch",
+    "cancel_label_prefetch",
+    "fetch_thumbnails",
+]
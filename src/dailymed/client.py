@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from src.configuration import Configuration
+from src.dailymed.http_cache import HttpCache
+from src.http_clients import new_async_client, pooled_client
+from src.rate_limit import HostLimit, RateLimiter, get_rate_limiter
+
+DAILYMED_BASE_URL = "https://dailymed.nlm.nih.gov"
+DAILYMED_SEARCH_URL = DAILYMED_BASE_URL + "/dailymed/search.cfm"
+DAILYMED_LABEL_URL = DAILYMED_BASE_URL + "/dailymed/drugInfo.cfm"
+DAILYMED_SPLS_URL = DAILYMED_BASE_URL + "/dailymed/services/v2/spls.json"
+
+
+class DailyMedClient:
+    """
+    Async, connection-pooled HTTP client for DailyMed.
+
+    - One keep-alive pool (HTTP/2 when `h2` is installed) shared by every node running on the
+      same event loop, so N RLDs are fetched concurrently over a few warm connections.
+    - Requests go through a RateLimiter (the process-wide one from get_dailymed_client), which caps
+      the request rate and in-flight requests per host and backs off on 429 / 503 and Retry-After.
+    - Every request has connect / read timeouts and is retried on timeouts, connection errors,
+      429 and 5xx responses with exponential backoff and full jitter.
+    - With an HttpCache, search and label pages younger than their TTL are served from disk with no
+      round-trip; older ones are revalidated with If-None-Match / If-Modified-Since (a 304 only
+      refreshes the entry).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        per_host_concurrency: int = 8,
+        timeout: float = 15.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[HttpCache] = None,
+        search_ttl: float = 86400.0,
+        label_ttl: float = 7 * 86400.0,
+        version_ttl: float = 3600.0,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.cache = cache
+        self.search_ttl = search_ttl
+        self.label_ttl = label_ttl
+        self.version_ttl = version_ttl
+        # A standalone client only caps its own concurrency
+        self.rate_limiter = rate_limiter or RateLimiter(
+            default=HostLimit(rate=100.0, burst=100, concurrency=per_host_concurrency)
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.client = new_async_client(
+            max_connections=max_connections,
+            timeout=timeout,
+            http2=http2,
+            headers={"User-Agent": "drug-development-researcher (DailyMed client)"},
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    async def get(
+        self, url: str, params: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        GET through the rate limiter, with jittered retries. Raises on the final failure;
+        a 304 (answer to a conditional request) is returned as is.
+        """
+        return await self.rate_limiter.request(
+            self.client, "GET", url, max_retries=self.max_retries, backoff=self.backoff, params=params, headers=headers,
+        )
+
+    async def get_text(self, url: str, params: Optional[Dict[str, str]] = None, ttl: Optional[float] = None) -> str:
+        """Body of the response; cached for `ttl` seconds when the client has a cache and a ttl is given."""
+        if self.cache is None or ttl is None:
+            return (await self.get(url, params)).text
+
+        cached = await asyncio.to_thread(self.cache.get, url, params)
+        if cached is not None and cached.age() < ttl:
+            return cached.text()
+
+        response = await self.get(url, params, headers=cached.revalidation_headers() if cached else None)
+        if response.status_code == 304 and cached is not None:
+            await asyncio.to_thread(self.cache.touch, url, params)
+            return cached.text()
+        await asyncio.to_thread(
+            self.cache.put, url, response.content, params,
+            response.headers.get("ETag"), response.headers.get("Last-Modified"),
+        )
+        return response.text
+
+    async def search_html(self, url: str) -> str:
+        """HTML of a DailyMed search results page."""
+        return await self.get_text(url, ttl=self.search_ttl)
+
+    async def label_html(self, setid: str) -> str:
+        """HTML of the DailyMed label page for `setid`."""
+        return await self.get_text(DAILYMED_LABEL_URL, params={"setid": setid}, ttl=self.label_ttl)
+
+    async def spl_version(self, setid: str) -> Optional[str]:
+        """
+        Current SPL version of the label `setid` from the DailyMed web services (a small JSON
+        response, cached for version_ttl), or None if it cannot be determined.
+        """
+        try:
+            text = await self.get_text(DAILYMED_SPLS_URL, params={"setid": setid}, ttl=self.version_ttl)
+            data = json.loads(text).get("data") or []
+        except (httpx.HTTPError, ValueError, AttributeError) as e:
+            logging.warning(f"Could not get the SPL version of {setid}: {e}")
+            return None
+        version = data[0].get("spl_version") if data else None
+        return None if version is None else str(version)
+
+    @property
+    def is_closed(self) -> bool:
+        return self.client.is_closed
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# One client per running event loop (see src/http_clients.py); the on-disk caches are
+# shared by all loops (and threads) of the process.
+_http_caches: Dict[str, HttpCache] = {}
+
+
+def get_dailymed_client(configurable: Configuration) -> DailyMedClient:
+    """
+    Returns the DailyMed client of the running event loop, creating it from the dailymed_*
+    settings on first use. Nodes share it instead of opening a connection per request.
+    """
+    def new_client() -> DailyMedClient:
+        cache = None
+        if configurable.dailymed_cache_enabled:
+            cache_dir = os.path.join(configurable.cache_dir, "dailymed_http")
+            if cache_dir not in _http_caches:
+                _http_caches[cache_dir] = HttpCache(cache_dir, configurable.dailymed_cache_max_mb * 2 ** 20)
+            cache = _http_caches[cache_dir]
+        return DailyMedClient(
+            max_connections=configurable.dailymed_max_connections,
+            rate_limiter=get_rate_limiter(configurable),
+            timeout=configurable.dailymed_timeout,
+            max_retries=configurable.dailymed_max_retries,
+            cache=cache,
+            search_ttl=configurable.dailymed_search_ttl,
+            label_ttl=configurable.dailymed_label_ttl,
+            version_ttl=configurable.dailymed_version_ttl,
+        )
+
+    return pooled_client("dailymed", new_client)
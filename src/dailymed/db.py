@@ -0,0 +1,23 @@
+import sqlite3
+import threading
+
+
+class ThreadLocalConnection:
+    """
+    One SQLite connection per thread (asyncio.to_thread workers included) to a WAL-mode database
+    file. SQLite's file locking makes the database safe to share with other worker processes.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        self().executescript(schema)
+
+    def __call__(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.dailymed.db import ThreadLocalConnection
+
+INDEX_FILE = "index.sqlite"
+BODIES_DIR = "bodies"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def normalise_url(url: str, params: Optional[Dict[str, str]] = None) -> str:
+    """
+    Cache key form of a URL: lower-case scheme and host, no fragment, query parameters (including
+    `params`) decoded and sorted, so equivalent spellings of one request share an entry.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(sorted(query)), ""))
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def revalidation_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk HTTP response cache.
+
+    - Bodies are stored once per content hash under bodies/<2 hex>/<sha256>, written to a temp file
+      and renamed into place, so readers never see a partial body and identical pages (the same
+      label reached through two URLs) are stored once.
+    - A SQLite index (WAL mode) maps the normalised URL to the body hash, ETag / Last-Modified and
+      store / access times. SQLite's locking makes it safe to share between threads and worker
+      processes.
+    - Total body size is bounded by max_bytes; the least recently used entries (and the bodies no
+      entry references any more) are evicted after each store.
+    Freshness (TTL) is decided by the caller from CachedResponse.age().
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 2 ** 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, BODIES_DIR), exist_ok=True)
+        self._connect = ThreadLocalConnection(os.path.join(cache_dir, INDEX_FILE), _SCHEMA)
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.cache_dir, BODIES_DIR, body_hash[:2], body_hash)
+
+    def get(self, url: str, params: Optional[Dict[str, str]] = None) -> Optional[CachedResponse]:
+        """Cached response for the request, or None (also if its body went missing)."""
+        key = normalise_url(url, params)
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT body_hash, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body_hash, etag, last_modified, stored_at = row
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(key, body, etag, last_modified, stored_at)
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        params: Optional[Dict[str, str]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        key = normalise_url(url, params)
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, body_hash, len(body), etag, last_modified, now, now),
+        )
+        self.evict()
+
+    def touch(self, url: str, params: Optional[Dict[str, str]] = None) -> None:
+        """Marks a revalidated (304) entry as fresh again."""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, normalise_url(url, params))
+        )
+
+    def size(self) -> int:
+        """Bytes of distinct bodies referenced by the index."""
+        row = self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM responses GROUP BY body_hash)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self) -> None:
+        """Drops least recently used entries until the referenced bodies fit in max_bytes."""
+        connection = self._connect()
+        if self.size() <= self.max_bytes:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = set()
+            total = self.size()
+            rows = connection.execute("SELECT key, body_hash, size FROM responses ORDER BY accessed_at").fetchall()
+            for key, body_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                if connection.execute("SELECT 1 FROM responses WHERE body_hash = ?", (body_hash,)).fetchone() is None:
+                    removed.add(body_hash)
+                    total -= size
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        for body_hash in removed:
+            try:
+                os.remove(self._body_path(body_hash))
+            except FileNotFoundError:
+                pass
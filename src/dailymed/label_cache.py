@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from src.configuration import Configuration
+from src.dailymed.db import ThreadLocalConnection
+
+LABEL_CACHE_FILE = "dailymed_labels.sqlite"
+
+# Bump when the label extraction changes, so documents parsed by an older extractor are not reused
+LABEL_PARSER_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    setid TEXT NOT NULL,
+    version TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (setid, version, parser_version)
+);
+"""
+
+
+class LabelCache:
+    """
+    Extracted DailyMed label fields (the DrugLabelDoc sections and product_info_str) per setid and
+    SPL version, in a WAL-mode SQLite file shared by threads and worker processes. A label whose
+    version has not changed is served without downloading or parsing its HTML; storing a new
+    version of a setid drops the older ones.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connect = ThreadLocalConnection(path, _SCHEMA)
+
+    def get(self, setid: str, version: str) -> Optional[Dict[str, str]]:
+        row = self._connect().execute(
+            "SELECT fields FROM labels WHERE setid = ? AND version = ? AND parser_version = ?",
+            (setid, version, LABEL_PARSER_VERSION),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, setid: str, version: str, fields: Dict[str, str]) -> None:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM labels WHERE setid = ?", (setid,))
+            connection.execute(
+                "INSERT INTO labels VALUES (?, ?, ?, ?, ?)",
+                (setid, version, LABEL_PARSER_VERSION, json.dumps(fields), time.time()),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+
+_label_caches: Dict[str, LabelCache] = {}
+
+
+def get_label_cache(configurable: Configuration) -> Optional[LabelCache]:
+    """The process-wide label cache under cache_dir, or None if dailymed_label_cache_enabled is off."""
+    if not configurable.dailymed_label_cache_enabled:
+        return None
+    path = os.path.join(configurable.cache_dir, LABEL_CACHE_FILE)
+    if path not in _label_caches:
+        os.makedirs(configurable.cache_dir, exist_ok=True)
+        _label_caches[path] = LabelCache(path)
+    return _label_caches[path]
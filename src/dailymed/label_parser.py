@@ -0,0 +1,124 @@
+import io
+from typing import Dict, Iterator, List, Mapping
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+PRODUCT_INFO_CLASS = "DataElementsTables"
+SECTION_CLASS = "Section"
+
+# Elements whose text is not page content (BeautifulSoup's get_text skips them too)
+_SKIPPED_TAGS = {"script", "style", "template"}
+
+
+def empty_label(sectioncode_map: Mapping[str, str]) -> Dict[str, str]:
+    label_data = {v: "" for v in sectioncode_map.values()}
+    label_data["product_info_str"] = ""
+    return label_data
+
+
+def add_section(label_data: Dict[str, str], key: str, text: str) -> None:
+    label_data[key] = label_data[key] + "\n\n" + text if label_data[key] else text
+
+
+def _element_strings(element) -> Iterator[str]:
+    """Text nodes below `element` in document order, like BeautifulSoup's _all_strings."""
+    if isinstance(element.tag, str) and element.tag.lower() not in _SKIPPED_TAGS:
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from _element_strings(child)
+            if child.tail:
+                yield child.tail
+
+
+def element_text(element, separator: str = "\n") -> str:
+    """get_text(separator=separator, strip=True) of an lxml element."""
+    return separator.join(s for s in (s.strip() for s in _element_strings(element)) if s)
+
+
+def _section_key(classes: List[str], sectioncode: str, sectioncode_map: Mapping[str, str]):
+    return sectioncode_map.get(sectioncode) if SECTION_CLASS in classes else None
+
+
+def parse_label_html_lxml(html: str, sectioncode_map: Mapping[str, str]) -> Dict[str, str]:
+    """
+    Streams the label page through libxml2's HTML parser and only materialises the
+    `div.Section[data-sectioncode]` blocks listed in `sectioncode_map` and the
+    `div.DataElementsTables` blocks. Everything else is freed as soon as it has been parsed, so the
+    full document tree is never built. A listed section nested inside another listed section is
+    already part of that section's text and is not extracted a second time.
+    """
+    label_data = empty_label(sectioncode_map)
+    tables: List[str] = []
+    section, section_key, table = None, None, None  # outermost elements being kept
+
+    events = etree.iterparse(
+        io.BytesIO(html.encode("utf-8")), events=("start", "end"), html=True, encoding="utf-8",
+        remove_comments=True, huge_tree=True,
+    )
+    for event, element in events:
+        if event == "start":
+            if element.tag == "div":
+                classes = (element.get("class") or "").split()
+                key = _section_key(classes, element.get("data-sectioncode"), sectioncode_map)
+                if section is None and key is not None:
+                    section, section_key = element, key
+                if table is None and PRODUCT_INFO_CLASS in classes:
+                    table = element
+            continue
+
+        if element is section:
+            add_section(label_data, section_key, element_text(element))
+            section = section_key = None
+        if element is table:
+            tables.append(element_text(element))
+            table = None
+        if section is None and table is None:
+            # Drop the finished subtree and the already-processed siblings before it
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    if tables:
+        label_data["product_info_str"] = "\n\n".join(tables)
+    return label_data
+
+
+def parse_label_html_bs4(html: str, sectioncode_map: Mapping[str, str]) -> Dict[str, str]:
+    """BeautifulSoup (html.parser) extraction with the same output, used when lxml is not installed."""
+    label_data = empty_label(sectioncode_map)
+    soup = BeautifulSoup(html, "html.parser")
+
+    def is_listed_section(tag) -> bool:
+        return tag.name == "div" and _section_key(tag.get("class") or [], tag.get("data-sectioncode"), sectioncode_map) is not None
+
+    # 1) Extract main sections by data-sectioncode (outermost listed sections only)
+    for div in soup.find_all(is_listed_section):
+        if div.find_parent(is_listed_section) is None:
+            key = sectioncode_map[div["data-sectioncode"]]
+            add_section(label_data, key, div.get_text(separator="\n", strip=True))
+
+    # 2) Capture the product information tables (Ingredients and Appearance)
+    tables = [
+        div.get_text(separator="\n", strip=True)
+        for div in soup.find_all("div", class_=PRODUCT_INFO_CLASS)
+        if div.find_parent("div", class_=PRODUCT_INFO_CLASS) is None
+    ]
+    if tables:
+        label_data["product_info_str"] = "\n\n".join(tables)
+    return label_data
+
+
+def parse_label_html(html: str, sectioncode_map: Mapping[str, str]) -> Dict[str, str]:
+    """
+    Label sections (keys of `sectioncode_map` values) and product_info_str of a DailyMed label page.
+    """
+    if LXML_AVAILABLE:
+        return parse_label_html_lxml(html, sectioncode_map)
+    return parse_label_html_bs4(html, sectioncode_map)
@@ -0,0 +1,46 @@
+import asyncio
+import hashlib
+from typing import Dict
+
+from src.configuration import Configuration
+from src.dailymed.client import get_dailymed_client
+from src.dailymed.label_cache import get_label_cache
+from src.dailymed.label_parser import parse_label_html
+from src.dailymed.spl_index import get_spl_index
+
+
+async def get_label(setid: str, configurable: Configuration) -> Dict[str, str]:
+    """
+    Parsed label of `setid` (the configurable.SECTIONCODE_MAP sections and product_info_str):
+    from the local DailyMed SPL snapshot if it holds the label, otherwise live. Live labels are
+    cached per setid and SPL version, so an unchanged label is neither downloaded nor parsed
+    again. Otherwise the page is fetched through the shared async DailyMed client and parsed off
+    the event loop.
+    """
+    spl_index = get_spl_index(configurable)
+    if spl_index is not None:
+        local = await asyncio.to_thread(spl_index.label, setid, configurable.SECTIONCODE_MAP)
+        if local is not None:
+            return local[1]
+
+    client = get_dailymed_client(configurable)
+    label_cache = get_label_cache(configurable)
+    version = await client.spl_version(setid) if label_cache else None
+    if version is not None:
+        label_data = await asyncio.to_thread(label_cache.get, setid, version)
+        if label_data is not None:
+            return label_data
+
+    html = await client.label_html(setid)
+    if label_cache is None:
+        return await asyncio.to_thread(parse_label_html, html, configurable.SECTIONCODE_MAP)
+    if version is None:
+        # Unknown SPL version: the page content identifies the version instead
+        version = "sha256:" + hashlib.sha256(html.encode("utf-8")).hexdigest()
+        label_data = await asyncio.to_thread(label_cache.get, setid, version)
+        if label_data is not None:
+            return label_data
+
+    label_data = await asyncio.to_thread(parse_label_html, html, configurable.SECTIONCODE_MAP)
+    await asyncio.to_thread(label_cache.put, setid, version, label_data)
+    return label_data
@@ -0,0 +1,109 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.configuration import Configuration
+from src.dailymed.labels import get_label
+from src.state import PotentialRLD
+
+
+def rank_prefetch_candidates(potential_rlds: Sequence, limit: int) -> List[str]:
+    """
+    Setids worth prefetching, best first: the DailyMed search results of every RLD are taken
+    round-robin (each RLD's first hit, then each RLD's second hit, ...), so every RLD gets its
+    top-ranked candidates warm before any RLD gets its tail. `potential_RLDs` holds one list per
+    RLD (or a single PotentialRLD for a failed search).
+    """
+    per_rld = [group if isinstance(group, list) else [group] for group in potential_rlds]
+    setids: List[str] = []
+    for rank in range(max((len(group) for group in per_rld), default=0)):
+        for group in per_rld:
+            if rank < len(group) and isinstance(group[rank], PotentialRLD) and group[rank].setid:
+                if group[rank].setid not in setids:
+                    setids.append(group[rank].setid)
+            if len(setids) >= limit:
+                return setids
+    return setids
+
+
+class LabelPrefetcher:
+    """
+    Fetches and parses DailyMed labels in the background, into the label cache, while a study
+    waits for the formulator at an interrupt. Work runs on a dedicated event loop thread, since
+    the UI resumes the graph from a different event loop than the one that reached the interrupt.
+    One job per graph thread: bounded to max_labels labels and `timeout` seconds, and cancelled
+    when the thread resumes, starts a different job or is abandoned.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._jobs: Dict[str, Tuple[Tuple[str, ...], concurrent.futures.Future]] = {}
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="dailymed-label-prefetch", daemon=True).start()
+            return self._loop
+
+    def start(self, thread_id: str, setids: Sequence[str], configurable: Configuration) -> Optional[concurrent.futures.Future]:
+        """
+        Starts prefetching `setids` for `thread_id` (idempotent: the job already started for the
+        same setids is returned). The future resolves to the number of labels made warm.
+        """
+        setids = tuple(setids[:configurable.dailymed_prefetch_max_labels])
+        with self._lock:
+            job = self._jobs.get(thread_id)
+            if job is not None and job[0] == setids:
+                return job[1]
+        self.cancel(thread_id)
+        if not setids:
+            return None
+        future = asyncio.run_coroutine_threadsafe(self._prefetch(setids, configurable), self._event_loop())
+        with self._lock:
+            self._jobs[thread_id] = (setids, future)
+        return future
+
+    def cancel(self, thread_id: str) -> None:
+        with self._lock:
+            job = self._jobs.pop(thread_id, None)
+        if job is not None:
+            job[1].cancel()
+
+    async def _prefetch(self, setids: Sequence[str], configurable: Configuration) -> int:
+        semaphore = asyncio.Semaphore(configurable.dailymed_prefetch_concurrency)
+
+        async def prefetch(setid: str) -> bool:
+            async with semaphore:
+                try:
+                    await get_label(setid, configurable)
+                    return True
+                except Exception as e:
+                    logging.info(f"Label prefetch of {setid} failed: {e}")
+                    return False
+
+        tasks = [asyncio.ensure_future(prefetch(setid)) for setid in setids]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=configurable.dailymed_prefetch_timeout)
+            return sum(1 for task in done if not task.cancelled() and task.result())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_prefetcher = LabelPrefetcher()
+
+
+def start_label_prefetch(thread_id: str, potential_rlds: Sequence, configurable: Configuration) -> Optional[concurrent.futures.Future]:
+    """Prefetches the labels of the top-ranked potential RLDs of a graph thread (see LabelPrefetcher)."""
+    if configurable.dailymed_prefetch_max_labels <= 0:
+        return None
+    setids = rank_prefetch_candidates(potential_rlds, configurable.dailymed_prefetch_max_labels)
+    return _prefetcher.start(thread_id, setids, configurable)
+
+
+def cancel_label_prefetch(thread_id: str) -> None:
+    _prefetcher.cancel(thread_id)
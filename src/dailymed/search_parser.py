@@ -0,0 +1,74 @@
+import io
+from typing import Iterator, NamedTuple
+
+from bs4 import BeautifulSoup
+
+from src.dailymed.label_parser import LXML_AVAILABLE, element_text
+
+if LXML_AVAILABLE:
+    from lxml import etree
+
+# Classes of the <article> elements holding one DailyMed search result
+RESULT_CLASSES = {"row", "odd", "even"}
+
+
+class SearchResult(NamedTuple):
+    title: str
+    href: str
+    image_src: str
+
+
+def _has_class(element, name: str) -> bool:
+    return name in (element.get("class") or "").split()
+
+
+def iter_search_results_lxml(html: str) -> Iterator[SearchResult]:
+    """
+    Streams a DailyMed search results page and yields each result article with a drug-info link
+    as soon as its closing tag is parsed. Finished articles and the markup between them are freed,
+    and parsing stops as soon as the caller stops iterating.
+    """
+    events = etree.iterparse(
+        io.BytesIO(html.encode("utf-8")), events=("start", "end"), html=True, encoding="utf-8",
+        remove_comments=True, huge_tree=True,
+    )
+    article = None
+    for event, element in events:
+        if event == "start":
+            if article is None and element.tag == "article" and RESULT_CLASSES & set((element.get("class") or "").split()):
+                article = element
+            continue
+        if article is not None and element is not article:
+            continue
+
+        if element is article:
+            article = None
+            link = next((a for a in element.iter("a") if _has_class(a, "drug-info-link")), None)
+            if link is not None:
+                image = next((img for img in element.iter("img") if _has_class(img, "package-photo")), None)
+                yield SearchResult(
+                    element_text(link, separator=""),
+                    link.get("href", ""),
+                    image.get("src", "") if image is not None else "",
+                )
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def iter_search_results_bs4(html: str) -> Iterator[SearchResult]:
+    """BeautifulSoup (html.parser) version of iter_search_results_lxml, used when lxml is not installed."""
+    soup = BeautifulSoup(html, "html.parser")
+    for article in soup.find_all("article", {"class": list(RESULT_CLASSES)}):
+        link = article.select_one("a.drug-info-link")
+        if not link:
+            continue
+        image = article.select_one("img.package-photo")
+        yield SearchResult(link.get_text(strip=True), link.get("href", ""), image.get("src", "") if image else "")
+
+
+def iter_search_results(html: str) -> Iterator[SearchResult]:
+    """Search results (title, drug-info href, package photo src) of a DailyMed search page, in page order."""
+    if LXML_AVAILABLE:
+        return iter_search_results_lxml(html)
+    return iter_search_results_bs4(html)
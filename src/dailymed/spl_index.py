@@ -0,0 +1,340 @@
+import argparse
+import io
+import logging
+import os
+import re
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from src.configuration import Configuration
+from src.dailymed.db import ThreadLocalConnection
+from src.dailymed.label_parser import add_section, empty_label
+
+DEFAULT_INDEX_PATH = "./databases/dailymed_spl_index.sqlite"
+
+HL7 = "{urn:hl7-org:v3}"
+ACTIVE_INGREDIENT_CLASSES = {"ACTIB", "ACTIM", "ACTIR"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spls (
+    setid TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    effective_time TEXT,
+    title TEXT NOT NULL,
+    manufacturer TEXT,
+    product_names TEXT,
+    ingredients TEXT,
+    dosage_forms TEXT,
+    routes TEXT,
+    product_info TEXT
+);
+CREATE TABLE IF NOT EXISTS sections (
+    setid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    ancestor_codes TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (setid, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS spl_search USING fts5(
+    setid UNINDEXED, product_names, ingredients, dosage_forms, tokenize = "unicode61 remove_diacritics 2"
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_TOKEN = re.compile(r"[0-9A-Za-z]+")
+
+
+@dataclass
+class SplSection:
+    code: str
+    ancestor_codes: List[str]
+    text: str
+
+
+@dataclass
+class SplDocument:
+    """The parts of one SPL document the pipeline uses."""
+    setid: str
+    version: int
+    effective_time: str = ""
+    manufacturer: str = ""
+    product_names: List[str] = field(default_factory=list)
+    generic_names: List[str] = field(default_factory=list)
+    ingredients: List[str] = field(default_factory=list)
+    dosage_forms: List[str] = field(default_factory=list)
+    routes: List[str] = field(default_factory=list)
+    product_info: str = ""
+    sections: List[SplSection] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        """Search-result style title: "MARINOL (dronabinol) capsule"."""
+        name = self.product_names[0] if self.product_names else ""
+        generic = ", ".join(self.generic_names)
+        dosage_form = self.dosage_forms[0].lower() if self.dosage_forms else ""
+        return " ".join(part for part in (name, f"({generic})" if generic else "", dosage_form) if part)
+
+
+def _text_lines(element: ET.Element) -> List[str]:
+    """Stripped, non-empty text nodes below `element` (get_text(separator="\\n", strip=True))."""
+    return [s for s in (s.strip() for s in element.itertext()) if s]
+
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(v for v in values if v))
+
+
+def _product_info(product: ET.Element, route: str) -> List[str]:
+    """Product data elements in the layout of the label page's Ingredients and Appearance tables."""
+    name = product.findtext(f"{HL7}name", "").strip()
+    form = product.find(f"{HL7}formCode")
+    generic = product.findtext(f"{HL7}asEntityWithGeneric/{HL7}genericMedicine/{HL7}name", "").strip()
+    lines = [name.upper(), f"{generic.lower()} {(form.get('displayName') or '').lower() if form is not None else ''}".strip()]
+    lines += ["Product Information", "Route of Administration", route] if route else ["Product Information"]
+
+    active, inactive = [], []
+    for ingredient in product.findall(f"{HL7}ingredient"):
+        substance = ingredient.find(f"{HL7}ingredientSubstance")
+        if substance is None:
+            continue
+        substance_name = substance.findtext(f"{HL7}name", "").strip()
+        unii = substance.find(f"{HL7}code")
+        entry = f"{substance_name} (UNII: {unii.get('code')})" if unii is not None and unii.get("code") else substance_name
+        if ingredient.get("classCode") in ACTIVE_INGREDIENT_CLASSES:
+            numerator = ingredient.find(f"{HL7}quantity/{HL7}numerator")
+            strength = f"{numerator.get('value')} {numerator.get('unit')}" if numerator is not None else ""
+            active += [entry, strength] if strength else [entry]
+        else:
+            inactive.append(entry)
+    if active:
+        lines += ["Active Ingredient/Active Moiety"] + active
+    if inactive:
+        lines += ["Inactive Ingredients"] + inactive
+    return [line for line in lines if line]
+
+
+def _walk_sections(parent: ET.Element, ancestors: List[str], sections: List[SplSection]) -> None:
+    for section in parent.iterfind(f"{HL7}component/{HL7}section"):
+        code_element = section.find(f"{HL7}code")
+        code = code_element.get("code", "") if code_element is not None else ""
+        sections.append(SplSection(code, list(ancestors), "\n".join(_text_lines(section))))
+        _walk_sections(section, ancestors + [code], sections)
+
+
+def parse_spl(xml: bytes) -> Optional[SplDocument]:
+    """SplDocument of an SPL XML document, or None if it has no setId."""
+    root = ET.fromstring(xml)
+    setid = root.find(f"{HL7}setId")
+    if setid is None or not setid.get("root"):
+        return None
+    version = root.find(f"{HL7}versionNumber")
+    effective_time = root.find(f"{HL7}effectiveTime")
+    document = SplDocument(
+        setid=setid.get("root"),
+        version=int(version.get("value", "0")) if version is not None else 0,
+        effective_time=effective_time.get("value", "") if effective_time is not None else "",
+        manufacturer=root.findtext(f"{HL7}author/{HL7}assignedEntity/{HL7}representedOrganization/{HL7}name", "").strip(),
+    )
+
+    product_info = []
+    for outer in root.iter(f"{HL7}manufacturedProduct"):
+        product = outer.find(f"{HL7}manufacturedProduct")
+        if product is None:
+            continue
+        route_code = outer.find(f"{HL7}consumedIn/{HL7}substanceAdministration/{HL7}routeCode")
+        route = (route_code.get("displayName") or "") if route_code is not None else ""
+        form = product.find(f"{HL7}formCode")
+        document.product_names.append(product.findtext(f"{HL7}name", "").strip())
+        document.generic_names.append(
+            product.findtext(f"{HL7}asEntityWithGeneric/{HL7}genericMedicine/{HL7}name", "").strip().lower()
+        )
+        document.dosage_forms.append((form.get("displayName") or "") if form is not None else "")
+        document.routes.append(route)
+        for ingredient in product.findall(f"{HL7}ingredient"):
+            if ingredient.get("classCode") in ACTIVE_INGREDIENT_CLASSES:
+                document.ingredients.append(ingredient.findtext(f"{HL7}ingredientSubstance/{HL7}name", "").strip())
+        product_info.append("\n".join(_product_info(product, route)))
+
+    for name in ("product_names", "generic_names", "ingredients", "dosage_forms", "routes"):
+        setattr(document, name, _unique(getattr(document, name)))
+    document.product_info = "\n\n".join(product_info)
+
+    body = root.find(f"{HL7}component/{HL7}structuredBody")
+    if body is not None:
+        _walk_sections(body, [], document.sections)
+    return document
+
+
+def iter_spl_xml(source: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    (name, XML bytes) of every SPL document under `source`: loose .xml files and .zip archives,
+    including the zip-of-zips layout of the DailyMed bulk downloads (one inner ZIP per label).
+    """
+    def from_zip(name: str, archive: zipfile.ZipFile) -> Iterator[Tuple[str, bytes]]:
+        for member in archive.namelist():
+            lower = member.lower()
+            if lower.endswith(".xml"):
+                yield f"{name}/{member}", archive.read(member)
+            elif lower.endswith(".zip"):
+                with zipfile.ZipFile(io.BytesIO(archive.read(member))) as inner:
+                    yield from from_zip(f"{name}/{member}", inner)
+
+    paths = [source] if os.path.isfile(source) else sorted(
+        os.path.join(directory, f) for directory, _, files in os.walk(source) for f in files
+    )
+    for path in paths:
+        if path.lower().endswith(".xml"):
+            with open(path, "rb") as f:
+                yield path, f.read()
+        elif path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                yield from from_zip(path, archive)
+
+
+def fts_query(text: str, prefix: bool = False) -> str:
+    """FTS5 query matching all tokens of `text` (the last one as a prefix if `prefix`)."""
+    tokens = [f'"{t}"' for t in _TOKEN.findall(text)]
+    if prefix and tokens:
+        tokens[-1] += "*"
+    return " ".join(tokens)
+
+
+class SplIndex:
+    """
+    Local snapshot of DailyMed SPL documents in SQLite: one row per setid (latest version), the
+    text of every section keyed by LOINC code, and an FTS5 index over product names, active
+    ingredients and dosage forms for DailyMed-style searches. Lookups take milliseconds and need
+    no network; labels newer than the snapshot are not in it and are fetched live.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connect = ThreadLocalConnection(path, _SCHEMA)
+
+    def add(self, document: SplDocument) -> bool:
+        """Stores `document` unless the index already holds the same or a newer version of it."""
+        connection = self._connect()
+        row = connection.execute("SELECT version FROM spls WHERE setid = ?", (document.setid,)).fetchone()
+        if row is not None and row[0] >= document.version:
+            return False
+        connection.execute("DELETE FROM sections WHERE setid = ?", (document.setid,))
+        connection.execute("DELETE FROM spl_search WHERE setid = ?", (document.setid,))
+        connection.execute(
+            "INSERT OR REPLACE INTO spls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                document.setid, document.version, document.effective_time, document.title, document.manufacturer,
+                "\n".join(document.product_names), "\n".join(document.ingredients),
+                "\n".join(document.dosage_forms), "\n".join(document.routes), document.product_info,
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO sections VALUES (?, ?, ?, ?, ?)",
+            [(document.setid, i, s.code, " ".join(s.ancestor_codes), s.text) for i, s in enumerate(document.sections)],
+        )
+        connection.execute(
+            "INSERT INTO spl_search VALUES (?, ?, ?, ?)",
+            (
+                document.setid, " ".join(document.product_names + document.generic_names),
+                " ".join(document.ingredients), " ".join(document.dosage_forms),
+            ),
+        )
+        return True
+
+    def ingest(self, source: str) -> Dict[str, int]:
+        """Adds every SPL document under `source` (see iter_spl_xml) in one transaction."""
+        counts = {"read": 0, "added": 0, "skipped": 0, "failed": 0}
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for name, xml in iter_spl_xml(source):
+                counts["read"] += 1
+                try:
+                    document = parse_spl(xml)
+                except ET.ParseError as e:
+                    logging.warning(f"Skipping unreadable SPL {name}: {e}")
+                    counts["failed"] += 1
+                    continue
+                counts["added" if document is not None and self.add(document) else "skipped"] += 1
+            connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('snapshot_time', ?)", (time.strftime("%Y-%m-%dT%H:%M:%S"),)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return counts
+
+    def search(self, name: str, dosage_form: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """
+        (setid, title) of the labels whose product / generic name contains every word of `name` and
+        whose dosage form starts with `dosage_form`, best match first.
+        """
+        name_query, form_query = fts_query(name), fts_query(dosage_form, prefix=True)
+        if not name_query:
+            return []
+        query = f"{{product_names ingredients}} : ({name_query})"
+        if form_query:
+            query += f" AND dosage_forms : ({form_query})"
+        try:
+            rows = self._connect().execute(
+                "SELECT spls.setid, spls.title FROM spl_search JOIN spls ON spls.setid = spl_search.setid "
+                "WHERE spl_search MATCH ? ORDER BY bm25(spl_search), spls.version DESC LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logging.warning(f"SPL index search failed for {query!r}: {e}")
+            return []
+        return rows
+
+    def label(self, setid: str, sectioncode_map: Mapping[str, str]) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        (SPL version, label fields) of `setid` in the layout of parse_label_html (outermost listed
+        sections only, product data elements as product_info_str), or None if not in the snapshot.
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT version, product_info FROM spls WHERE setid = ?", (setid,)).fetchone()
+        if row is None:
+            return None
+        label_data = empty_label(sectioncode_map)
+        sections = connection.execute(
+            "SELECT code, ancestor_codes, text FROM sections WHERE setid = ? ORDER BY position", (setid,)
+        )
+        for code, ancestor_codes, text in sections:
+            if code in sectioncode_map and not any(c in sectioncode_map for c in ancestor_codes.split()):
+                add_section(label_data, sectioncode_map[code], text)
+        label_data["product_info_str"] = row[1] or ""
+        return row[0], label_data
+
+
+_spl_indexes: Dict[str, SplIndex] = {}
+
+
+def get_spl_index(configurable: Configuration) -> Optional[SplIndex]:
+    """The local SPL snapshot at dailymed_spl_index_path, or None if it has not been built."""
+    path = configurable.dailymed_spl_index_path
+    if not path or not os.path.exists(path):
+        return None
+    if path not in _spl_indexes:
+        _spl_indexes[path] = SplIndex(path)
+    return _spl_indexes[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the local DailyMed SPL index.")
+    parser.add_argument("source", help="Directory (or file) of SPL XML files / DailyMed bulk ZIP archives.")
+    parser.add_argument("--index-path", default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(os.path.dirname(os.path.abspath(args.index_path)), exist_ok=True)
+    counts = SplIndex(args.index_path).ingest(args.source)
+    print(f"{args.index_path}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, Optional
+
+from src.configuration import Configuration
+from src.dailymed.client import get_dailymed_client
+
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+THUMBNAILS_DIR = "thumbnails"
+
+# Pillow format name and file extension per thumbnail_format
+THUMBNAIL_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg")}
+
+
+def thumbnail_format(name: str) -> str:
+    """`name` if Pillow can write it, else "jpeg" (Pillow builds without libwebp)."""
+    name = name.lower()
+    if name not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Unknown thumbnail format {name!r}; expected one of {sorted(THUMBNAIL_FORMATS)}")
+    if name == "webp" and not features.check("webp"):
+        return "jpeg"
+    return name
+
+
+def thumbnail_path(cache_dir: str, url: str, fmt: str) -> str:
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, THUMBNAILS_DIR, digest[:2], digest + THUMBNAIL_FORMATS[fmt][1])
+
+
+def make_thumbnail(data: bytes, path: str, max_px: int, fmt: str) -> str:
+    """
+    Downsizes an image to fit in max_px x max_px and writes it to `path` atomically. JPEG package
+    photos are decoded at a reduced scale (Image.draft), so large photos cost little CPU.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (max_px, max_px))
+        thumbnail = ImageOps.exif_transpose(image)
+        thumbnail.thumbnail((max_px, max_px))
+        if thumbnail.mode not in ("RGB", "L"):
+            thumbnail = thumbnail.convert("RGB")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            thumbnail.save(f, THUMBNAIL_FORMATS[fmt][0], quality=80)
+        os.replace(tmp_path, path)
+    return path
+
+
+async def fetch_thumbnails(urls: Iterable[str], configurable: Configuration) -> Dict[str, str]:
+    """
+    Local thumbnail path per image URL (potential RLD package photos). Thumbnails are cached under
+    cache_dir by URL hash; missing ones are downloaded concurrently through the shared DailyMed
+    client and downsized off the event loop. URLs that cannot be fetched or decoded are left out.
+    """
+    if not PIL_AVAILABLE:
+        logging.warning("Pillow is not installed; potential RLD thumbnails are not generated")
+        return {}
+    fmt = thumbnail_format(configurable.thumbnail_format)
+    client = get_dailymed_client(configurable)
+
+    async def thumbnail(url: str) -> Optional[str]:
+        path = thumbnail_path(configurable.cache_dir, url, fmt)
+        if os.path.exists(path):
+            return path
+        try:
+            response = await client.get(url)
+            return await asyncio.to_thread(make_thumbnail, response.content, path, configurable.thumbnail_max_px, fmt)
+        except Exception as e:
+            logging.warning(f"No thumbnail for {url}: {e}")
+            return None
+
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    paths = await asyncio.gather(*(thumbnail(url) for url in unique_urls))
+    return {url: path for url, path in zip(unique_urls, paths) if path}
@@ -13,6 +13,7 @@ class InitializeLiteratureResearch:
                 {
                     "API": API,
                     "product_information_child": product_information,
+                    "pubchem_compound": state.get("pubchem_compounds", {}).get(API.API_name),
                 }
             ) 
             for API in state["apis"]
@@ -1,18 +1,46 @@
 from langchain_core.runnables import RunnableConfig
-from src.state import DrugDevelopmentResearchGraphState
+from src.configuration import Configuration
+from src.orange_book import get_orange_book_index
+from src.state import DrugDevelopmentResearchGraphState, API, OrangeBookPatentRecord
 from langgraph.constants import Send
-from langchain_core.runnables import RunnableConfig
+from typing import List
+import logging
 
 class ParallelizePatentResearch:
     def __init__(self):
         pass
 
+    def orange_book_patents(self, state: DrugDevelopmentResearchGraphState, api: API, config: RunnableConfig) -> List[OrangeBookPatentRecord]:
+        """
+        Patent and exclusivity facts from the local Orange Book for every RLD found for `api`
+        (combination RLDs list all their APIs in api_name).
+        """
+        rlds = [
+            rld for rld in state.get("RLDs", []) or []
+            if rld.appl_no and api.API_name.lower() in rld.api_name.lower()
+        ]
+        if not rlds:
+            return []
+
+        try:
+            configurable = Configuration.from_runnable_config(config)
+            index = get_orange_book_index(
+                configurable.local_orange_book_zip_path,
+                configurable.orange_book_store_dir,
+                configurable.orange_book_reload_interval,
+            )
+            return [index.patents.record_for_rld(rld) for rld in rlds]
+        except Exception as e:
+            logging.error(f"Orange Book patent lookup failed for {api.API_name}: {e}")
+            return []
+
     def run(self, state: DrugDevelopmentResearchGraphState, config: RunnableConfig):
         return [
             Send("patent_research", 
                 {
                     "api": api,
+                    "orange_book_patents": self.orange_book_patents(state, api, config),
                 }
             ) 
             for api in state["apis"]
-        ]
\ No newline at end of file
+        ]
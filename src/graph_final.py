@@ -11,6 +11,7 @@ from src.nodes import(
     ExtractInputInformation,
     ConsolidateContext,
     RenderReport,
+    ResolvePubChemCompounds,
 )
 
 from src.edges import(
@@ -24,6 +25,7 @@ extract_input_information = ExtractInputInformation()
 initialize_literature_research_agent = InitializeLiteratureResearch()
 consolidate_context = ConsolidateContext()
 render_report = RenderReport()
+resolve_pubchem_compounds = ResolvePubChemCompounds()
 parallelize_patent_research = ParallelizePatentResearch()
 
 is_rld_combination_edge = IsRLDCombination()
@@ -36,6 +38,7 @@ drug_development_researcher_memory = MemorySaver()
 # 1) Basic extraction
 drug_development_researcher_graph_builder.add_node("extract_apis_information", extract_apis_information.run)
 drug_development_researcher_graph_builder.add_node("extract_input_information", extract_input_information.run)
+drug_development_researcher_graph_builder.add_node("resolve_pubchem_compounds", resolve_pubchem_compounds.run)
 
 # 2) Literature research subgraph
 drug_development_researcher_graph_builder.add_node("literature_research", literature_researcher_graph_builder.compile(checkpointer=drug_development_researcher_memory))
@@ -60,9 +63,10 @@ drug_development_researcher_graph_builder.add_edge("extract_apis_information", "
 # Go to product_research subgraph
 drug_development_researcher_graph_builder.add_edge("extract_apis_information", "product_research")
 
-# Literature research (parallel path)
+# Literature research (parallel path): every API is resolved in PubChem at once, then one branch per API
+drug_development_researcher_graph_builder.add_edge("extract_input_information", "resolve_pubchem_compounds")
 drug_development_researcher_graph_builder.add_conditional_edges(
-    "extract_input_information",
+    "resolve_pubchem_compounds",
     initialize_literature_research_agent.run,
     ["literature_research"]
 )
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import weakref
+from typing import Any, Callable, Dict, TypeVar
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when the h2 package is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+T = TypeVar("T")
+
+# Pooled clients per running event loop and name: httpx pools cannot be shared across loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def new_async_client(max_connections: int = 20, timeout: float = 10.0, http2: bool = True, **kwargs) -> httpx.AsyncClient:
+    """An httpx.AsyncClient with a keep-alive pool of max_connections, on HTTP/2 when `h2` is installed."""
+    if http2 and not HTTP2_AVAILABLE:
+        logging.warning("h2 is not installed; HTTP clients fall back to HTTP/1.1")
+    return httpx.AsyncClient(
+        http2=http2 and HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        **kwargs,
+    )
+
+
+def pooled_client(name: str, factory: Callable[[], T]) -> T:
+    """
+    The client `name` of the running event loop, created by `factory` on first use (and again if
+    it was closed). Every node and Send branch on the loop shares it, with its warm connections.
+    Clients are httpx.AsyncClient or wrap one (anything with `is_closed` and `aclose()`).
+    """
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None or client.is_closed:
+        client = clients[name] = factory()
+    return client
+
+
+async def close_http_clients() -> None:
+    """Closes the pooled clients of the running event loop; call it when the loop's work is done."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for name, client in clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.warning(f"Could not close the {name} HTTP client: {e}")
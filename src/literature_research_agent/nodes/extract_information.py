@@ -2,7 +2,7 @@ import asyncio
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
@@ -20,7 +20,7 @@ class ExtractInformation:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0)
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="extract_information")
         structured_llm = llm.with_structured_output(APILiteratureData)
         
         report_language = configurable.language_for_report
@@ -3,7 +3,7 @@ from src.literature_research_agent.state import LiteratureResearchGraphState
 from src.state import TavilySearchInput
 from src.literature_research_agent.prompts import PROMPT_GENERATE_SUB_QUESTIONS
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 
 class GenerateSubQuestions:
@@ -29,7 +29,7 @@ class GenerateSubQuestions:
         # Get configuration and initialize the LLM.
         configurable = Configuration.from_runnable_config(config)
         number_of_queries = configurable.number_of_queries
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0)
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="generate_sub_questions")
         structured_llm = llm.with_structured_output(TavilySearchInput)
                 
         # Build the prompt using the provided metaprompt guidelines.
@@ -1,6 +1,6 @@
 from datetime import datetime
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.runnables import RunnableConfig
 from src.literature_research_agent.property_research_graph.state import PropertyResearchGraphState
 from src.state import PropertyReportSection
@@ -21,7 +21,7 @@ class GeneratePropertyReport:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="generate_property_report") 
         
         structured_llm = llm.with_structured_output(PropertyReportSection)
         
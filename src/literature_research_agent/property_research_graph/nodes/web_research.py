@@ -4,9 +4,11 @@ from datetime import datetime
 
 from src.literature_research_agent.property_research_graph.state import PropertyResearchGraphState
 from tavily import AsyncTavilyClient
+from tavily.errors import UsageLimitExceededError
 
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
+from src.rate_limit import TAVILY_HOST, get_rate_limiter
 
 def deduplicate_and_format_sources(results, max_tokens_per_source=300, include_raw_content=True):
     """
@@ -67,13 +69,14 @@ class WebResearch:
         query_with_date = f"{query} {datetime.now().strftime('%m-%Y')}"
 
         try:
-            # Asynchronous call to Tavily API
-            response = await self.tavily_client.search(
-                query=query_with_date,
-                max_results=max_results_query,
-                include_raw_content=True,
-                include_domains = ["https://patents.google.com/", "https://ppubs.uspto.gov/pubwebapp/static/pages/ppubsbasic.html", "https://patentscope.wipo.int/search/es/search.jsf", "https://pubmed.ncbi.nlm.nih.gov/", "https://arxiv.org/", "https://core.ac.uk/", "https://www.sciencedirect.com/", "https://www.researchgate.net/", "https://www.semanticscholar.org/", "https://pubchem.ncbi.nlm.nih.gov/"]
-            )
+            # Asynchronous call to Tavily API, through the shared rate limiter
+            async with get_rate_limiter(configurable).limit(TAVILY_HOST, throttle_errors=(UsageLimitExceededError,)):
+                response = await self.tavily_client.search(
+                    query=query_with_date,
+                    max_results=max_results_query,
+                    include_raw_content=True,
+                    include_domains = ["https://patents.google.com/", "https://ppubs.uspto.gov/pubwebapp/static/pages/ppubsbasic.html", "https://patentscope.wipo.int/search/es/search.jsf", "https://pubmed.ncbi.nlm.nih.gov/", "https://arxiv.org/", "https://core.ac.uk/", "https://www.sciencedirect.com/", "https://www.researchgate.net/", "https://www.semanticscholar.org/", "https://pubchem.ncbi.nlm.nih.gov/"]
+                )
             # Ensure response contains 'results'
             web_research_results = response.get("results", [])
             
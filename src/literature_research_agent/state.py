@@ -1,7 +1,7 @@
 from langgraph.graph import add_messages
 from langchain_core.messages import AnyMessage
 from typing import TypedDict, List, Annotated, Dict, Union, Optional
-from src.state import ProductInformation, API, TavilyQuery, APILiteratureResearchData, APILiteratureData, PropertyReportSection, RLDReportSection
+from src.state import ProductInformation, API, CompoundProperties, TavilyQuery, APILiteratureResearchData, APILiteratureData, PropertyReportSection, RLDReportSection
 from pydantic import BaseModel, Field
 import operator
 
@@ -47,6 +47,8 @@ class APIExternalData(BaseModel):
 class LiteratureResearchGraphState(TypedDict):
     API: API
     product_information_child: ProductInformation
+    # Resolved by the parent graph for every API of the study (see ResolvePubChemCompounds)
+    pubchem_compound: Optional[CompoundProperties]
     api_external_APIkey_data: APIExternalData
     api_research_property_report: Annotated[List[PropertyReportSection], operator.add]
     search_queries: List[TavilyQuery]
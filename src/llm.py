@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+from collections import defaultdict
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from langchain_openai import ChatOpenAI
+
+from src.configuration import Configuration
+from src.dailymed.db import ThreadLocalConnection
+
+LLM_CACHE_FILE = "llm_responses.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    generations TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def _without_message_ids(obj: Any) -> Any:
+    """A serialized message list with the message ids (fresh per run and thread) removed."""
+    if isinstance(obj, list):
+        return [_without_message_ids(item) for item in obj]
+    if isinstance(obj, dict):
+        if "lc" in obj and isinstance(obj.get("kwargs"), dict):
+            kwargs = {k: _without_message_ids(v) for k, v in obj["kwargs"].items() if k != "id"}
+            return {**obj, "kwargs": kwargs}
+        return {k: _without_message_ids(v) for k, v in obj.items()}
+    return obj
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Content address of an LLM call. `prompt` is the serialized message list and `llm_string` the
+    model, its parameters and the bound tools / structured-output schema (as built by LangChain).
+    """
+    try:
+        prompt = json.dumps(_without_message_ids(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        pass
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Chat model responses by content address (cache_key), in a WAL-mode SQLite file shared by
+    threads and worker processes. When the stored responses exceed max_bytes, the least recently
+    used ones are evicted. Hits and misses are counted per node (see for_node / stats).
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connect = ThreadLocalConnection(path, _SCHEMA)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def _count(self, node: str, hit: bool) -> None:
+        with self._lock:
+            self._stats[node]["hits" if hit else "misses"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hits and misses per node since the process started."""
+        with self._lock:
+            return {node: dict(counts) for node, counts in self._stats.items()}
+
+    def lookup(self, prompt: str, llm_string: str, node: str = "") -> Optional[Sequence[Generation]]:
+        key = cache_key(prompt, llm_string)
+        connection = self._connect()
+        row = connection.execute("SELECT generations FROM responses WHERE key = ?", (key,)).fetchone()
+        self._count(node, row is not None)
+        if row is None:
+            return None
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return [loads(generation, allowed_objects="core") for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        generations = []
+        for generation in return_val:
+            message = getattr(generation, "message", None)
+            if message is not None and message.id is not None:
+                # A cached message gets a fresh id when it is reused, like a new response would
+                generation = generation.model_copy(update={"message": message.model_copy(update={"id": None})})
+            generations.append(dumps(generation))
+        value = json.dumps(generations)
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (cache_key(prompt, llm_string), value, len(value), now, now),
+        )
+        self.evict()
+
+    def evict(self) -> None:
+        """Drops least recently used responses until the cache fits in max_bytes."""
+        connection = self._connect()
+        excess = (connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]) - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            freed += size
+            if freed >= excess:
+                break
+
+    def clear(self, **kwargs: Any) -> None:
+        self._connect().execute("DELETE FROM responses")
+
+    def for_node(self, node: str) -> "NodeLLMCache":
+        return NodeLLMCache(self, node)
+
+
+class NodeLLMCache(BaseCache):
+    """The view of an LLMResponseCache used by one node, so its hits and misses are counted apart."""
+
+    def __init__(self, cache: LLMResponseCache, node: str):
+        self.cache = cache
+        self.node = node
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        return self.cache.lookup(prompt, llm_string, node=self.node)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.cache.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.cache.clear(**kwargs)
+
+
+_llm_caches: Dict[str, LLMResponseCache] = {}
+
+
+def get_llm_cache(configurable: Configuration) -> Optional[LLMResponseCache]:
+    """The process-wide LLM response cache under cache_dir, or None if llm_cache_enabled is off."""
+    if not configurable.llm_cache_enabled:
+        return None
+    path = os.path.join(configurable.cache_dir, LLM_CACHE_FILE)
+    if path not in _llm_caches:
+        os.makedirs(configurable.cache_dir, exist_ok=True)
+        _llm_caches[path] = LLMResponseCache(path, configurable.llm_cache_max_mb * 2 ** 20)
+    return _llm_caches[path]
+
+
+def get_chat_model(configurable: Configuration, model: str, node: str, temperature: float = 0, **kwargs) -> ChatOpenAI:
+    """
+    ChatOpenAI for `node`. Deterministic (temperature 0) calls are answered from the shared LLM
+    response cache when the same model, messages, schema and parameters were seen before, unless
+    the node is listed in llm_cache_disabled_nodes.
+    """
+    cache = get_llm_cache(configurable)
+    if cache is None or temperature != 0 or node in configurable.llm_cache_disabled_nodes:
+        return ChatOpenAI(model=model, temperature=temperature, cache=False, **kwargs)
+    return ChatOpenAI(model=model, temperature=temperature, cache=cache.for_node(node), **kwargs)
+
+
+def log_llm_cache_stats(configurable: Configuration) -> None:
+    """Logs the hits and misses of the LLM response cache per node."""
+    cache = get_llm_cache(configurable)
+    if cache is not None:
+        for node, counts in sorted(cache.stats().items()):
+            logging.info(f"LLM cache {node}: {counts['hits']} hits, {counts['misses']} misses")
@@ -2,5 +2,6 @@ from .extract_input_information import ExtractInputInformation
 from .consolidate_context import ConsolidateContext
 from .render_report import RenderReport
 from .extract_apis_information import ExtractAPIsInformation
+from .resolve_pubchem_compounds import ResolvePubChemCompounds
 
-__all__ = ["ExtractInputInformation", "ConsolidateContext", "RenderReport", "ExtractAPIsInformation"]
\ No newline at end of file
+__all__ = ["ExtractInputInformation", "ConsolidateContext", "RenderReport", "ExtractAPIsInformation", "ResolvePubChemCompounds"]
\ No newline at end of file
@@ -1,6 +1,6 @@
 import asyncio
 from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_community.document_loaders import PyPDFLoader
@@ -19,7 +19,7 @@ class ExtractAPIsInformation:
         # Initialize the node elements using the configuration.
         conf = Configuration.from_runnable_config(config)
         language_for_extraction = conf.language_for_extraction
-        llm = ChatOpenAI(model=conf.gpt4omini, temperature=0)
+        llm = get_chat_model(conf, conf.gpt4omini, node="extract_apis_information")
         
         # Configure structured output for the ProductInformation model.
         structured_llm = llm.with_structured_output(APIs)
@@ -1,6 +1,6 @@
 import asyncio
 from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_community.document_loaders import PyPDFLoader
@@ -62,7 +62,7 @@ class ExtractInputInformation:
 
         # Initialize the language model using the configuration.
         conf = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=conf.gpt4omini, temperature=0)
+        llm = get_chat_model(conf, conf.gpt4omini, node="extract_input_information")
         # Configure structured output for the ProductInformation model.
         structured_llm = llm.with_structured_output(ProductInformation)
 
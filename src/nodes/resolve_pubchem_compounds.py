@@ -0,0 +1,27 @@
+import logging
+from src.configuration import Configuration
+from src.pubchem import get_pubchem_resolver
+from src.state import DrugDevelopmentResearchGraphState
+from langchain_core.runnables import RunnableConfig
+
+class ResolvePubChemCompounds:
+    """
+    Resolves the PubChem identifiers (CID, SMILES, formula, weight, IUPAC name, CAS) of every API
+    of the study in one batch, before the literature research branches start; each branch then
+    reads its own compound instead of resolving it separately.
+    """
+    def __init__(self):
+        self.configurable = None
+
+    async def resolve_pubchem_compounds(self, state: DrugDevelopmentResearchGraphState, config: RunnableConfig):
+        resolver = get_pubchem_resolver(Configuration.from_runnable_config(config))
+        try:
+            compounds = await resolver.resolve_many(api.API_name for api in state["apis"])
+        except Exception as e:
+            # The branches resolve their own API when the batch is not available
+            logging.error(f"Batch PubChem resolution failed: {e}")
+            compounds = {}
+        return {"pubchem_compounds": compounds}
+
+    async def run(self, state: DrugDevelopmentResearchGraphState, config: RunnableConfig):
+        return await self.resolve_pubchem_compounds(state, config)
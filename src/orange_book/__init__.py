@@ -0,0 +1,19 @@
+from src.orange_book.store import OrangeBookStore, OrangeBookTable, StringColumn, zip_content_hash
+from src.orange_book.patents import OrangeBookPatentIndex
+from src.orange_book.vocabulary import DosageFormVocabulary
+from src.orange_book.index import OrangeBookIndex, get_orange_book_index, refresh_orange_book_index
+from src.orange_book.update import rollback_orange_book, update_orange_book
+
+__all__ = [
+    "OrangeBookStore",
+    "OrangeBookTable",
+    "StringColumn",
+    "zip_content_hash",
+    "OrangeBookPatentIndex",
+    "DosageFormVocabulary",
+    "OrangeBookIndex",
+    "get_orange_book_index",
+    "refresh_orange_book_index",
+    "update_orange_book",
+    "rollback_orange_book",
+]
@@ -0,0 +1,434 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.orange_book.fuzzy import FuzzyMatcher, canonical_ingredient, dosage_form_key
+from src.orange_book.inverted_index import InvertedIndex
+from src.orange_book.patents import OrangeBookPatentIndex
+from src.orange_book.vocabulary import DOSAGE_FORM_MATCH_MODES, DosageFormVocabulary
+from src.orange_book.store import DEFAULT_STORE_DIR, OrangeBookStore
+
+
+class OrangeBookIndex:
+    """
+    Read-only, query-ready view over one OrangeBookStore.
+
+    Everything the search nodes used to recompute per call (the DF;Route split, the RLD / RS / DSCN
+    flags) is computed once here, together with token/trigram inverted indexes over Ingredient,
+    Trade_Name and both halves of DF;Route. Substring filters are bitmap intersections instead of
+    row scans. Queries never mutate the index, so one instance can be shared by every node,
+    session and thread in the process.
+    """
+
+    RLD_CACHE_SIZE = 4096
+
+    def __init__(self, store: OrangeBookStore, previous: Optional["OrangeBookIndex"] = None):
+        """
+        `previous` is the index currently serving queries. When `store` is an incremental update of
+        its release (see src.orange_book.update), only the changed dictionary values are indexed and
+        cached lookups that the changed rows cannot affect are carried over.
+        """
+        self.store = store
+        self.content_hash = store.content_hash
+        if previous is not None and store.parent_hash != previous.content_hash:
+            previous = None
+
+        products = store.products.to_dataframe()
+
+        # Split "DF;Route" => DosageForm + Route, as the search nodes always did
+        df_route = products["DF;Route"].str.split(";", expand=True, n=1)
+        products["DosageForm"] = df_route[0].str.lower().str.strip()
+        products["Route"] = df_route[1].str.lower().str.strip() if df_route.shape[1] > 1 else None
+        self.products = products
+
+        # Inverted indexes over the distinct values of each column, plus the per-row value codes
+        ingredient = store.products["Ingredient"]
+        trade_name = store.products["Trade_Name"]
+        df_route_column = store.products["DF;Route"]
+        df_route_parts = [value.split(";", 1) for value in df_route_column.values]
+        self.ingredient_index = self._inverted_index(ingredient.values, previous and previous.ingredient_index)
+        self.ingredient_codes = np.asarray(ingredient.codes)
+        self.trade_name_index = self._inverted_index(trade_name.values, previous and previous.trade_name_index)
+        self.trade_name_codes = np.asarray(trade_name.codes)
+        self.dosage_form_index = self._inverted_index(
+            [parts[0].strip() for parts in df_route_parts], previous and previous.dosage_form_index
+        )
+        self.route_index = self._inverted_index(
+            [parts[1].strip() if len(parts) > 1 else None for parts in df_route_parts], previous and previous.route_index
+        )
+        self.df_route_codes = np.asarray(df_route_column.codes)
+        # Integer dosage-form / family / route codes of the DF;Route dictionary
+        self.vocabulary = DosageFormVocabulary(df_route_column.values)
+
+        self.is_not_dscn = products["Appl_Type"].str.strip().str.upper().to_numpy() != "DSCN"
+        self.is_combination = products["Ingredient"].str.contains(";", na=False, regex=False).to_numpy()
+        self.is_rld = products["RLD"].str.strip().str.upper().to_numpy() == "YES"
+        self.is_rs = products["RS"].str.strip().str.upper().to_numpy() == "YES"
+
+        # Candidate rows for single-ingredient searches, with their codes and flags, for batch queries
+        self.single_ingredient_rows = np.flatnonzero(self.is_not_dscn & ~self.is_combination)
+        self._single_ingredient_codes = self.ingredient_codes[self.single_ingredient_rows]
+        self._single_df_route_codes = self.df_route_codes[self.single_ingredient_rows]
+        self._single_is_rld = self.is_rld[self.single_ingredient_rows]
+        self._single_is_rs = self.is_rs[self.single_ingredient_rows]
+
+        # (Appl_No, Product_No) -> patents / exclusivities
+        self.patents = OrangeBookPatentIndex(store, previous and previous.patents)
+
+        # Fuzzy matchers over the Ingredient / dosage-form vocabularies, built on the first fuzzy query
+        self._ingredient_matcher: Optional[FuzzyMatcher] = None
+        self._dosage_form_matcher: Optional[FuzzyMatcher] = None
+
+        # Normalised (api_name, dosage_form, route_of_admin, match) -> answer of find_single_rlds
+        self._rld_cache: Dict[Tuple[str, str, str, str], Optional[int]] = {}
+        if previous is not None:
+            self._rld_cache = self._carry_rld_cache(previous)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    @staticmethod
+    def _inverted_index(values: List[Optional[str]], previous: Optional[InvertedIndex]) -> InvertedIndex:
+        # Incremental updates only append to a column dictionary, so the previous index is a prefix
+        if previous is not None and previous.n_values <= len(values):
+            return previous.extend(values[previous.n_values:])
+        return InvertedIndex(values)
+
+    def _single_query_mask(self, key: Tuple[str, str, str, str], rows: np.ndarray) -> np.ndarray:
+        """Which of `rows` could be the answer of the single-ingredient query `key`."""
+        api_name, dosage_form, route_of_admin, match = key
+        ingredient_hits = self.ingredient_index.bitmap_to_mask(self.ingredient_index.contains(api_name))
+        # A family match selects a superset of the exact one
+        df_route_hits = self.df_route_hits(dosage_form, route_of_admin, "family" if match == "exact_or_family" else match)
+        return (
+            self.is_not_dscn[rows]
+            & ~self.is_combination[rows]
+            & (self.is_rld[rows] | self.is_rs[rows])
+            & ingredient_hits[self.ingredient_codes[rows]]
+            & df_route_hits[self.df_route_codes[rows]]
+        )
+
+    def _carry_rld_cache(self, previous: "OrangeBookIndex") -> Dict[Tuple[str, str, str, str], Optional[int]]:
+        """
+        Keeps the cached answers of `previous` that no inserted, updated or deleted product can
+        change, with row ids translated to this release.
+        """
+        row_map = self.store.row_map("products")
+        if row_map is None or not previous._rld_cache:
+            return {}
+        kept = row_map >= 0
+        old_rows = np.asarray(row_map[kept])
+        # "First" RLD is positional: if unchanged rows were reordered, no answer is safe to keep
+        if (np.diff(old_rows) <= 0).any():
+            return {}
+
+        new_row_for_old = np.full(len(previous), -1, dtype=np.int64)
+        new_row_for_old[old_rows] = np.flatnonzero(kept)
+        changed_new_rows = np.flatnonzero(~kept)
+        changed_old_rows = np.flatnonzero(new_row_for_old < 0)
+
+        carried = {}
+        for key, row_id in list(previous._rld_cache.items()):
+            if previous._single_query_mask(key, changed_old_rows).any() or self._single_query_mask(key, changed_new_rows).any():
+                continue
+            carried[key] = None if row_id is None else int(new_row_for_old[row_id])
+        return carried
+
+    def ingredient_mask(self, api_name: str) -> np.ndarray:
+        """Case-insensitive substring match on Ingredient."""
+        return self.ingredient_index.row_mask(self.ingredient_index.contains(api_name), self.ingredient_codes)
+
+    def all_ingredients_mask(self, api_names: List[str]) -> np.ndarray:
+        """Rows whose Ingredient contains every one of `api_names` (one bitmap intersection)."""
+        return self.ingredient_index.row_mask(self.ingredient_index.contains_all(api_names), self.ingredient_codes)
+
+    def trade_name_mask(self, trade_name: str) -> np.ndarray:
+        """Case-insensitive substring match on Trade_Name."""
+        return self.trade_name_index.row_mask(self.trade_name_index.contains(trade_name), self.trade_name_codes)
+
+    def dosage_form_mask(self, dosage_form: str) -> np.ndarray:
+        """Case-insensitive substring match on the dosage-form half of DF;Route."""
+        return self.dosage_form_index.row_mask(self.dosage_form_index.contains(dosage_form), self.df_route_codes)
+
+    def route_mask(self, route_of_admin: str) -> np.ndarray:
+        """Case-insensitive substring match on the route half of DF;Route."""
+        return self.route_index.row_mask(self.route_index.contains(route_of_admin), self.df_route_codes)
+
+    def rows(self, mask: np.ndarray) -> pd.DataFrame:
+        """Returns the matching products (a copy; the index itself is never modified)."""
+        return self.products[mask]
+
+    def row(self, row_id: int) -> pd.Series:
+        return self.products.iloc[row_id]
+
+    @staticmethod
+    def _first_rld_or_rs(mask: np.ndarray, is_rld: np.ndarray, is_rs: np.ndarray) -> Optional[int]:
+        """Position of the first RLD == 'Yes' row in `mask`, else the first RS == 'Yes' row, else None."""
+        for flag in (is_rld, is_rs):
+            hits = mask & flag
+            if hits.any():
+                return int(hits.argmax())
+        return None
+
+    def first_rld_or_rs(self, mask: np.ndarray) -> Optional[int]:
+        """Row id of the first RLD (fallback RS) product among the rows selected by `mask`."""
+        return self._first_rld_or_rs(mask, self.is_rld, self.is_rs)
+
+    def df_route_hits(self, dosage_form: str, route_of_admin: str, match: str = "substring") -> np.ndarray:
+        """
+        Boolean mask over the DF;Route dictionary for one (dosage form, route) pair.
+
+        `match` is one of DOSAGE_FORM_MATCH_MODES: "substring" is the historical case-insensitive
+        partial match on both halves; "exact" / "family" compare integer dosage-form / family codes
+        and accept compatible routes (see DosageFormVocabulary). A dosage form or route the
+        vocabulary does not know falls back to the substring match.
+        """
+        dosage_form_hits = self.vocabulary.dosage_form_mask(dosage_form, match)
+        if dosage_form_hits is None:
+            dosage_form_hits = self.dosage_form_index.bitmap_to_mask(self.dosage_form_index.contains(dosage_form))
+        return dosage_form_hits & self.route_hits(route_of_admin, match)
+
+    def route_hits(self, route_of_admin: str, match: str = "substring") -> np.ndarray:
+        """Boolean mask over the DF;Route dictionary for the route half (see df_route_hits)."""
+        route_hits = self.vocabulary.route_mask(route_of_admin) if match != "substring" else None
+        if route_hits is None:
+            route_hits = self.route_index.bitmap_to_mask(self.route_index.contains(route_of_admin))
+        return route_hits
+
+    def find_single_rlds(
+        self,
+        queries: Sequence[Tuple[str, str, str]],
+        match: str = "substring",
+    ) -> List[Optional[int]]:
+        """
+        Batch entry point for single-ingredient searches.
+
+        Each query is (api_name, dosage_form, route_of_admin). Returns, per query, the row id of the
+        first RLD == 'Yes' product (fallback RS == 'Yes') that is not DSCN, has no ';' in Ingredient,
+        partially matches the API and matches the dosage form and route as selected by `match`
+        (see df_route_hits; "exact_or_family" tries the exact dosage form, then its family); or None.
+
+        Work is shared across the batch: each distinct API pattern is matched once on the Ingredient
+        dictionary, each distinct (dosage form, route) pair once on the DF;Route dictionary, and every
+        query is evaluated only over the pre-filtered single-ingredient rows.
+        """
+        if match not in DOSAGE_FORM_MATCH_MODES:
+            raise ValueError(f"Unknown dosage form match mode: {match!r}")
+        modes = ("exact", "family") if match == "exact_or_family" else (match,)
+
+        ingredient_hits: Dict[str, np.ndarray] = {}
+        df_route_hits: Dict[Tuple[str, str, str], np.ndarray] = {}
+        answers: Dict[Tuple[str, str, str, str], Optional[int]] = {}
+
+        results = []
+        for api_name, dosage_form, route_of_admin in queries:
+            key = (api_name.lower(), dosage_form.lower(), route_of_admin.lower(), match)
+            if key not in answers and key in self._rld_cache:
+                answers[key] = self._rld_cache[key]
+            if key not in answers:
+                if key[0] not in ingredient_hits:
+                    ingredient_hits[key[0]] = self.ingredient_index.bitmap_to_mask(
+                        self.ingredient_index.contains(api_name)
+                    )
+
+                position = None
+                for mode in modes:
+                    df_route_key = (key[1], key[2], mode)
+                    if df_route_key not in df_route_hits:
+                        df_route_hits[df_route_key] = self.df_route_hits(dosage_form, route_of_admin, mode)
+                    mask = (
+                        ingredient_hits[key[0]][self._single_ingredient_codes]
+                        & df_route_hits[df_route_key][self._single_df_route_codes]
+                    )
+                    position = self._first_rld_or_rs(mask, self._single_is_rld, self._single_is_rs)
+                    if position is not None:
+                        break
+
+                answers[key] = None if position is None else int(self.single_ingredient_rows[position])
+                if len(self._rld_cache) >= self.RLD_CACHE_SIZE:
+                    self._rld_cache.clear()
+                self._rld_cache[key] = answers[key]
+            results.append(answers[key])
+        return results
+
+    @property
+    def ingredient_matcher(self) -> FuzzyMatcher:
+        """Salt- and synonym-aware fuzzy matcher over the single-ingredient Ingredient values."""
+        if self._ingredient_matcher is None:
+            values = [v if v is not None and ";" not in v else None for v in self.ingredient_index.values]
+            self._ingredient_matcher = FuzzyMatcher(values, key=canonical_ingredient)
+        return self._ingredient_matcher
+
+    @property
+    def dosage_form_matcher(self) -> FuzzyMatcher:
+        """Fuzzy matcher over the dosage-form half of the DF;Route values."""
+        if self._dosage_form_matcher is None:
+            self._dosage_form_matcher = FuzzyMatcher(self.dosage_form_index.values, key=dosage_form_key)
+        return self._dosage_form_matcher
+
+    def ingredient_candidates(self, api_name: str, limit: int = 5, min_score: float = 0.5) -> List[Tuple[str, float]]:
+        """Ranked Orange Book ingredient names (salt-stripped base names) for a free-text API name."""
+        return [(key, score) for key, _, score in self.ingredient_matcher.candidates(api_name, limit, min_score)]
+
+    def find_single_rlds_fuzzy(
+        self,
+        queries: Sequence[Tuple[str, str, str]],
+        min_score: float = 0.5,
+        limit: int = 5,
+        match: str = "substring",
+    ) -> List[Optional[int]]:
+        """
+        find_single_rlds, then for every miss a fuzzy second pass: the API name is matched against
+        the ingredient vocabulary (salts stripped, INN synonyms mapped, trigram TF-IDF ranked) and
+        the dosage form against the dosage-form vocabulary. Candidates are tried best first, the
+        user's own dosage form before fuzzy alternatives, and the first one with an RLD (fallback
+        RS) product on the requested route wins.
+        """
+        results = self.find_single_rlds(queries, match)
+        for i, (api_name, dosage_form, route_of_admin) in enumerate(queries):
+            if results[i] is None:
+                results[i] = self._fuzzy_single_rld(api_name, dosage_form, route_of_admin, min_score, limit, match)
+        return results
+
+    def _fuzzy_single_rld(
+        self, api_name: str, dosage_form: str, route_of_admin: str, min_score: float, limit: int, match: str
+    ) -> Optional[int]:
+        ingredient_candidates = self.ingredient_matcher.candidates(api_name, limit, min_score)
+        if not ingredient_candidates:
+            return None
+
+        modes = ("exact", "family") if match == "exact_or_family" else (match,)
+        df_route_masks = [self.df_route_hits(dosage_form, route_of_admin, mode) for mode in modes]
+        route_hits = self.route_hits(route_of_admin, match)
+        for _, value_ids, _ in self.dosage_form_matcher.candidates(dosage_form, limit, min_score):
+            dosage_form_hits = self.dosage_form_index.bitmap_to_mask(self.dosage_form_index.ids_to_bitmap(value_ids))
+            df_route_masks.append(dosage_form_hits & route_hits)
+
+        for df_route_hits in df_route_masks:
+            if not df_route_hits.any():
+                continue
+            df_route_mask = df_route_hits[self._single_df_route_codes]
+            for key, value_ids, score in ingredient_candidates:
+                ingredient_mask = self.ingredient_index.bitmap_to_mask(self.ingredient_index.ids_to_bitmap(value_ids))
+                mask = ingredient_mask[self._single_ingredient_codes] & df_route_mask
+                position = self._first_rld_or_rs(mask, self._single_is_rld, self._single_is_rs)
+                if position is not None:
+                    logging.info(f"Orange Book fuzzy match: {api_name!r} -> {key!r} ({score:.2f})")
+                    return int(self.single_ingredient_rows[position])
+        return None
+
+
+class _IndexSlot:
+    """
+    Holds the current OrangeBookIndex for one ZIP path and swaps in a rebuilt one when the file
+    changes. Readers always get a complete index: the reference is replaced atomically, and
+    in-flight queries keep using the instance they already hold.
+    """
+
+    def __init__(self, zip_path: str, store_dir: str, reload_interval: float):
+        self.zip_path = zip_path
+        self.store_dir = store_dir
+        self.reload_interval = reload_interval
+        self.index: Optional[OrangeBookIndex] = None
+        self.signature: Optional[Tuple[int, int]] = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.zip_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _build(self) -> Tuple[OrangeBookIndex, Optional[Tuple[int, int]]]:
+        signature = self._stat_signature()
+        store = OrangeBookStore.open(self.zip_path, self.store_dir)
+        # A store prepared by the update command is applied on top of the current index
+        return OrangeBookIndex(store, previous=self.index), signature
+
+    def get(self) -> OrangeBookIndex:
+        index = self.index
+        if index is not None:
+            return index
+        # Lazy initialisation: only the first caller builds, concurrent callers wait for it.
+        with self._load_lock:
+            if self.index is None:
+                self.index, self.signature = self._build()
+                self._start_watcher()
+            return self.index
+
+    def refresh(self, block: bool = False) -> None:
+        """
+        Rebuilds the index if the ZIP changed since it was loaded. With block=False the rebuild
+        runs in a background thread and the old index keeps serving queries until the swap.
+        """
+        signature = self._stat_signature()
+        if signature is None or signature == self.signature:
+            return
+        # Only one rebuild at a time; a concurrent refresh() simply returns.
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        if block:
+            self._reload()
+        else:
+            threading.Thread(target=self._reload, name="orange-book-reload", daemon=True).start()
+
+    def _reload(self) -> None:
+        try:
+            index, signature = self._build()
+            if self.index is not None and index.content_hash != self.index.content_hash:
+                logging.info(f"Orange Book index reloaded from {self.zip_path} ({index.content_hash[:12]})")
+            self.index, self.signature = index, signature
+        except Exception as e:
+            # Keep serving the previous index; a half-copied ZIP will be picked up on the next change.
+            logging.error(f"Failed to reload Orange Book index from {self.zip_path}: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def _start_watcher(self) -> None:
+        if self.reload_interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.reload_interval)
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name="orange-book-watcher", daemon=True)
+        self._watcher.start()
+
+
+_slots: Dict[Tuple[str, str], _IndexSlot] = {}
+_slots_lock = threading.Lock()
+
+
+def get_orange_book_index(
+    zip_path: str,
+    store_dir: str = DEFAULT_STORE_DIR,
+    reload_interval: float = 5.0,
+) -> OrangeBookIndex:
+    """
+    Returns the process-wide OrangeBookIndex for `zip_path`, loading it on first use.
+    The ZIP is watched every `reload_interval` seconds (0 disables the watcher) and a rebuilt
+    index is swapped in when it changes.
+    """
+    key = (os.path.abspath(zip_path), os.path.abspath(store_dir))
+    slot = _slots.get(key)
+    if slot is None:
+        with _slots_lock:
+            slot = _slots.setdefault(key, _IndexSlot(zip_path, store_dir, reload_interval))
+    return slot.get()
+
+
+def refresh_orange_book_index(zip_path: str, store_dir: str = DEFAULT_STORE_DIR, block: bool = True) -> None:
+    """Forces a change check for `zip_path` (e.g. right after replacing the ZIP)."""
+    slot = _slots.get((os.path.abspath(zip_path), os.path.abspath(store_dir)))
+    if slot is not None:
+        slot.refresh(block=block)
@@ -0,0 +1,125 @@
+import copy
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalise(text: str) -> str:
+    return text.lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits normalised text into alphanumeric tokens."""
+    return _TOKEN_PATTERN.findall(normalise(text))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of the normalised text (empty for strings shorter than 3 characters)."""
+    text = normalise(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class InvertedIndex:
+    """
+    Inverted index from normalised tokens and character trigrams to bitmaps.
+
+    The Orange Book columns are dictionary-encoded, so the index is built over the distinct values
+    of a column (a few thousand strings) rather than over its ~46k rows. Bitmaps are Python ints
+    (bit i <=> value i); a query ANDs the trigram bitmaps of the needle, verifies the few surviving
+    candidates with a real substring test, and expands the hit set to rows with one gather over the
+    column codes (see `row_mask`).
+    """
+
+    def __init__(self, values: Sequence[Optional[str]]):
+        self.values: List[Optional[str]] = []
+        self.n_values = 0
+        self.all_values = 0
+        self.trigram_bitmaps: Dict[str, int] = {}
+        self.token_bitmaps: Dict[str, int] = {}
+        self._add_values(values)
+        self.contains = lru_cache(maxsize=4096)(self._contains)
+
+    def _add_values(self, values: Sequence[Optional[str]]) -> None:
+        """Appends `values` to the dictionary and ORs their ids into the trigram / token bitmaps."""
+        start = self.n_values
+        self.values.extend(normalise(v) if isinstance(v, str) else None for v in values)
+        self.n_values = len(self.values)
+
+        trigram_ids: Dict[str, List[int]] = defaultdict(list)
+        token_ids: Dict[str, List[int]] = defaultdict(list)
+        present = []
+        for i, value in enumerate(self.values[start:], start):
+            if value is None:
+                continue
+            present.append(i)
+            for gram in trigrams(value):
+                trigram_ids[gram].append(i)
+            for token in set(tokenize(value)):
+                token_ids[token].append(i)
+
+        self.all_values |= self.ids_to_bitmap(present)
+        for gram, ids in trigram_ids.items():
+            self.trigram_bitmaps[gram] = self.trigram_bitmaps.get(gram, 0) | self.ids_to_bitmap(ids)
+        for token, ids in token_ids.items():
+            self.token_bitmaps[token] = self.token_bitmaps.get(token, 0) | self.ids_to_bitmap(ids)
+
+    def extend(self, values: Sequence[Optional[str]]) -> "InvertedIndex":
+        """
+        Returns a copy of this index with `values` appended to the dictionary. Only the new values
+        are tokenised; existing bitmaps are reused, and this instance is left untouched so readers
+        holding it are unaffected.
+        """
+        index = copy.copy(self)
+        index.values = list(self.values)
+        index.trigram_bitmaps = dict(self.trigram_bitmaps)
+        index.token_bitmaps = dict(self.token_bitmaps)
+        index._add_values(values)
+        index.contains = lru_cache(maxsize=4096)(index._contains)
+        return index
+
+    def ids_to_bitmap(self, ids: Sequence[int]) -> int:
+        mask = np.zeros(self.n_values, dtype=bool)
+        mask[list(ids)] = True
+        return self.mask_to_bitmap(mask)
+
+    @staticmethod
+    def mask_to_bitmap(mask: np.ndarray) -> int:
+        return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+    def bitmap_to_mask(self, bitmap: int) -> np.ndarray:
+        """Converts a value bitmap into a boolean array of length n_values."""
+        raw = np.frombuffer(bitmap.to_bytes((self.n_values + 7) // 8 or 1, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:self.n_values].astype(bool)
+
+    def _contains(self, needle: str) -> int:
+        """Bitmap of the values that contain `needle` as a (case-insensitive) substring."""
+        needle = normalise(needle)
+        candidates = self.all_values
+        for gram in trigrams(needle):
+            candidates &= self.trigram_bitmaps.get(gram, 0)
+            if not candidates:
+                return 0
+
+        # Trigrams are necessary but not sufficient; confirm the remaining candidates
+        hits = [int(i) for i in np.flatnonzero(self.bitmap_to_mask(candidates)) if needle in self.values[i]]
+        return self.ids_to_bitmap(hits)
+
+    def contains_all(self, needles: Sequence[str]) -> int:
+        """Bitmap of the values that contain every needle."""
+        bitmap = self.all_values
+        for needle in needles:
+            bitmap &= self.contains(needle)
+        return bitmap
+
+    def token(self, token: str) -> int:
+        """Bitmap of the values that have `token` as a whole word."""
+        return self.token_bitmaps.get(normalise(token), 0)
+
+    def row_mask(self, bitmap: int, codes: np.ndarray) -> np.ndarray:
+        """Expands a value bitmap to a row mask, given the per-row value codes."""
+        return self.bitmap_to_mask(bitmap)[codes]
@@ -0,0 +1,90 @@
+import csv
+import io
+import zipfile
+from array import array
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from src.orange_book.store import OrangeBookTable, StringColumn
+
+# Bytes read from the ZIP member per chunk
+READ_CHUNK_SIZE = 1 << 16
+
+
+class ColumnBuilder:
+    """
+    Accumulates one dictionary-encoded column while rows stream in.
+
+    Each value is looked up in the column dictionary and only its integer code is appended to a
+    typed `array` buffer, so a row never exists as a Python dict or list beyond the csv reader's.
+    Low-cardinality fields (Appl_Type, RLD, RS, Type, DF;Route, ...) end up as a handful of
+    dictionary entries plus one small integer per row.
+    """
+
+    def __init__(self):
+        self.codes = array("i")
+        self.lookup: Dict[str, int] = {}
+
+    def append(self, value: str) -> None:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.lookup)
+        self.codes.append(code)
+
+    def finish(self) -> StringColumn:
+        # dict preserves insertion order == code order
+        return encode_column(list(self.lookup), np.frombuffer(self.codes, dtype=np.int32))
+
+
+def encode_column(values: List[str], codes: np.ndarray) -> StringColumn:
+    """Builds a StringColumn from its dictionary and per-row codes, using the narrowest code type."""
+    for dtype in (np.uint8, np.uint16):
+        if len(values) <= np.iinfo(dtype).max + 1:
+            codes = codes.astype(dtype)
+            break
+    else:
+        codes = codes.astype(np.int32)
+
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return StringColumn(codes, offsets, blob)
+
+
+def find_member(zip_ref: zipfile.ZipFile, member_suffix: str) -> str:
+    for file_name in zip_ref.namelist():
+        if file_name.lower().endswith(member_suffix):
+            return file_name
+    raise FileNotFoundError(f"{member_suffix} not found in the local zip file.")
+
+
+def iter_tilde_rows(zip_ref: zipfile.ZipFile, member_suffix: str) -> Iterator[List[str]]:
+    """
+    Streams the rows of a tilde-delimited Orange Book member (header first), decompressing and
+    decoding READ_CHUNK_SIZE bytes at a time. Quoted trade names (e.g. HY-PAM "25", stored with
+    doubled quotes) are handled by the csv module exactly as before.
+    """
+    with zip_ref.open(find_member(zip_ref, member_suffix)) as raw:
+        buffered = io.BufferedReader(raw, buffer_size=READ_CHUNK_SIZE)
+        text = io.TextIOWrapper(buffered, encoding="ascii", errors="replace", newline="")
+        yield from csv.reader(text, delimiter="~")
+
+
+def parse_table(zip_ref: zipfile.ZipFile, member_suffix: str) -> OrangeBookTable:
+    """Streams one Orange Book member straight into dictionary-encoded column buffers."""
+    rows = iter_tilde_rows(zip_ref, member_suffix)
+    header = next(rows)
+    builders = [ColumnBuilder() for _ in header]
+    n_columns = len(header)
+
+    for row in rows:
+        if not row:
+            continue
+        if len(row) < n_columns:
+            row = row + [""] * (n_columns - len(row))
+        for builder, value in zip(builders, row):
+            builder.append(value)
+
+    return OrangeBookTable({name: builder.finish() for name, builder in zip(header, builders)})
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.orange_book.store import OrangeBookStore, OrangeBookTable
+from src.state import OrangeBookExclusivity, OrangeBookPatent, OrangeBookPatentRecord, RLD
+
+
+def product_key(appl_no: str, product_no: str) -> Tuple[str, str]:
+    """Normalised (Appl_No, Product_No) join key; FDA zero-pads them to 6 and 3 digits."""
+    return appl_no.strip().zfill(6), product_no.strip().zfill(3)
+
+
+class OrangeBookPatentIndex:
+    """
+    Join index from (Appl_No, Product_No) to the patent.txt and exclusivity.txt rows of the
+    Orange Book, so any product found by the search nodes can be enriched with its patent numbers,
+    expiry dates, use codes and exclusivity codes without a web search.
+    """
+
+    LOOKUP_CACHE_SIZE = 1024
+
+    def __init__(self, store: OrangeBookStore, previous: Optional["OrangeBookPatentIndex"] = None):
+        self.patent_table = store.table("patent")
+        self.exclusivity_table = store.table("exclusivity")
+        self.patent_rows = self._group_rows(self.patent_table)
+        self.exclusivity_rows = self._group_rows(self.exclusivity_table)
+        self._lookup_cache: Dict[Tuple[str, str], Tuple[List[OrangeBookPatent], List[OrangeBookExclusivity]]] = {}
+
+        # After an incremental update, keep the cached lookups of every product whose rows did not change
+        if previous is not None:
+            patent_changes = self._changed_keys(self.patent_rows, previous.patent_rows, store.row_map("patent"))
+            exclusivity_changes = self._changed_keys(self.exclusivity_rows, previous.exclusivity_rows, store.row_map("exclusivity"))
+            if patent_changes is not None and exclusivity_changes is not None:
+                changed = patent_changes | exclusivity_changes
+                self._lookup_cache = {
+                    key: value for key, value in previous._lookup_cache.items() if product_key(*key) not in changed
+                }
+
+    @staticmethod
+    def _group_rows(table: OrangeBookTable) -> Dict[Tuple[str, str], List[int]]:
+        appl_no, product_no = table["Appl_No"], table["Product_No"]
+        appl_values, product_values = appl_no.values, product_no.values
+
+        rows = defaultdict(list)
+        for row, (appl_code, product_code) in enumerate(zip(appl_no.codes.tolist(), product_no.codes.tolist())):
+            rows[product_key(appl_values[appl_code], product_values[product_code])].append(row)
+        return dict(rows)
+
+    @staticmethod
+    def _changed_keys(
+        rows: Dict[Tuple[str, str], List[int]],
+        previous_rows: Dict[Tuple[str, str], List[int]],
+        row_map: Optional[np.ndarray],
+    ) -> Optional[Set[Tuple[str, str]]]:
+        """Products whose rows were inserted, updated or deleted, or None if the store has no row map."""
+        if row_map is None:
+            return None
+        changed = {key for key, ids in rows.items() if row_map[ids[0]] < 0}
+        return changed | (previous_rows.keys() - rows.keys())
+
+    def patents(self, appl_no: str, product_no: str) -> List[OrangeBookPatent]:
+        # patent.txt lists a patent once per use code, so the same number can appear several times
+        patents = []
+        for row in self.patent_rows.get(product_key(appl_no, product_no), []):
+            values = self.patent_table.row(row)
+            patents.append(
+                OrangeBookPatent(
+                    patent_no=values["Patent_No"],
+                    patent_expire_date=values["Patent_Expire_Date_Text"],
+                    drug_substance_claim=values["Drug_Substance_Flag"].strip().upper() == "Y",
+                    drug_product_claim=values["Drug_Product_Flag"].strip().upper() == "Y",
+                    patent_use_code=values["Patent_Use_Code"],
+                    delist_requested=values["Delist_Flag"].strip().upper() == "Y",
+                )
+            )
+        return patents
+
+    def exclusivities(self, appl_no: str, product_no: str) -> List[OrangeBookExclusivity]:
+        return [
+            OrangeBookExclusivity(
+                exclusivity_code=self.exclusivity_table["Exclusivity_Code"][row],
+                exclusivity_date=self.exclusivity_table["Exclusivity_Date"][row],
+            )
+            for row in self.exclusivity_rows.get(product_key(appl_no, product_no), [])
+        ]
+
+    def lookup(self, appl_no: str, product_no: str) -> Tuple[List[OrangeBookPatent], List[OrangeBookExclusivity]]:
+        key = (appl_no, product_no)
+        if key not in self._lookup_cache:
+            if len(self._lookup_cache) >= self.LOOKUP_CACHE_SIZE:
+                self._lookup_cache.clear()
+            self._lookup_cache[key] = self.patents(appl_no, product_no), self.exclusivities(appl_no, product_no)
+        return self._lookup_cache[key]
+
+    def record_for_rld(self, rld: RLD) -> OrangeBookPatentRecord:
+        """Patents and exclusivities of the Orange Book product behind an RLD found by the search nodes."""
+        patents, exclusivities = self.lookup(rld.appl_no, rld.product_no)
+        return OrangeBookPatentRecord(
+            api_name=rld.api_name,
+            trade_name=rld.brand_name,
+            appl_no=rld.appl_no,
+            product_no=rld.product_no,
+            patents=patents,
+            exclusivities=exclusivities,
+        )
@@ -0,0 +1,294 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Orange Book tables persisted in the store, mapped to the member name inside the FDA ZIP.
+ORANGE_BOOK_TABLES = {
+    "products": "products.txt",
+    "patent": "patent.txt",
+    "exclusivity": "exclusivity.txt",
+}
+
+STORE_FORMAT_VERSION = 2
+DEFAULT_STORE_DIR = "./databases/orange_book_store"
+
+# (path, size, mtime_ns) -> sha256, so re-opening an unchanged ZIP does not re-hash it.
+_HASH_MEMO: Dict[Tuple[str, int, int], str] = {}
+
+
+def zip_content_hash(zip_path: str) -> str:
+    """
+    Returns the sha256 hex digest of the ZIP contents. The store directory is keyed by it,
+    so a new FDA release (different bytes) always gets a fresh store.
+    """
+    stat = os.stat(zip_path)
+    memo_key = (os.path.abspath(zip_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _HASH_MEMO:
+        return _HASH_MEMO[memo_key]
+
+    digest = hashlib.sha256()
+    with open(zip_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+    _HASH_MEMO[memo_key] = content_hash
+    return content_hash
+
+
+class StringColumn:
+    """
+    Dictionary-encoded string column.
+
+    - `codes` is the narrowest unsigned/int32 array that fits the dictionary (memory-mapped when
+      opened from disk), one entry per row.
+    - The string table is a single UTF-8 blob plus int64 offsets; values are decoded lazily.
+    """
+
+    def __init__(self, codes: np.ndarray, offsets: np.ndarray, blob: np.ndarray):
+        self.codes = codes
+        self.offsets = offsets
+        self.blob = blob
+        self._values: Optional[List[str]] = None
+
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> "StringColumn":
+        values, codes = np.unique(np.asarray(strings, dtype=object), return_inverse=True)
+        encoded = [str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(codes.astype(np.int32), offsets, blob)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def n_values(self) -> int:
+        return len(self.offsets) - 1
+
+    def value(self, code: int) -> str:
+        """Decodes a single entry of the string table."""
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    @property
+    def values(self) -> List[str]:
+        """The whole string table, decoded once on first access."""
+        if self._values is None:
+            raw = self.blob.tobytes()
+            self._values = [
+                raw[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+                for i in range(self.n_values)
+            ]
+        return self._values
+
+    def __getitem__(self, row: int) -> str:
+        return self.value(int(self.codes[row]))
+
+    def to_numpy(self) -> np.ndarray:
+        """Materialises the column as an object array of Python strings."""
+        return np.asarray(self.values, dtype=object)[self.codes]
+
+
+class OrangeBookTable:
+    """
+    A set of equally long StringColumns, in the column order of the source file.
+    """
+
+    def __init__(self, columns: Dict[str, StringColumn]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        first = next(iter(self.columns.values()), None)
+        return len(first) if first is not None else 0
+
+    def __getitem__(self, column: str) -> StringColumn:
+        return self.columns[column]
+
+    def row(self, row: int) -> Dict[str, str]:
+        return {name: col[row] for name, col in self.columns.items()}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns a pandas DataFrame with the same shape as the historical csv.DictReader output."""
+        return pd.DataFrame({name: col.to_numpy() for name, col in self.columns.items()})
+
+
+class OrangeBookStore:
+    """
+    Persistent, memory-mapped columnar copy of the Orange Book ZIP.
+
+    Layout (one directory per ZIP content hash):
+        <store_dir>/<sha256>/meta.json
+        <store_dir>/<sha256>/<table>.c<NN>.{codes,offsets,blob}.npy
+
+    The build runs once per ZIP release. Later opens only memory-map the .npy files,
+    so they take milliseconds and the pages are shared across worker processes.
+    """
+
+    def __init__(self, path: str, meta: Dict, tables: Dict[str, OrangeBookTable]):
+        self.path = path
+        self.meta = meta
+        self.tables = tables
+
+    @property
+    def content_hash(self) -> str:
+        return self.meta["content_hash"]
+
+    @property
+    def products(self) -> OrangeBookTable:
+        return self.tables["products"]
+
+    def table(self, name: str) -> OrangeBookTable:
+        return self.tables[name]
+
+    @property
+    def parent_hash(self) -> Optional[str]:
+        """Content hash of the release this store was incrementally updated from, if any."""
+        return self.meta.get("parent")
+
+    def row_map(self, table: str) -> Optional[np.ndarray]:
+        """
+        For stores written by an incremental update: per row of `table`, the row id it had in the
+        parent store, or -1 for inserted / updated rows. None for stores built from scratch.
+        """
+        path = os.path.join(self.path, f"{table}.row_map.npy")
+        if self.parent_hash is None or not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    # ----------------------------------------------------------------------------
+    # Build
+    # ----------------------------------------------------------------------------
+    @staticmethod
+    def _column_file(directory: str, table: str, index: int, part: str) -> str:
+        return os.path.join(directory, f"{table}.c{index:02d}.{part}.npy")
+
+    @classmethod
+    def parse_zip(cls, zip_path: str) -> Dict[str, OrangeBookTable]:
+        """
+        Streams every table in ORANGE_BOOK_TABLES from the ZIP into dictionary-encoded columns.
+        """
+        # Imported here: the parser builds StringColumn / OrangeBookTable objects from this module
+        from src.orange_book.parser import parse_table
+
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            return {table_name: parse_table(zip_ref, member) for table_name, member in ORANGE_BOOK_TABLES.items()}
+
+    @classmethod
+    def write(
+        cls,
+        tables: Dict[str, OrangeBookTable],
+        target_dir: str,
+        meta: Dict,
+        arrays: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        """
+        Writes the tables (plus any extra named `arrays`) into `target_dir` atomically: files go to
+        a temporary sibling directory which is renamed into place, so concurrent builders never
+        expose a half-written store.
+        """
+        parent = os.path.dirname(os.path.abspath(target_dir))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".building-", dir=parent)
+        try:
+            meta = dict(meta, tables={})
+            for table_name, table in tables.items():
+                meta["tables"][table_name] = {"columns": list(table.columns), "n_rows": len(table)}
+                for i, column in enumerate(table.columns.values()):
+                    np.save(cls._column_file(tmp_dir, table_name, i, "codes"), np.ascontiguousarray(column.codes))
+                    np.save(cls._column_file(tmp_dir, table_name, i, "offsets"), np.ascontiguousarray(column.offsets, dtype=np.int64))
+                    np.save(cls._column_file(tmp_dir, table_name, i, "blob"), np.ascontiguousarray(column.blob, dtype=np.uint8))
+            for name, array in (arrays or {}).items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            try:
+                os.rename(tmp_dir, target_dir)
+            except OSError:
+                # Another process finished the same build first; its copy is identical.
+                if not os.path.exists(os.path.join(target_dir, "meta.json")):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def build(cls, zip_path: str, store_dir: str = DEFAULT_STORE_DIR, force: bool = False) -> str:
+        """
+        One-time build step: parses the ZIP and persists it under <store_dir>/<content hash>.
+        Returns the store path. Does nothing if the store already exists (unless `force`).
+        """
+        content_hash = zip_content_hash(zip_path)
+        target_dir = os.path.join(store_dir, content_hash)
+        if os.path.exists(os.path.join(target_dir, "meta.json")):
+            if not force:
+                return target_dir
+            shutil.rmtree(target_dir)
+
+        logging.info(f"Building Orange Book store for {zip_path} -> {target_dir}")
+        tables = cls.parse_zip(zip_path)
+        meta = {
+            "format_version": STORE_FORMAT_VERSION,
+            "content_hash": content_hash,
+            "source_zip": os.path.abspath(zip_path),
+        }
+        cls.write(tables, target_dir, meta)
+        return target_dir
+
+    # ----------------------------------------------------------------------------
+    # Open
+    # ----------------------------------------------------------------------------
+    @classmethod
+    def load(cls, path: str) -> "OrangeBookStore":
+        """Memory-maps an existing store directory."""
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported Orange Book store format in {path}")
+
+        tables = {}
+        for table_name, table_meta in meta["tables"].items():
+            columns = {}
+            for i, column_name in enumerate(table_meta["columns"]):
+                columns[column_name] = StringColumn(
+                    codes=np.load(cls._column_file(path, table_name, i, "codes"), mmap_mode="r"),
+                    offsets=np.load(cls._column_file(path, table_name, i, "offsets"), mmap_mode="r"),
+                    blob=np.load(cls._column_file(path, table_name, i, "blob"), mmap_mode="r"),
+                )
+            tables[table_name] = OrangeBookTable(columns)
+        return cls(path, meta, tables)
+
+    @classmethod
+    def open(cls, zip_path: str, store_dir: str = DEFAULT_STORE_DIR) -> "OrangeBookStore":
+        """
+        Opens the store for `zip_path`, building it first if this ZIP has never been seen.
+        """
+        path = os.path.join(store_dir, zip_content_hash(zip_path))
+        try:
+            return cls.load(path)
+        except (FileNotFoundError, ValueError):
+            path = cls.build(zip_path, store_dir, force=os.path.exists(path))
+            return cls.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped Orange Book store.")
+    parser.add_argument("zip_path", nargs="?", default="./databases/orange_book_database.zip")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the store exists.")
+    args = parser.parse_args()
+
+    path = OrangeBookStore.build(args.zip_path, args.store_dir, force=args.force)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.orange_book.index import refresh_orange_book_index
+from src.orange_book.parser import encode_column
+from src.orange_book.patents import OrangeBookPatentIndex
+from src.orange_book.store import (
+    DEFAULT_STORE_DIR,
+    STORE_FORMAT_VERSION,
+    OrangeBookStore,
+    OrangeBookTable,
+    zip_content_hash,
+)
+
+# Per store directory: the installed releases, oldest first (the last one is current)
+RELEASES_FILE = "releases.json"
+# Copy of the release ZIP kept inside each store version, used by rollback
+RELEASE_ZIP = "release.zip"
+DEFAULT_KEEP_RELEASES = 2
+
+
+@dataclass
+class TableDiff:
+    """
+    Row-level diff of one Orange Book table between two releases, keyed by (Appl_No, Product_No).
+
+    A product counts as updated when any of its rows changed (patent.txt / exclusivity.txt hold
+    several rows per product). `row_map[i]` is the old row id of new row i, or -1 if the row
+    belongs to an inserted or updated product.
+    """
+
+    inserted: List[Tuple[str, str]] = field(default_factory=list)
+    updated: List[Tuple[str, str]] = field(default_factory=list)
+    deleted: List[Tuple[str, str]] = field(default_factory=list)
+    row_map: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+
+    def summary(self) -> Dict[str, int]:
+        return {"inserted": len(self.inserted), "updated": len(self.updated), "deleted": len(self.deleted)}
+
+
+def _row_tuples(table: OrangeBookTable) -> List[Tuple[str, ...]]:
+    columns = []
+    for column in table.columns.values():
+        values = column.values
+        columns.append([values[code] for code in column.codes.tolist()])
+    return list(zip(*columns))
+
+
+def diff_table(old: OrangeBookTable, new: OrangeBookTable) -> TableDiff:
+    """Diffs two releases of the same table. Raises ValueError if the FDA changed the columns."""
+    if list(old.columns) != list(new.columns):
+        raise ValueError(f"Orange Book columns changed: {list(old.columns)} -> {list(new.columns)}")
+
+    old_rows, new_rows = _row_tuples(old), _row_tuples(new)
+    old_groups = OrangeBookPatentIndex._group_rows(old)
+    new_groups = OrangeBookPatentIndex._group_rows(new)
+
+    diff = TableDiff(row_map=np.full(len(new), -1, dtype=np.int32))
+    for key, new_ids in new_groups.items():
+        old_ids = old_groups.get(key)
+        if old_ids is None:
+            diff.inserted.append(key)
+        elif [old_rows[i] for i in old_ids] == [new_rows[i] for i in new_ids]:
+            diff.row_map[new_ids] = old_ids
+        else:
+            diff.updated.append(key)
+    diff.deleted = [key for key in old_groups if key not in new_groups]
+    return diff
+
+
+def apply_diff(old: OrangeBookTable, new: OrangeBookTable, diff: TableDiff) -> OrangeBookTable:
+    """
+    Builds the new release of a table from the old one: unchanged rows reuse their old codes and
+    only the rows of inserted / updated products are encoded. Column dictionaries are append-only
+    (values of deleted rows are kept), so dictionary-level indexes of the old release stay valid
+    as a prefix of the new ones.
+    """
+    kept = diff.row_map >= 0
+    changed = np.flatnonzero(~kept)
+
+    columns = {}
+    for name, old_column in old.columns.items():
+        values = list(old_column.values)
+        lookup = {value: code for code, value in enumerate(values)}
+
+        codes = np.empty(len(new), dtype=np.int64)
+        codes[kept] = np.asarray(old_column.codes)[diff.row_map[kept]]
+
+        new_column = new[name]
+        new_values, new_codes = new_column.values, new_column.codes
+        for row in changed.tolist():
+            value = new_values[new_codes[row]]
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(values)
+                values.append(value)
+            codes[row] = code
+        columns[name] = encode_column(values, codes)
+    return OrangeBookTable(columns)
+
+
+def _read_releases(store_dir: str) -> List[str]:
+    try:
+        with open(os.path.join(store_dir, RELEASES_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)["history"]
+    except FileNotFoundError:
+        return []
+
+
+def _write_releases(store_dir: str, history: List[str]) -> None:
+    path = os.path.join(store_dir, RELEASES_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"history": history}, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _install_zip(source: str, zip_path: str) -> None:
+    """Atomically replaces `zip_path` with a copy of `source`, so watchers never see a partial file."""
+    if os.path.exists(zip_path) and os.path.samefile(source, zip_path):
+        return
+    directory = os.path.dirname(os.path.abspath(zip_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".orange-book-", suffix=".zip", dir=directory)
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, zip_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _keep_release_zip(zip_path: str, store_path: str) -> None:
+    release = os.path.join(store_path, RELEASE_ZIP)
+    if not os.path.exists(release):
+        shutil.copyfile(zip_path, release)
+
+
+def _current_store(zip_path: str, store_dir: str) -> OrangeBookStore:
+    """The store of the installed release: the last one recorded by `update`, else the ZIP on disk."""
+    history = _read_releases(store_dir)
+    if history:
+        try:
+            return OrangeBookStore.load(os.path.join(store_dir, history[-1]))
+        except (FileNotFoundError, ValueError):
+            pass
+    store = OrangeBookStore.open(zip_path, store_dir)
+    _keep_release_zip(zip_path, store.path)
+    _write_releases(store_dir, [store.content_hash])
+    return store
+
+
+def build_update(current: OrangeBookStore, new_zip_path: str, store_dir: str) -> str:
+    """
+    Writes the store for `new_zip_path` as an incremental update of `current` and returns its path.
+    Falls back to a full build when the table layout changed between releases.
+    """
+    content_hash = zip_content_hash(new_zip_path)
+    target_dir = os.path.join(store_dir, content_hash)
+    if os.path.exists(os.path.join(target_dir, "meta.json")):
+        return target_dir
+
+    new_tables = OrangeBookStore.parse_zip(new_zip_path)
+    try:
+        diffs = {name: diff_table(current.table(name), table) for name, table in new_tables.items()}
+    except (KeyError, ValueError) as e:
+        logging.warning(f"Orange Book layout changed ({e}); building the new release from scratch")
+        return OrangeBookStore.build(new_zip_path, store_dir)
+
+    tables = {name: apply_diff(current.table(name), new_tables[name], diff) for name, diff in diffs.items()}
+    meta = {
+        "format_version": STORE_FORMAT_VERSION,
+        "content_hash": content_hash,
+        "source_zip": os.path.abspath(new_zip_path),
+        "parent": current.content_hash,
+        "diff": {name: diff.summary() for name, diff in diffs.items()},
+    }
+    arrays = {f"{name}.row_map": diff.row_map for name, diff in diffs.items()}
+    OrangeBookStore.write(tables, target_dir, meta, arrays)
+    return target_dir
+
+
+def update_orange_book(
+    new_zip_path: str,
+    zip_path: str,
+    store_dir: str = DEFAULT_STORE_DIR,
+    keep: int = DEFAULT_KEEP_RELEASES,
+) -> OrangeBookStore:
+    """
+    Installs a new FDA Orange Book release.
+
+    The new store is derived from the current one by a row-level diff, then the ZIP at `zip_path`
+    is replaced. Running processes pick the change up through their index watcher, open the
+    prepared store without reparsing and apply the diff to their in-memory index. The last `keep`
+    releases are kept for `rollback_orange_book`.
+    """
+    current = _current_store(zip_path, store_dir)
+    if zip_content_hash(new_zip_path) == current.content_hash:
+        logging.info("Orange Book release is already installed")
+        return current
+
+    store = OrangeBookStore.load(build_update(current, new_zip_path, store_dir))
+    _keep_release_zip(new_zip_path, store.path)
+    _install_zip(new_zip_path, zip_path)
+
+    keep = max(keep, 1)
+    history = [h for h in _read_releases(store_dir) if h != store.content_hash] + [store.content_hash]
+    for content_hash in history[:-keep]:
+        shutil.rmtree(os.path.join(store_dir, content_hash), ignore_errors=True)
+    _write_releases(store_dir, history[-keep:])
+
+    refresh_orange_book_index(zip_path, store_dir, block=True)
+    logging.info(f"Orange Book updated to {store.content_hash[:12]}: {store.meta.get('diff', 'full build')}")
+    return store
+
+
+def rollback_orange_book(zip_path: str, store_dir: str = DEFAULT_STORE_DIR) -> OrangeBookStore:
+    """Reinstalls the release that was current before the last update."""
+    history = _read_releases(store_dir)
+    if len(history) < 2:
+        raise ValueError("No previous Orange Book release to roll back to.")
+
+    store = OrangeBookStore.load(os.path.join(store_dir, history[-2]))
+    _install_zip(os.path.join(store.path, RELEASE_ZIP), zip_path)
+    _write_releases(store_dir, history[:-1])
+
+    refresh_orange_book_index(zip_path, store_dir, block=True)
+    logging.info(f"Orange Book rolled back to {store.content_hash[:12]}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Install or roll back an FDA Orange Book release.")
+    parser.add_argument("--zip-path", default="./databases/orange_book_database.zip", help="ZIP the pipeline reads.")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    update_parser = subparsers.add_parser("update", help="Apply a new monthly release ZIP.")
+    update_parser.add_argument("new_zip_path")
+    update_parser.add_argument("--keep", type=int, default=DEFAULT_KEEP_RELEASES, help="Releases kept for rollback.")
+    subparsers.add_parser("rollback", help="Reinstall the previous release.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "update":
+        store = update_orange_book(args.new_zip_path, args.zip_path, args.store_dir, keep=args.keep)
+    else:
+        store = rollback_orange_book(args.zip_path, args.store_dir)
+    print(store.path)
+
+
+if __name__ == "__main__":
+    main()
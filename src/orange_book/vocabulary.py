@@ -0,0 +1,105 @@
+import re
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+import numpy as np
+
+# How find_single_rlds matches API.desired_dosage_form against the Orange Book dosage forms
+DOSAGE_FORM_MATCH_MODES = ("substring", "exact", "family", "exact_or_family")
+
+# Routes a product may be listed under for a requested route (besides the route itself)
+ROUTE_COMPATIBILITY = {
+    "injection": {"intravenous", "intramuscular", "subcutaneous", "intradermal", "im-iv"},
+    "parenteral": {"injection", "intravenous", "intramuscular", "subcutaneous", "intradermal", "im-iv"},
+    "intravenous": {"injection", "im-iv"},
+    "intramuscular": {"injection", "im-iv"},
+    "subcutaneous": {"injection"},
+    "intradermal": {"injection"},
+    "im-iv": {"injection", "intravenous", "intramuscular"},
+    "buccal": {"transmucosal"},
+    "sublingual": {"transmucosal"},
+    "transmucosal": {"buccal", "sublingual"},
+}
+
+# Oral contraceptive packs are listed as ORAL-20 / ORAL-21 / ORAL-28
+_ROUTE_SUFFIX = re.compile(r"-\d+$")
+
+
+def normalise_dosage_form(dosage_form: str) -> str:
+    return " ".join(dosage_form.lower().split())
+
+
+def dosage_form_family(dosage_form: str) -> str:
+    """Head of a dosage form: "capsule, extended release" -> "capsule", "granules" -> "granule"."""
+    head = normalise_dosage_form(dosage_form).split(",")[0].strip()
+    return head[:-1] if head.endswith(("pellets", "granules")) else head
+
+
+def route_parts(route: str) -> FrozenSet[str]:
+    """Individual routes of an Orange Book route value: "INTRAMUSCULAR, INTRAVENOUS" -> both."""
+    parts = (_ROUTE_SUFFIX.sub("", part.strip().lower()) for part in route.split(","))
+    return frozenset(part for part in parts if part)
+
+
+class DosageFormVocabulary:
+    """
+    Integer-coded dosage forms, dosage-form families and routes of the Orange Book DF;Route values.
+
+    Every DF;Route dictionary entry is mapped at load time to a dosage-form code, a family code
+    (all CAPSULE variants share one) and a route code. A dosage-form / route filter is an integer
+    comparison (or a lookup-table gather for route compatibility sets) over those ~300 entries,
+    expanded to rows with one gather through the per-row DF;Route codes, instead of a per-row
+    substring search. Exact matching keeps "CAPSULE" from selecting "CAPSULE, EXTENDED RELEASE".
+    """
+
+    def __init__(self, df_route_values: Sequence[str]):
+        split = [value.split(";", 1) for value in df_route_values]
+        dosage_forms = [normalise_dosage_form(parts[0]) for parts in split]
+        routes = [parts[1].strip().lower() if len(parts) > 1 else "" for parts in split]
+
+        self.dosage_forms: List[str] = sorted(set(dosage_forms))
+        self.dosage_form_codes: Dict[str, int] = {v: i for i, v in enumerate(self.dosage_forms)}
+        self.families: List[str] = sorted({dosage_form_family(v) for v in self.dosage_forms})
+        self.family_codes: Dict[str, int] = {v: i for i, v in enumerate(self.families)}
+        self.routes: List[str] = sorted(set(routes))
+        self.route_codes: Dict[str, int] = {v: i for i, v in enumerate(self.routes)}
+        self.route_parts = [route_parts(route) for route in self.routes]
+
+        # Per DF;Route dictionary entry
+        self.dosage_form_of = np.array([self.dosage_form_codes[v] for v in dosage_forms], dtype=np.int16)
+        self.route_of = np.array([self.route_codes[v] for v in routes], dtype=np.int16)
+        # Per dosage-form code
+        self.family_of = np.array([self.family_codes[dosage_form_family(v)] for v in self.dosage_forms], dtype=np.int16)
+
+    def dosage_form_code(self, dosage_form: str) -> Optional[int]:
+        return self.dosage_form_codes.get(normalise_dosage_form(dosage_form))
+
+    def family_code(self, dosage_form: str) -> Optional[int]:
+        return self.family_codes.get(dosage_form_family(dosage_form))
+
+    def dosage_form_mask(self, dosage_form: str, match: str) -> Optional[np.ndarray]:
+        """
+        Mask over the DF;Route dictionary for `dosage_form` under an "exact" or "family" match.
+        None for "substring" or for a dosage form the vocabulary does not know.
+        """
+        if match == "exact":
+            code = self.dosage_form_code(dosage_form)
+            return None if code is None else self.dosage_form_of == code
+        if match == "family":
+            code = self.family_code(dosage_form)
+            return None if code is None else self.family_of[self.dosage_form_of] == code
+        return None
+
+    def route_mask(self, route: str) -> Optional[np.ndarray]:
+        """
+        Mask over the DF;Route dictionary: True where the listed route shares a route with the
+        requested one or with its ROUTE_COMPATIBILITY set. None if the Orange Book lists neither the
+        requested route nor a compatible one, so callers can fall back to substring matching.
+        """
+        requested = route_parts(route)
+        accepted = set(requested)
+        for part in requested:
+            accepted |= ROUTE_COMPATIBILITY.get(part, set())
+        compatible = np.array([bool(parts & accepted) for parts in self.route_parts], dtype=bool)
+        if not compatible.any():
+            return None
+        return compatible[self.route_of]
@@ -9,13 +9,16 @@ class IniateAllInterviews:
     def initiate_all_interviews(self, state: PatentResearchGraphState):
         """ This is the "map" step where we run each interview sub-graph using Send API """    
         api_name = state["api"].API_name
+        # Seed every interview with the local Orange Book facts so no search round is spent on them
+        orange_book_context = [record.context for record in state.get("orange_book_patents") or []]
         return [Send(
             "conduct_interview", 
             {
                 "analyst": analyst,
                 "messages": [HumanMessage(
                                           content=f"So you said you were writing a Patent research report on {api_name}??"
-                                        )]
+                                        )],
+                "context": orange_book_context,
                 }
             ) for analyst in state["analysts"]
                 ]
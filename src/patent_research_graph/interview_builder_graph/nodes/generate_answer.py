@@ -1,6 +1,6 @@
 from src.patent_research_graph.interview_builder_graph.prompts import answer_instructions
 from src.patent_research_graph.interview_builder_graph.state import InterviewState
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import SystemMessage
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
@@ -19,7 +19,7 @@ class GenerateAnswer:
 
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="answer_question") 
         
         # Answer question
         system_message = answer_instructions.format(goals=analyst.persona, context=context)
@@ -3,7 +3,7 @@ from src.patent_research_graph.interview_builder_graph.state import InterviewSta
 
 from ..prompts import question_instructions
 from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
 
@@ -19,7 +19,7 @@ class GenerateQuestion:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="ask_question") 
 
         # Generate question 
         system_message = question_instructions.format(goals=analyst.persona)
@@ -3,10 +3,12 @@ from ..prompts import search_instructions
 from langchain_community.tools.tavily_search import TavilySearchResults
 
 from tavily import AsyncTavilyClient
+from tavily.errors import UsageLimitExceededError
 from src.patent_research_graph.interview_builder_graph.state import InterviewState, SearchQuery
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
-from langchain_openai import ChatOpenAI
+from src.rate_limit import TAVILY_HOST, get_rate_limiter
+from src.llm import get_chat_model
 
 def deduplicate_and_format_sources(results, max_tokens_per_source=300, include_raw_content=True):
     """
@@ -54,19 +56,20 @@ class SearchWeb:
         configurable = Configuration.from_runnable_config(config)
         max_results_query = configurable.max_results_query
         max_tokens_per_source = configurable.max_tokens_per_source
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0)
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="search_web")
         
         # Search query
         structured_llm = llm.with_structured_output(SearchQuery)        
         search_query = structured_llm.invoke([search_instructions]+state['messages'])
         
-        # Search
-        response = await self.tavily_client.search(
-            query = search_query.search_query, 
-            max_results = max_results_query,
-            include_raw_content = True,
-            include_domains = ["https://patents.google.com/", "https://ppubs.uspto.gov/pubwebapp/static/pages/ppubsbasic.html", "https://patentscope.wipo.int/search/es/search.jsf", "https://pubmed.ncbi.nlm.nih.gov/", "https://arxiv.org/", "https://core.ac.uk/", "https://www.sciencedirect.com/", "https://www.researchgate.net/", "https://www.semanticscholar.org/", "https://pubchem.ncbi.nlm.nih.gov/"]
-            )
+        # Search, through the shared rate limiter
+        async with get_rate_limiter(configurable).limit(TAVILY_HOST, throttle_errors=(UsageLimitExceededError,)):
+            response = await self.tavily_client.search(
+                query = search_query.search_query, 
+                max_results = max_results_query,
+                include_raw_content = True,
+                include_domains = ["https://patents.google.com/", "https://ppubs.uspto.gov/pubwebapp/static/pages/ppubsbasic.html", "https://patentscope.wipo.int/search/es/search.jsf", "https://pubmed.ncbi.nlm.nih.gov/", "https://arxiv.org/", "https://core.ac.uk/", "https://www.sciencedirect.com/", "https://www.researchgate.net/", "https://www.semanticscholar.org/", "https://pubchem.ncbi.nlm.nih.gov/"]
+                )
         
         # Ensure response contains 'results'
         web_research_results = response.get("results", [])
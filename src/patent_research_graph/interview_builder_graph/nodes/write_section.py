@@ -4,7 +4,7 @@ from langchain_core.messages import HumanMessage, SystemMessage
 
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 
 class WriteSection:
     def __init__(self) -> None:
@@ -18,7 +18,7 @@ class WriteSection:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="write_section") 
     
         # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
         system_message = section_writer_instructions.format(focus=analyst.description)
@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from src.patent_research_graph.state import PatentResearchGraphState, Perspectives
 from langchain_core.runnables import RunnableConfig
@@ -16,7 +16,7 @@ class CreateAnalysts:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4o, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4o, node="create_analysts") 
         
         structured_llm = llm.with_structured_output(Perspectives)        
 
@@ -25,6 +25,7 @@ class CreateAnalysts:
             api_name = api_obj.API_name,
             api_desired_dosage_form = api_obj.desired_dosage_form,
             api_route_of_administration = api_obj.route_of_administration,
+            orange_book_patents = "\n\n".join(record.context for record in state.get("orange_book_patents") or []) or "Not available.",
         )
 
         # Generate question 
@@ -2,7 +2,7 @@ from src.patent_research_graph.state import PatentResearchGraphState
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
 
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from src.patent_research_graph.prompts import intro_conclusion_instructions
 from langchain_core.messages import HumanMessage
 
@@ -17,7 +17,7 @@ class WriteIntroduction:
         
         # Get configuration and initialize the LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0) 
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="write_introduction") 
         
         # Concat all sections together
         formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
@@ -5,6 +5,7 @@ You are tasked with creating a set of specialized AI analyst personas, each tail
 - API Name: <api_name>{api_name}</api_name>
 - Desired Dosage Form: <api_desired_dosage_form>{api_desired_dosage_form}</api_desired_dosage_form>
 - Route of Administration: <api_route_of_administration>{api_route_of_administration}</api_route_of_administration>
+- Orange Book patents and exclusivities (authoritative FDA data; build on these instead of rediscovering them): <orange_book_patents>{orange_book_patents}</orange_book_patents>
 
 2. Assign one AI analyst persona to each area listed below. Use the following structure to describe their role, goals, expertise, and deliverables:
 a. API Synthesis & Polymorphisms Analyst
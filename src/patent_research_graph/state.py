@@ -3,7 +3,7 @@ from typing_extensions import TypedDict
 from pydantic import BaseModel, Field
 import operator
 from langgraph.graph import MessagesState
-from src.state import API, PatentResearchReport
+from src.state import API, PatentResearchReport, OrangeBookPatentRecord
 
 class Analyst(BaseModel):
     """The Analyst profile to create for a comprehensive list of analysts descriptions, roles, and affiliations"""
@@ -31,6 +31,7 @@ class Perspectives(BaseModel):
 
 class PatentResearchGraphState(TypedDict):     
     api: API
+    orange_book_patents: List[OrangeBookPatentRecord] # Local Orange Book patent/exclusivity facts for the API's RLDs
     analysts: List[Analyst] # Analyst asking questions
     patent_research_report_sections: Annotated[List[str], operator.add]
     patent_research_report_content: str   
@@ -6,7 +6,8 @@ class RouteProductEnrichment:
     """
     Conditional edge that reads `feedback_decision` from the state.
     
-    - If 'feedback_decision' == 'retry_daily_med', we route to 'daily_med_research'.
+    - If 'feedback_decision' == 'retry_daily_med', we route the changed RLDs ('RLDs_to_research')
+      to 'daily_med_research' (or straight back to the formulator if none changed).
     - If 'feedback_decision' starts with 'go_enrich' => we route to 'product_enrichment'.
       (Because it might be 'go_enrich_accept' or 'go_enrich_blank' or something else.)
     - Otherwise, we default to 'product_enrichment'.
@@ -19,13 +20,20 @@ class RouteProductEnrichment:
         decision = state.get("feedback_decision", None)
 
         if decision == "retry_daily_med":
+            # Only the RLDs the formulator changed are searched again; the others keep their
+            # potential_RLDs. Nothing changed: back to the formulator with the same candidates.
+            rlds_to_research = state.get("RLDs_to_research")
+            if rlds_to_research is None:
+                rlds_to_research = state["RLDs"]
+            if not rlds_to_research:
+                return "formulator_feedback_product_research"
             return [
                 Send("daily_med_research", 
                     {
                         "RLD": RLD,
                     }
                 ) 
-                for RLD in state["RLDs"]
+                for RLD in rlds_to_research
             ]
         elif decision in ("go_enrich_accept", "go_enrich_blank"):
             return [
@@ -90,7 +90,7 @@ product_research_graph_builder.add_edge("formulator_feedback_product_research",
 product_research_graph_builder.add_conditional_edges(
     "parallelization_op_node",
     route_product_enrichment.run,
-    ["product_enrichment", "daily_med_research"]
+    ["product_enrichment", "daily_med_research", "formulator_feedback_product_research"]
 )
 
 # Final
@@ -1,12 +1,15 @@
+import asyncio
 import logging
-import requests
+from itertools import islice
 from urllib.parse import urljoin, urlparse, parse_qs, quote
-from bs4 import BeautifulSoup
 from typing import List
 from pydantic import BaseModel, Field
 
 from langchain_core.runnables import RunnableConfig
 
+from src.configuration import Configuration
+from src.dailymed import get_dailymed_client, get_spl_index
+from src.dailymed.search_parser import iter_search_results
 # Example import from your own code
 from src.product_research_graph.state import DailyMedResearchGraphState
 from src.state import PotentialRLD  # typed data model
@@ -21,14 +24,15 @@ class DailyMedResearch(BaseModel):
     def __init__(self):
         pass
 
-    def build_advanced_search_url(self, search_name: str, dosage_form: str) -> str:
+    def build_advanced_search_url(self, search_name: str, dosage_form: str, pagesize: int = 10) -> str:
         """
         Builds the advanced search URL for DailyMed by injecting
         {search_name} and {dosage_form} into the query. We also use
         urllib.parse.quote to properly URL-encode parentheses, spaces, etc.
+        Only `pagesize` results (the number we keep) are requested.
 
         Base pattern:
-          https://dailymed.nlm.nih.gov/dailymed/search.cfm?adv=1&labeltype=all&pagesize=200&page=1&query=
+          https://dailymed.nlm.nih.gov/dailymed/search.cfm?adv=1&labeltype=all&pagesize={pagesize}&page=1&query=
           NAME%3A%28{search_name}%29+AND+43678-2%3A%28{dosage_form}%29*
         """
         search_name_encoded = quote(search_name)
@@ -36,56 +40,40 @@ class DailyMedResearch(BaseModel):
 
         base_url = (
             "https://dailymed.nlm.nih.gov/dailymed/"
-            "search.cfm?adv=1&labeltype=all&pagesize=200&page=1&query="
+            f"search.cfm?adv=1&labeltype=all&pagesize={pagesize}&page=1&query="
         )
 
         # Example: "NAME%3A%28aspirin%29+AND+43678-2%3A%28tablet%29+"
         query_str = f"NAME%3A%28{search_name_encoded}%29+AND+43678-2%3A%28{dosage_form_encoded}%29*"
         return base_url + query_str
 
-    def parse_search_results(self, html: str, api_name: str, brand_name, manufacturer) -> List[PotentialRLD]:
+    def parse_search_results(self, html: str, api_name: str, brand_name, manufacturer, max_results: int = 10) -> List[PotentialRLD]:
         """
         Given the HTML of the advanced search results page,
         returns a list of PotentialRLD objects, each containing:
           title, image_url, setid
+        The page is parsed incrementally and parsing stops after the first `max_results`
+        results with a drug-info link.
         """
-        soup = BeautifulSoup(html, "html.parser")
-        # Collect all <article> tags representing search results
-        # Then slice to keep only the first 10
-        articles = soup.find_all("article", {"class": ["row", "odd", "even"]})[:10]
-
         potential_rlds: List[PotentialRLD] = []
 
-        for art in articles:
-            # 1) Extract the link with class="drug-info-link"
-            link = art.select_one("a.drug-info-link")
-            if not link:
-                continue
-
-            full_title = link.get_text(strip=True)
-
+        for result in islice(iter_search_results(html), max_results):
             # href might look like: "/dailymed/drugInfo.cfm?setid=0cb2ee04-8581-46c8-a781-7be170ab5c86"
-            href = link.get("href", "")
             setid_value = ""
-            if "setid=" in href:
-                parsed = urlparse(href)
+            if "setid=" in result.href:
+                parsed = urlparse(result.href)
                 qs = parse_qs(parsed.query)
                 setid_value = qs.get("setid", [""])[0]
 
-            # 2) Find the first product image in this <article>
-            img_tag = art.select_one("img.package-photo")
-            if img_tag:
-                src = img_tag.get("src", "")
-                image_url = urljoin("https://dailymed.nlm.nih.gov", src)
-            else:
-                image_url = ""
+            # First product image of the result
+            image_url = urljoin("https://dailymed.nlm.nih.gov", result.image_src) if result.image_src else ""
 
             # Create the typed PotentialRLD object
             potential_rld = PotentialRLD(
                 api_name = api_name,
                 brand_name = brand_name,
                 manufacturer = manufacturer,
-                title=full_title,
+                title=result.title,
                 image_url=image_url,
                 setid=setid_value
             )
@@ -93,14 +81,31 @@ class DailyMedResearch(BaseModel):
 
         return potential_rlds
 
-    def run(self, state: DailyMedResearchGraphState, config: RunnableConfig):
+    async def search_spl_index(self, configurable: Configuration, api_name: str, brand_name: str, dosage_form: str, manufacturer: str) -> List[PotentialRLD]:
+        """
+        Potential RLDs from the local DailyMed SPL snapshot (empty if there is no snapshot or no
+        label in it matches, in which case the live search is used).
+        """
+        spl_index = get_spl_index(configurable)
+        if spl_index is None:
+            return []
+        results = await asyncio.to_thread(spl_index.search, brand_name, dosage_form, configurable.dailymed_search_results)
+        return [
+            PotentialRLD(api_name=api_name, brand_name=brand_name, manufacturer=manufacturer, title=title, image_url="", setid=setid)
+            for setid, title in results
+        ]
+
+    async def run(self, state: DailyMedResearchGraphState, config: RunnableConfig):
         """
         1) Retrieves brand_name and rld_dosage_form from RLD in the state.
         2) If brand_name is empty, fallback to the first API name.
-        3) Builds the advanced search URL (with URL-encoding), requests the HTML, parses results.
-        4) Returns 'potentialRLDs' as a list[PotentialRLD].
+        3) Searches the local DailyMed SPL snapshot, if one has been built.
+        4) Otherwise builds the advanced search URL (with URL-encoding), requests the HTML through the
+           shared async DailyMed client (so the searches for N RLDs run concurrently), parses results.
+        5) Returns 'potentialRLDs' as a list[PotentialRLD].
         """
-        try:      
+        try:
+            configurable = Configuration.from_runnable_config(config)
             rld_obj = state["RLD"]      
             brand_name = (rld_obj.brand_name or "").strip()
             manufacturer = (rld_obj.manufacturer or "").strip()
@@ -118,22 +123,33 @@ class DailyMedResearch(BaseModel):
                 logging.warning("No brand_name or dosage_form found. Returning empty list.")
                 return {"potential_RLDs": PotentialRLD(api_name=rld_obj.api_name, brand_name = rld_obj.api_name, manufacturer = "", title="", image_url="", setid="")}
 
+            # 0) Local SPL snapshot first: milliseconds, no network
+            potential_rlds = await self.search_spl_index(configurable, rld_obj.api_name, brand_name, dosage_form, manufacturer)
+            if potential_rlds:
+                return {"potential_RLDs": [potential_rlds]}
+
             # 1) Build the advanced search URL with quote
-            adv_search_url = self.build_advanced_search_url(brand_name, dosage_form)
+            adv_search_url = self.build_advanced_search_url(brand_name, dosage_form, configurable.dailymed_search_results)
             logging.info(f"DailyMed advanced search URL: {adv_search_url}")
 
             # 2) Fetch the page
             try:
-                resp = requests.get(adv_search_url, timeout=15)
-                resp.raise_for_status()
+                html = await get_dailymed_client(configurable).search_html(adv_search_url)
             except Exception as e:
                 logging.error(f"Failed to retrieve DailyMed page: {e}")
                 return {"potential_RLDs": PotentialRLD(api_name=rld_obj.api_name, brand_name = rld_obj.api_name, manufacturer = "", title="", image_url="", setid="")}
 
             # 3) Parse the search results into typed PotentialRLD objects
-            potential_rlds = self.parse_search_results(html = resp.text, api_name = rld_obj.api_name, brand_name = brand_name, manufacturer = manufacturer)
+            # (off the event loop, so other searches keep fetching meanwhile)
+            potential_rlds = await asyncio.to_thread(
+                self.parse_search_results, html = html, api_name = rld_obj.api_name, brand_name = brand_name, manufacturer = manufacturer,
+                max_results = configurable.dailymed_search_results,
+            )
 
-            # 4) Return them in the 'potentialRLDs' key
+            # 4) Return them in the 'potentialRLDs' key (a placeholder keeps the API's
+            #    group when nothing matched, so a retry still replaces earlier candidates)
+            if not potential_rlds:
+                return {"potential_RLDs": PotentialRLD(api_name=rld_obj.api_name, brand_name = rld_obj.api_name, manufacturer = "", title="", image_url="", setid="")}
             return {"potential_RLDs": [potential_rlds]}
 
         except Exception as exc:
@@ -1,11 +1,28 @@
+from typing import List
+
 from langgraph.types import interrupt, Command
 from langchain_core.runnables import RunnableConfig
+from src.configuration import Configuration
+from src.dailymed import cancel_label_prefetch, start_label_prefetch
 from src.product_research_graph.state import ProductResearchGraphState
+from src.state import RLD
 
 class FormulatorFeedbackProductResearch:
     def __init__(self):
         self.configurable = None
 
+    def changed_RLDs(self, previous_RLDs: List[RLD], updated_RLDs: List[RLD]) -> List[RLD]:
+        """
+        RLDs of a "Retry" answer whose DailyMed search inputs (brand name, dosage form, manufacturer)
+        differ from the RLD with the same api_name that was searched last round, or that are new.
+        The others keep their earlier potential_RLDs.
+        """
+        def search_key(rld: RLD):
+            return tuple((getattr(rld, name, "") or "").strip().lower() for name in ("brand_name", "rld_dosage_form", "manufacturer"))
+
+        previous = {rld.api_name: search_key(rld) for rld in previous_RLDs}
+        return [rld for rld in updated_RLDs if previous.get(rld.api_name) != search_key(rld)]
+
     def formulator_feedback_product_research(self, state: ProductResearchGraphState, config: RunnableConfig):
         """
         This node implements human interruption logic after the formulator’s feedback.
@@ -14,7 +31,15 @@ class FormulatorFeedbackProductResearch:
           - "retry_dosage": Retry with a new dosage form (requires a 'new_dosage_form' value and list of APIs).
           - "enrich" (or "go_enrich_accept"): Proceed to enrichment with approved RLDs.
         The node calls interrupt() to pause execution and returns a Command with both a goto route and a state update.
+        While the interrupt is pending, the DailyMed labels of the top-ranked potential RLDs are
+        prefetched into the label cache, so product enrichment starts warm.
         """
+        # Warm the label cache while the formulator decides. LangGraph re-runs this node on resume:
+        # start_label_prefetch is idempotent, and the prefetch is cancelled once the answer arrives.
+        configurable = Configuration.from_runnable_config(config)
+        thread_id = str((config or {}).get("configurable", {}).get("thread_id", ""))
+        start_label_prefetch(thread_id, state.get("potential_RLDs", []), configurable)
+
         # Call interrupt to request human input.
         # (The returned value should be a dictionary with keys such as "feedback_decision", etc.)
         human_response = interrupt({
@@ -30,15 +55,18 @@ class FormulatorFeedbackProductResearch:
             )
         })
 
+        cancel_label_prefetch(thread_id)
+
         # Extract values from the human response
         feedback_decision = human_response.get("feedback_decision")
 
         if feedback_decision == "Retry with API name":
-            return Command(goto="parallelization_op_node", update={"RLDs": human_response.get("RLDs", []), "feedback_decision": "retry_daily_med"})
+            updated_RLDs = human_response.get("RLDs", [])
+            return Command(goto="parallelization_op_node", update={"RLDs": updated_RLDs, "RLDs_to_research": self.changed_RLDs(state.get("RLDs", []), updated_RLDs), "feedback_decision": "retry_daily_med"})
         
         elif feedback_decision == "Retry with dosage forms":
             updated_RLDs = human_response.get("RLDs", [])
-            return Command(goto="parallelization_op_node", update={"RLDs": human_response.get("RLDs", []), "feedback_decision": "retry_daily_med"})
+            return Command(goto="parallelization_op_node", update={"RLDs": updated_RLDs, "RLDs_to_research": self.changed_RLDs(state.get("RLDs", []), updated_RLDs), "feedback_decision": "retry_daily_med"})
         
         elif feedback_decision in ["Proceed to DailyMed Research AS IS", "Proceed to DailyMed Research with SELECTED APIs"]:
             updated_RLDs = human_response.get("RLDs", [])
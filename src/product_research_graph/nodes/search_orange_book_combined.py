@@ -1,12 +1,11 @@
 import asyncio
 import logging
 import pandas as pd
-import zipfile
-import csv
 from typing import List
 
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
+from src.orange_book import OrangeBookIndex, get_orange_book_index
 from src.state import RLD
 from src.product_research_graph.state import ProductResearchGraphState
 
@@ -26,33 +25,19 @@ class SearchOrangeBookCombined:
     def __init__(self):
         self.configurable = None
 
-    def load_and_extract_products(self, local_zip_path: str) -> str:
+    def load_index(self, configurable: Configuration) -> OrangeBookIndex:
         """
-        Reads the Orange Book ZIP from local path, extracting 'products.txt' as a string.
+        Returns the shared, read-only Orange Book index (loaded once per process).
         """
-        with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
-            products_file_name = None
-            for file_name in zip_ref.namelist():
-                if "products.txt" in file_name.lower():
-                    products_file_name = file_name
-                    break
-            if not products_file_name:
-                raise FileNotFoundError("products.txt not found in the local zip file.")
-
-            with zip_ref.open(products_file_name) as f:
-                products_text = f.read().decode('ascii', errors="replace")
-        return products_text
-
-    def parse_products_file(self, products_text: str) -> pd.DataFrame:
-        """
-        Parses 'products.txt' (tilde-delimited) into a pandas DataFrame.
-        """
-        reader = csv.DictReader(products_text.splitlines(), delimiter='~')
-        return pd.DataFrame(list(reader))
+        return get_orange_book_index(
+            configurable.local_orange_book_zip_path,
+            configurable.orange_book_store_dir,
+            configurable.orange_book_reload_interval,
+        )
 
     def filter_combined_ingredients(
         self,
-        df: pd.DataFrame,
+        index: OrangeBookIndex,
         api_names: List[str],
         dosage_form: str,
         route_of_admin: str
@@ -65,50 +50,43 @@ class SearchOrangeBookCombined:
           4) Partial-match dosage_form & route_of_admin from 'DF;Route'.
         """
         # 1) Exclude DSCN
-        mask_not_dscn = df['Appl_Type'].str.strip().str.upper() != "DSCN"
+        mask_not_dscn = index.is_not_dscn
 
         # 2) row['Ingredient'] must have a semicolon => combination product
-        mask_semicolon = df['Ingredient'].str.contains(';', na=False)
+        mask_semicolon = index.is_combination
 
         # 3) Multi-API partial match
         #    row['Ingredient'] must contain all API names (case-insensitive)
-        ingr_lower = df['Ingredient'].str.lower().fillna("")
-        mask_apis = pd.Series([True]*len(df), index=df.index)
-        for name in api_names:
-            name_lower = name.lower().strip()
-            mask_apis &= ingr_lower.str.contains(name_lower, na=False)
-
-        # 4) Parse out dosage form & route
-        df[['DosageForm', 'Route']] = df['DF;Route'].str.split(';', expand=True, n=1)
-        df['DosageForm'] = df['DosageForm'].str.lower().str.strip()
-        df['Route'] = df['Route'].str.lower().str.strip()
+        mask_apis = index.all_ingredients_mask([name.strip() for name in api_names])
 
-        mask_dosage = df['DosageForm'].str.contains(dosage_form.lower(), na=False)
-        mask_route = df['Route'].str.contains(route_of_admin.lower(), na=False)
+        # 4) Dosage form & route ("DF;Route" is pre-split by the index)
+        mask_dosage = index.dosage_form_mask(dosage_form)
+        mask_route = index.route_mask(route_of_admin)
 
         # Combine
-        return df[mask_not_dscn & mask_semicolon & mask_apis & mask_dosage & mask_route]
+        return index.rows(mask_not_dscn & mask_semicolon & mask_apis & mask_dosage & mask_route)
 
     def find_first_rld_or_rs(self, df: pd.DataFrame, api_name: str, dosage_form: str, route_of_admin: str):
         """
         1) Attempt RLD == 'Yes'
         2) If none, fallback to RS == 'Yes'
-        3) Return brand_name, manufacturer from first row or ("","") if not found
+        3) Return brand_name, manufacturer, dosage form, route, Appl_No, Product_No from first row
+           or the user's own values if not found
         """
         # Attempt RLD first
         df_rld = df[df['RLD'].str.strip().str.upper() == "YES"]
         if not df_rld.empty:
             row = df_rld.iloc[0]
-            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", "")
+            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", ""), row.get("Appl_No", ""), row.get("Product_No", "")
 
         # Fallback to RS
         df_rs = df[df['RS'].str.strip().str.upper() == "YES"]
         if not df_rs.empty:
             row = df_rs.iloc[0]
-            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", "")
+            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", ""), row.get("Appl_No", ""), row.get("Product_No", "")
 
         # If none found
-        return api_name, "", dosage_form, route_of_admin
+        return api_name, "", dosage_form, route_of_admin, "", ""
 
     async def run(self, state: ProductResearchGraphState, config: RunnableConfig):
         """
@@ -122,11 +100,9 @@ class SearchOrangeBookCombined:
         try:
             # Load config
             configurable = Configuration.from_runnable_config(config)
-            local_path = configurable.local_orange_book_zip_path
 
-            # Load DataFrame
-            products_text = self.load_and_extract_products(local_path)
-            df_products = self.parse_products_file(products_text)
+            # Shared Orange Book index
+            index = self.load_index(configurable)
 
             # Build the list of API names
             apis = state["apis"]  # e.g. [ {API_name="Dronabinol"}, {API_name="Acetazolamide"} ]
@@ -141,7 +117,7 @@ class SearchOrangeBookCombined:
 
             # Filter
             df_filtered = self.filter_combined_ingredients(
-                df_products,
+                index,
                 api_names,
                 dosage_form,
                 route_of_admin
@@ -152,7 +128,7 @@ class SearchOrangeBookCombined:
             combined_name = ", ".join(api_names)
             
             # RLD or RS
-            brand, manufacturer, rld_dosage_form, route_of_administration = self.find_first_rld_or_rs(df_filtered, combined_name, dosage_form, route_of_admin)
+            brand, manufacturer, rld_dosage_form, route_of_administration, appl_no, product_no = self.find_first_rld_or_rs(df_filtered, combined_name, dosage_form, route_of_admin)
 
             rld_item = RLD(
                 api_name=combined_name,
@@ -160,6 +136,8 @@ class SearchOrangeBookCombined:
                 manufacturer=manufacturer.strip(),
                 rld_dosage_form=rld_dosage_form.strip(),
                 route_of_administration = route_of_administration.strip(),
+                appl_no = appl_no,
+                product_no = product_no,
             )
 
             # Store as a single-element list
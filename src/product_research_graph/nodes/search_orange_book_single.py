@@ -1,12 +1,10 @@
 import asyncio
 import logging
-import pandas as pd
-import zipfile
-import csv
-from typing import List
+from typing import List, Optional
 
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
+from src.orange_book import OrangeBookIndex, get_orange_book_index
 from src.product_research_graph.state import ProductResearchGraphState
 from src.state import RLD
 
@@ -16,9 +14,13 @@ class SearchOrangeBookSingle:
 
     Purpose:
       - For each API in state["apis"], search for a single-ingredient RLD in the Orange Book,
-        using partial matches on Ingredient, dosage form, and route_of_administration.
+        using a partial match on Ingredient and a dosage form / route match selected by
+        orange_book_dosage_form_match (default: exact dosage form, else its family such as all
+        CAPSULE variants, on a compatible route).
       - Exclude Type == 'DSCN' and any Ingredient containing ';' (to ignore combos).
       - Attempt RLD == "Yes" first, fallback to RS == "Yes".
+      - If nothing matches literally, retry with salt/synonym-aware fuzzy matching of the API name
+        and dosage form (orange_book_fuzzy_matching), so a typed salt or INN name still finds the RLD.
       - Build a list of RLD objects (api_name, brand_name, manufacturer).
       - Store that list in state["RLDs"].
 
@@ -29,116 +31,55 @@ class SearchOrangeBookSingle:
     def __init__(self):
         self.configurable = None
 
-    def load_and_extract_products(self, local_zip_path: str) -> str:
+    def load_index(self, configurable: Configuration) -> OrangeBookIndex:
         """
-        Reads the Orange Book ZIP from local path, extracting 'products.txt' as a string.
+        Returns the shared, read-only Orange Book index (loaded once per process).
         """
-        with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
-            products_file_name = None
-            for file_name in zip_ref.namelist():
-                if "products.txt" in file_name.lower():
-                    products_file_name = file_name
-                    break
-            if not products_file_name:
-                raise FileNotFoundError("products.txt not found in the local zip file.")
-
-            with zip_ref.open(products_file_name) as f:
-                products_text = f.read().decode('ascii', errors="replace")
-        return products_text
-
-    def parse_products_file(self, products_text: str) -> pd.DataFrame:
-        """
-        Parses 'products.txt' (tilde-delimited) into a pandas DataFrame.
-        """
-        reader = csv.DictReader(products_text.splitlines(), delimiter='~')
-        return pd.DataFrame(list(reader))
-
-    def filter_for_single_api(
-        self,
-        df: pd.DataFrame,
-        api_name: str,
-        dosage_form: str,
-        route_of_admin: str
-    ) -> pd.DataFrame:
-        """
-        Filter logic for a single API:
-          1) Exclude Type == 'DSCN'
-          2) Exclude combination products: no semicolon in 'Ingredient'
-          3) Partial match on 'Ingredient' with `api_name`
-          4) Partial match for dosage form & route in 'DF;Route'
-        """
-
-        # 1) Exclude Type == 'DSCN'
-        mask_not_dscn = df['Appl_Type'].str.strip().str.upper() != "DSCN"
-
-        # 2) Exclude combination: no semicolon in Ingredient
-        mask_no_semicolon = ~df['Ingredient'].str.contains(';', na=False)
+        return get_orange_book_index(
+            configurable.local_orange_book_zip_path,
+            configurable.orange_book_store_dir,
+            configurable.orange_book_reload_interval,
+        )
 
-        # 3) Partial match on Ingredient
-        mask_ingredient = df['Ingredient'].str.lower().str.contains(api_name.lower(), na=False)
-
-        # 4) Split "DF;Route" => DosageForm + Route
-        df[['DosageForm', 'Route']] = df['DF;Route'].str.split(';', expand=True, n=1)
-        df['DosageForm'] = df['DosageForm'].str.lower().str.strip()
-        df['Route'] = df['Route'].str.lower().str.strip()
-
-        # Partial match for dosage_form & route
-        mask_dosage = df['DosageForm'].str.contains(dosage_form.lower(), na=False)
-        mask_route = df['Route'].str.contains(route_of_admin.lower(), na=False)
-
-        return df[mask_not_dscn & mask_no_semicolon & mask_ingredient & mask_dosage & mask_route]
-
-    def find_first_rld_or_rs(self, df: pd.DataFrame, api_name: str, dosage_form: str, route_of_admin: str):
+    def find_rld_fields(self, index: OrangeBookIndex, row_id: Optional[int], api_name: str, dosage_form: str, route_of_admin: str):
         """
-        1) Attempt RLD == 'Yes'
-        2) If none, fallback to RS == 'Yes'
-        3) Return brand_name, manufacturer from first row or ("","") if not found
+        Returns brand_name, manufacturer, dosage form, route, Appl_No and Product_No of the matched
+        Orange Book row, or the user's own values if no RLD / RS product was found.
         """
-        # Attempt RLD first
-        df_rld = df[df['RLD'].str.strip().str.upper() == "YES"]
-        if not df_rld.empty:
-            row = df_rld.iloc[0]
-            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", "")
-
-        # Fallback to RS
-        df_rs = df[df['RS'].str.strip().str.upper() == "YES"]
-        if not df_rs.empty:
-            row = df_rs.iloc[0]
-            return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", "")
+        if row_id is None:
+            return api_name, "", dosage_form, route_of_admin, "", ""
 
-        # If none found
-        return api_name, "", dosage_form, route_of_admin
+        row = index.row(row_id)
+        return row.get("Trade_Name", ""), row.get("Applicant_Full_Name", ""), row.get("DosageForm", ""), row.get("Route", ""), row.get("Appl_No", ""), row.get("Product_No", "")
 
     async def run(self, state: ProductResearchGraphState, config: RunnableConfig):
         """
-        For each API in state["apis"], do a single-ingredient Orange Book search.
+        Single-ingredient Orange Book search for every API in state["apis"] (one batch query).
         Build a list of RLD objects, store in state["RLDs"].
         """
 
         try:
             # Load config
             configurable = Configuration.from_runnable_config(config)
-            local_path = configurable.local_orange_book_zip_path
 
-            # Load DataFrame
-            products_text = self.load_and_extract_products(local_path)
-            df_products = self.parse_products_file(products_text)
+            # Shared Orange Book index
+            index = self.load_index(configurable)
 
             # Prepare a list for final RLD objects
             rld_list: List[RLD] = []
 
-            # For each API
+            # All APIs are matched in one batch query (RLD == 'Yes' first, fallback RS == 'Yes')
             apis = state["apis"]  # list of API objects
-            for api_obj in apis:
-                api_name = api_obj.API_name
-                dosage_form = api_obj.desired_dosage_form  # literal field
-                route_of_admin = api_obj.route_of_administration
-                
-                # Filter
-                df_filtered = self.filter_for_single_api(df_products, api_name, dosage_form, route_of_admin)
-
+            queries = [(api_obj.API_name, api_obj.desired_dosage_form, api_obj.route_of_administration) for api_obj in apis]
+            match = configurable.orange_book_dosage_form_match
+            if configurable.orange_book_fuzzy_matching:
+                row_ids = index.find_single_rlds_fuzzy(queries, min_score=configurable.orange_book_fuzzy_min_score, match=match)
+            else:
+                row_ids = index.find_single_rlds(queries, match=match)
+
+            for (api_name, dosage_form, route_of_admin), row_id in zip(queries, row_ids):
                 # Grab brand/manufacturer
-                brand, manufacturer, rld_dosage_form, route_of_administration = self.find_first_rld_or_rs(df_filtered, api_name, dosage_form, route_of_admin)
+                brand, manufacturer, rld_dosage_form, route_of_administration, appl_no, product_no = self.find_rld_fields(index, row_id, api_name, dosage_form, route_of_admin)
 
                 # Build an RLD object
                 rld_item = RLD(
@@ -147,6 +88,8 @@ class SearchOrangeBookSingle:
                     manufacturer=manufacturer.strip(),
                     rld_dosage_form=rld_dosage_form.strip(),
                     route_of_administration = route_of_administration.strip(),
+                    appl_no = appl_no,
+                    product_no = product_no,
                 )
                 rld_list.append(rld_item)
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from src.llm import get_chat_model
 from langchain_core.runnables import RunnableConfig
 
 from src.product_research_graph.product_enrichment_graph.state import (
@@ -40,7 +40,7 @@ class GenerateRLDContent:
 
         # 2) Get configuration + LLM
         configurable = Configuration.from_runnable_config(config)
-        llm = ChatOpenAI(model=configurable.gpt4omini, temperature=0)
+        llm = get_chat_model(configurable, configurable.gpt4omini, node="generate_rld_content")
         
         # 3) Retrieve examples + mapping
         HUMAN_MESSAGE_EXAMPLE1_RLD = configurable.HUMAN_MESSAGE_EXAMPLE1_RLD
@@ -1,11 +1,8 @@
 import logging
-import requests
 import re
 from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
 
-from bs4 import BeautifulSoup
-
 from langchain_core.runnables import RunnableConfig
 
 from src.product_research_graph.product_enrichment_graph.state import (
@@ -13,6 +10,9 @@ from src.product_research_graph.product_enrichment_graph.state import (
     DrugLabelDoc,
 )
 
+from src.configuration import Configuration
+from src.dailymed import get_label
+from src.dailymed.label_parser import parse_label_html
 from src.state import RLD
 
 from langchain_core.messages import SystemMessage, HumanMessage
@@ -26,71 +26,26 @@ class GetCleanDrugLabelInfo:
     # 1) WEB-SCRAPING instead of PDF
     ##########################
     
-    def scrape_dailymed_label_html(self, setid: str) -> dict:
+    async def scrape_dailymed_label_html(self, setid: str, configurable: Configuration) -> dict:
+        """
+        Returns the parsed label of `setid` (see src/dailymed/labels.py): from the local DailyMed
+        SPL snapshot, the parsed-label cache, or fetched live through the shared async DailyMed
+        client and parsed off the event loop.
+        """
+        return await get_label(setid, configurable)
+
+    def parse_dailymed_label_html(self, html: str, configurable: Configuration) -> dict:
         """
-        Scrapes a DailyMed drug label page by setid, returning:
-         - The main label sections based on data-sectioncode attributes
+        Parses the HTML of a DailyMed drug label page, returning:
+         - The main label sections listed in configurable.SECTIONCODE_MAP (by data-sectioncode)
          - A 'product_info_str' capturing "Ingredients and Appearance" tables
         """
-        # This dictionary maps known data-sectioncode values to your doc fields.
-        # Adjust codes for your label as needed.
-        SECTIONCODE_MAP = {
-            "34067-9": "indications_usage",
-            "34068-7": "dosage_administration",
-            "43678-2": "dosage_forms_strengths",
-            "34070-3": "contraindications",
-            "43685-7": "warnings_precautions",
-            "34084-4": "adverse_reactions",
-            "34073-7": "drug_interactions",
-            "43684-0": "use_specific_populations",
-            "34088-5": "overdosage",
-            "34089-3": "description",
-            "43680-8": "nonclinical_toxicology",
-            "34092-7": "clinical_studies",
-            "34069-5": "how_supplied_storage_handling",
-            "34076-0": "patient_counseling",
-        }
-
-        # Initialize result with empty strings
-        label_data = {v: "" for v in SECTIONCODE_MAP.values()}
-        label_data["product_info_str"] = ""  # for the "Ingredients and Appearance" data
-
-        base_url = "https://dailymed.nlm.nih.gov/dailymed/drugInfo.cfm?setid="
-        url = base_url + setid
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            raise ValueError(f"Failed to retrieve page. Status code: {resp.status_code}")
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # 1) Extract main sections by data-sectioncode
-        section_divs = soup.find_all("div", class_="Section", attrs={"data-sectioncode": True})
-        for div in section_divs:
-            section_code = div.get("data-sectioncode", "")
-            if section_code in SECTIONCODE_MAP:
-                section_key = SECTIONCODE_MAP[section_code]
-                text_content = div.get_text(separator="\n", strip=True)
-                if label_data[section_key]:
-                    label_data[section_key] += "\n\n" + text_content
-                else:
-                    label_data[section_key] = text_content
-
-        # 2) Capture the product information tables (Ingredients and Appearance) from <div class="DataElementsTables">
-        product_info_divs = soup.find_all("div", class_="DataElementsTables")
-        all_tables_text = []
-        for div in product_info_divs:
-            table_text = div.get_text(separator="\n", strip=True)
-            all_tables_text.append(table_text)
-
-        if all_tables_text:
-            label_data["product_info_str"] = "\n\n".join(all_tables_text)
-
-        return label_data
+        return parse_label_html(html, configurable.SECTIONCODE_MAP)
 
     ##########################
     # 2) Main run
     ##########################
-    def run(self, state: ProductEnrichmentGraphState, config: RunnableConfig) -> ProductEnrichmentGraphState:
+    async def run(self, state: ProductEnrichmentGraphState, config: RunnableConfig) -> ProductEnrichmentGraphState:
         """
         1) Attempt to use brand_name from RLD to get setid from DailyMed.
         2) If that fails, fallback to the first API name.
@@ -98,6 +53,7 @@ class GetCleanDrugLabelInfo:
         4) Return the structured DrugLabelDoc or empty if not found.
         """
         try:
+            configurable = Configuration.from_runnable_config(config)
             # Retrieve the RLD object from state
             rld_obj = state["selected_RLD"]
             api_name = rld_obj.api_name
@@ -129,7 +85,7 @@ class GetCleanDrugLabelInfo:
                 }
             
             # 3) Web-scrape the HTML
-            label_data = self.scrape_dailymed_label_html(setid)
+            label_data = await self.scrape_dailymed_label_html(setid, configurable)
 
             # 4) Build the final doc model. 
             #    Map from label_data to your standard 14 fields + product_info_str.
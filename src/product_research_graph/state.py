@@ -1,5 +1,5 @@
 from typing import TypedDict, List, Literal, Annotated
-from src.state import API, RLD, ProductResearchData, PotentialRLD, ProductReportSection
+from src.state import API, RLD, ProductResearchData, PotentialRLD, ProductReportSection, merge_potential_rlds
 import operator
 from pydantic import BaseModel
 
@@ -23,7 +23,7 @@ class DrugLabelDoc(BaseModel):
 
 class DailyMedResearchGraphState(TypedDict):
     RLD: RLD
-    potential_RLDs: Annotated[List[PotentialRLD], operator.add]
+    potential_RLDs: Annotated[List[PotentialRLD], merge_potential_rlds]
 
 class ProductResearchGraphState(TypedDict):
     apis: List[API]
@@ -31,7 +31,9 @@ class ProductResearchGraphState(TypedDict):
     is_supplement: Literal["Y", "N"]
     
     RLDs: List[RLD]
-    potential_RLDs: Annotated[List[PotentialRLD], operator.add]
+    potential_RLDs: Annotated[List[PotentialRLD], merge_potential_rlds]
+    # RLDs changed by the formulator in a "Retry" round (the only ones searched again)
+    RLDs_to_research: List[RLD]
     
     feedback_decision: Literal["retry_daily_med", "go_enrich_accept", "go_enrich_blank"]
     selected_RLDs: List[PotentialRLD]
@@ -42,7 +44,8 @@ class ProductResearchGraphState(TypedDict):
     product_research_data: Annotated[List[ProductResearchData], operator.add]
     
 class ProductResearchOutputState(TypedDict):
-    potential_RLDs: Annotated[List[PotentialRLD], operator.add]
+    RLDs: List[RLD]
+    potential_RLDs: Annotated[List[PotentialRLD], merge_potential_rlds]
     feedback_decision: Literal["retry_daily_med", "go_enrich_accept", "go_enrich_blank"]
     selected_RLDs: List[PotentialRLD]
     product_research_report: Annotated[List[ProductReportSection], operator.add]
@@ -0,0 +1,10 @@
+from src.pubchem.resolver import CompoundProperties, PubChemResolver, get_pubchem_resolver
+from src.pubchem.cache import PubChemCache, get_pubchem_cache
+
+__all__ = [
+    "CompoundProperties",
+    "PubChemResolver",
+    "get_pubchem_resolver",
+    "PubChemCache",
+    "get_pubchem_cache",
+]
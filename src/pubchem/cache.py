@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.configuration import Configuration
+from src.dailymed.db import ThreadLocalConnection
+
+PUBCHEM_CACHE_FILE = "pubchem.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    name TEXT PRIMARY KEY,
+    properties TEXT,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS headings (
+    cid INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    strings TEXT,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (cid, heading)
+);
+"""
+
+# A cache lookup: (hit, value). A hit with value None is a cached "PubChem has nothing" answer.
+Lookup = Tuple[bool, Optional[object]]
+MISS: Lookup = (False, None)
+
+
+def normalise_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class PubChemCache:
+    """
+    PubChem answers in a WAL-mode SQLite file shared by threads and worker processes:
+
+    - names: compound name -> its PUG REST property table row (CID, SMILES, formula, ...).
+    - headings: (CID, PUG View heading) -> the heading's strings (the CAS heading included).
+    Compound data barely changes, so entries live for `ttl`; answers PubChem did not have (unknown
+    names, headings a compound lacks) are cached too, for the shorter `negative_ttl`.
+    """
+
+    def __init__(self, path: str, ttl: float = 90 * 86400.0, negative_ttl: float = 7 * 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._connect = ThreadLocalConnection(path, _SCHEMA)
+
+    def _fresh(self, value: Optional[str], stored_at: float) -> bool:
+        return time.time() - stored_at < (self.ttl if value is not None else self.negative_ttl)
+
+    def get_properties(self, name: str) -> Lookup:
+        """Cached property table row of `name` (a dict, or None if PubChem does not know the name)."""
+        row = self._connect().execute(
+            "SELECT properties, stored_at FROM names WHERE name = ?", (normalise_name(name),)
+        ).fetchone()
+        if row is None or not self._fresh(*row):
+            return MISS
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def get_cid(self, name: str) -> Optional[int]:
+        """CID `name` resolved to, even if its properties are stale (a name's CID practically never changes)."""
+        row = self._connect().execute(
+            "SELECT properties FROM names WHERE name = ? AND properties IS NOT NULL", (normalise_name(name),)
+        ).fetchone()
+        return json.loads(row[0]).get("CID") if row else None
+
+    def put_properties(self, name: str, properties: Optional[Dict]) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO names VALUES (?, ?, ?)",
+            (normalise_name(name), json.dumps(properties) if properties is not None else None, time.time()),
+        )
+
+    def get_heading(self, cid: int, heading: str) -> Lookup:
+        """Cached strings of a PUG View heading (a list, or None if the compound has no such heading)."""
+        row = self._connect().execute(
+            "SELECT strings, stored_at FROM headings WHERE cid = ? AND heading = ?", (cid, heading)
+        ).fetchone()
+        if row is None or not self._fresh(*row):
+            return MISS
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def put_heading(self, cid: int, heading: str, strings: Optional[List[str]]) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO headings VALUES (?, ?, ?, ?)",
+            (cid, heading, json.dumps(strings) if strings is not None else None, time.time()),
+        )
+
+
+_pubchem_caches: Dict[str, PubChemCache] = {}
+
+
+def get_pubchem_cache(configurable: Configuration) -> Optional[PubChemCache]:
+    """The process-wide PubChem cache under cache_dir, or None if pubchem_cache_enabled is off."""
+    if not configurable.pubchem_cache_enabled:
+        return None
+    path = os.path.join(configurable.cache_dir, PUBCHEM_CACHE_FILE)
+    if path not in _pubchem_caches:
+        os.makedirs(configurable.cache_dir, exist_ok=True)
+        _pubchem_caches[path] = PubChemCache(path, configurable.pubchem_cache_ttl, configurable.pubchem_negative_ttl)
+    return _pubchem_caches[path]
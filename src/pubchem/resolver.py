@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+from src.configuration import Configuration
+from src.http_clients import new_async_client, pooled_client
+from src.pubchem.cache import PubChemCache, get_pubchem_cache
+from src.rate_limit import RateLimiter, get_rate_limiter
+from src.state import CompoundProperties
+
+PUBCHEM_HOST = "pubchem.ncbi.nlm.nih.gov"
+PUG_REST_URL = f"https://{PUBCHEM_HOST}/rest/pug"
+PUG_VIEW_URL = f"https://{PUBCHEM_HOST}/rest/pug_view/data/compound"
+
+# PUG REST property table columns read per compound
+COMPOUND_PROPERTIES = ("IsomericSMILES", "MolecularFormula", "MolecularWeight", "IUPACName")
+
+# PUG View heading holding the CAS registry numbers of a compound (a few strings, not every synonym)
+CAS_HEADING = "CAS"
+
+# PUG View headings read for literature research, by the name the report uses for them
+PROPERTY_HEADINGS = {
+    "Physical Description": "Physical Description",
+    "Dissociation Constants": "Dissociation Constants",
+    "Stability conditions": "Stability / Shelf Life",
+    "LogP": "LogP",
+    "Solubility": "Solubility",
+    "Melting Point": "Melting Point",
+    "Boiling Point": "Boiling Point",
+}
+
+CAS_PATTERN = re.compile(r"^(\d{2,7})-(\d{2})-(\d)$")
+
+
+def is_cas_number(value: str) -> bool:
+    """Whether `value` is a CAS registry number with a valid check digit."""
+    match = CAS_PATTERN.match(value.strip())
+    if not match:
+        return False
+    digits = (match.group(1) + match.group(2))[::-1]
+    return sum(i * int(d) for i, d in enumerate(digits, start=1)) % 10 == int(match.group(3))
+
+
+def extract_strings(obj) -> List[str]:
+    """Every "String" value of a PUG View record, in document order."""
+    results: List[str] = []
+
+    def recursive_search(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "String" and isinstance(value, str):
+                    results.append(value)
+                else:
+                    recursive_search(value)
+        elif isinstance(node, list):
+            for item in node:
+                recursive_search(item)
+
+    recursive_search(obj)
+    return results
+
+
+class PubChemResolver:
+    """
+    Async PubChem lookups over a shared httpx client and the process-wide rate limiter.
+
+    - compound_by_name: CID, isomeric SMILES, formula, weight and IUPAC name from a single PUG REST
+      property table request.
+    - cas_number: the CAS heading of the compound's PUG View record (not its whole synonym list).
+    - heading_strings: the strings of any other PUG View heading (solubility, pKa, ...).
+    A 404 (unknown name, or a heading the compound does not have) is an empty answer, not an error.
+    With a PubChemCache, names and headings answered before (404s included) need no request.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        rate_limiter: RateLimiter,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        cache: Optional[PubChemCache] = None,
+    ):
+        self.client = client
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    async def get_json(self, url: str) -> Optional[Dict]:
+        """JSON body of a PubChem GET, or None when PubChem answers 404."""
+        try:
+            response = await self.rate_limiter.request(
+                self.client, "GET", url, max_retries=self.max_retries, backoff=self.backoff, timeout=self.timeout,
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+        return response.json() if response.text.strip() else None
+
+    async def compound_by_name(self, name: str) -> Optional[CompoundProperties]:
+        """Properties of the best PubChem match for `name` (PubChem's first CID), or None."""
+        if self.cache is not None:
+            hit, row = await asyncio.to_thread(self.cache.get_properties, name)
+            if hit:
+                return CompoundProperties.from_row(row) if row else None
+
+        url = f"{PUG_REST_URL}/compound/name/{quote(name, safe='')}/property/{','.join(COMPOUND_PROPERTIES)}/JSON"
+        data = await self.get_json(url)
+        rows = (data or {}).get("PropertyTable", {}).get("Properties", [])
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put_properties, name, rows[0] if rows else None)
+        return CompoundProperties.from_row(rows[0]) if rows else None
+
+    async def compounds_by_cid(self, cids: Iterable[int]) -> Dict[int, Dict]:
+        """Property table rows of many CIDs, by CID, from a single PUG REST request."""
+        cids = sorted(set(cids))
+        if not cids:
+            return {}
+        url = f"{PUG_REST_URL}/compound/cid/{','.join(map(str, cids))}/property/{','.join(COMPOUND_PROPERTIES)}/JSON"
+        data = await self.get_json(url)
+        rows = (data or {}).get("PropertyTable", {}).get("Properties", [])
+        return {int(row["CID"]): row for row in rows}
+
+    async def compounds_by_names(self, names: Iterable[str]) -> Dict[str, Optional[CompoundProperties]]:
+        """
+        compound_by_name for many names at once. Cached names cost nothing; names whose CID is known
+        from an older cache entry are refreshed together by CID in one request; PUG REST only takes
+        one name per request, so the remaining names are looked up concurrently.
+        """
+        names = list(dict.fromkeys(names))
+        results: Dict[str, Optional[CompoundProperties]] = {}
+        known_cids: Dict[str, int] = {}
+        if self.cache is not None:
+            for name in names:
+                hit, row = await asyncio.to_thread(self.cache.get_properties, name)
+                if hit:
+                    results[name] = CompoundProperties.from_row(row) if row else None
+                    continue
+                cid = await asyncio.to_thread(self.cache.get_cid, name)
+                if cid is not None:
+                    known_cids[name] = cid
+
+        rows = await self.compounds_by_cid(known_cids.values())
+        for name, cid in known_cids.items():
+            if cid in rows:
+                await asyncio.to_thread(self.cache.put_properties, name, rows[cid])
+                results[name] = CompoundProperties.from_row(rows[cid])
+
+        missing = [name for name in names if name not in results]
+        for name, compound in zip(missing, await asyncio.gather(*(self.compound_by_name(n) for n in missing))):
+            results[name] = compound
+        return results
+
+    async def heading_strings(self, cid: int, heading: str) -> List[str]:
+        """Strings of the PUG View `heading` of compound `cid` (empty if it has none)."""
+        if self.cache is not None:
+            hit, strings = await asyncio.to_thread(self.cache.get_heading, cid, heading)
+            if hit:
+                return strings or []
+
+        data = await self.get_json(f"{PUG_VIEW_URL}/{cid}/JSON?heading={quote(heading)}")
+        strings = extract_strings(data) if data else None
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put_heading, cid, heading, strings)
+        return strings or []
+
+    async def property_headings(self, cid: int) -> Dict[str, List[str]]:
+        """Strings of every PROPERTY_HEADINGS heading of compound `cid`, fetched concurrently (failures are empty)."""
+        names = list(PROPERTY_HEADINGS)
+        responses = await asyncio.gather(
+            *(self.heading_strings(cid, PROPERTY_HEADINGS[name]) for name in names), return_exceptions=True
+        )
+        data = {}
+        for name, response in zip(names, responses):
+            if isinstance(response, BaseException):
+                logging.error(f"Error fetching {name} of CID {cid}: {response}")
+                response = []
+            data[name] = response
+        return data
+
+    async def cas_number(self, cid: int) -> Optional[str]:
+        """The CAS number most sources give for compound `cid`, or None."""
+        numbers = [s.strip() for s in await self.heading_strings(cid, CAS_HEADING) if is_cas_number(s)]
+        if not numbers:
+            return None
+        return Counter(numbers).most_common(1)[0][0]
+
+    async def resolve(self, name: str) -> Optional[CompoundProperties]:
+        """compound_by_name with its CAS number filled in (two requests)."""
+        compound = await self.compound_by_name(name)
+        if compound is None:
+            logging.warning(f"PubChem has no compound named {name!r}")
+            return None
+        compound.cas_number = await self.cas_number(compound.cid)
+        return compound
+
+    async def resolve_many(self, names: Iterable[str]) -> Dict[str, Optional[CompoundProperties]]:
+        """resolve for many names: compounds_by_names, then every CAS number concurrently."""
+        compounds = await self.compounds_by_names(names)
+        found = [compound for compound in compounds.values() if compound is not None]
+        cas_numbers = await asyncio.gather(*(self.cas_number(c.cid) for c in found), return_exceptions=True)
+        for compound, cas_number in zip(found, cas_numbers):
+            if isinstance(cas_number, BaseException):
+                logging.error(f"Error fetching the CAS number of CID {compound.cid}: {cas_number}")
+            else:
+                compound.cas_number = cas_number
+        return compounds
+
+    async def warm(self, name: str) -> bool:
+        """Looks up everything literature research reads about `name`, so a cache holds it; False if unknown."""
+        compound = await self.resolve(name)
+        if compound is None:
+            return False
+        await self.property_headings(compound.cid)
+        return True
+
+
+def get_pubchem_resolver(configurable: Configuration) -> PubChemResolver:
+    """
+    A resolver over the pooled PubChem client of the running event loop (created from the
+    pubchem_* settings on first use), so every literature research branch shares its connections.
+    """
+    client = pooled_client(
+        "pubchem",
+        lambda: new_async_client(
+            max_connections=configurable.pubchem_max_connections,
+            timeout=configurable.pubchem_timeout,
+            headers={"User-Agent": "drug-development-researcher (PubChem client)"},
+        ),
+    )
+    return PubChemResolver(
+        client,
+        get_rate_limiter(configurable),
+        max_retries=configurable.pubchem_max_retries,
+        timeout=configurable.pubchem_timeout,
+        cache=get_pubchem_cache(configurable),
+    )
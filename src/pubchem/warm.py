@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import logging
+from typing import Iterable, List
+
+from src.configuration import Configuration
+from src.http_clients import close_http_clients
+from src.pubchem.resolver import get_pubchem_resolver
+
+
+def read_portfolio(path: str) -> List[str]:
+    """API names of a portfolio file: one per line; blank lines and '#' comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        names = (line.split("#", 1)[0].strip() for line in f)
+        return list(dict.fromkeys(name for name in names if name))
+
+
+async def warm_pubchem_cache(names: Iterable[str], configurable: Configuration) -> List[str]:
+    """
+    Fills the PubChem cache with every name's properties, CAS number and PUG View headings (the
+    rate limiter paces the requests). Returns the names PubChem does not know.
+    """
+    resolver = get_pubchem_resolver(configurable)
+    if resolver.cache is None:
+        raise ValueError("pubchem_cache_enabled is off; there is no cache to warm")
+    names = list(names)
+
+    async def warm(name: str) -> bool:
+        try:
+            return await resolver.warm(name)
+        except Exception as e:
+            logging.error(f"Could not warm the PubChem cache for {name!r}: {e}")
+            return False
+
+    try:
+        found = await asyncio.gather(*(warm(name) for name in names))
+    finally:
+        await close_http_clients()
+    return [name for name, ok in zip(names, found) if not ok]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preload the local PubChem cache with an API portfolio.")
+    parser.add_argument("portfolio", nargs="?", help="Text file with one API name per line.")
+    parser.add_argument("--name", action="append", default=[], help="API name to preload (repeatable).")
+    parser.add_argument("--cache-dir", default=Configuration.cache_dir)
+    args = parser.parse_args()
+
+    names = (read_portfolio(args.portfolio) if args.portfolio else []) + args.name
+    if not names:
+        parser.error("give a portfolio file or at least one --name")
+    missing = asyncio.run(warm_pubchem_cache(names, Configuration(cache_dir=args.cache_dir)))
+    print(f"{len(names) - len(missing)}/{len(names)} APIs cached" + (f"; not found: {', '.join(missing)}" if missing else ""))
+
+
+if __name__ == "__main__":
+    main()
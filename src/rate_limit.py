@@ -0,0 +1,238 @@
+import asyncio
+import contextlib
+import email.utils
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import timezone
+from typing import AsyncIterator, Dict, Mapping, Optional, Tuple, Type, Union
+from urllib.parse import urlparse
+
+import httpx
+
+from src.configuration import Configuration
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Responses meaning "slow down": they throttle the host (see RateLimiter.record)
+THROTTLE_STATUS_CODES = {429, 503}
+
+# Host of the Tavily search API, called through its own client (see RateLimiter.limit)
+TAVILY_HOST = "api.tavily.com"
+
+# Adaptive rate: halved on every throttling response, never below MIN_RATE_FACTOR of the
+# configured rate, and recovered by RATE_RECOVERY of it per successful request
+MIN_RATE_FACTOR = 1 / 16
+RATE_RECOVERY = 0.05
+
+
+@dataclass
+class HostLimit:
+    """Outbound budget of one host: sustained requests per second, burst size and requests in flight."""
+
+    rate: float = 10.0
+    burst: int = 10
+    concurrency: int = 8
+
+
+def host_of(url: str) -> str:
+    """Host (netloc) of a URL; a bare host name is returned unchanged."""
+    return urlparse(url).netloc if "://" in url else url
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class _HostBucket:
+    """
+    Token bucket of one host. Tokens may go negative: every reservation takes one immediately and
+    waits until the bucket would have refilled it, so concurrent callers queue up in order.
+    While the host is blocked (Retry-After), `updated_at` lies in the future and nothing refills.
+    """
+
+    def __init__(self, limit: HostLimit):
+        self.limit = limit
+        self.factor = 1.0
+        self.tokens = float(limit.burst)
+        self.updated_at = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.limit.rate * self.factor
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.limit.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        """Takes a token; returns the seconds to wait before using it."""
+        self._refill(now)
+        self.tokens -= 1
+        return (self.updated_at - now) + max(0.0, -self.tokens) / self.rate
+
+    def throttle(self, now: float, retry_after: Optional[float]) -> None:
+        self._refill(now)
+        self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+        if retry_after:
+            self.tokens = min(self.tokens, 0.0)
+            self.updated_at = max(self.updated_at, now + retry_after)
+
+    def recover(self) -> None:
+        self.factor = min(1.0, self.factor + RATE_RECOVERY)
+
+
+class RateLimiter:
+    """
+    Process-wide governor of outbound HTTP, shared by every node that calls DailyMed, PubChem or
+    Tavily from parallel Send branches, event loops and threads.
+
+    - A token bucket per host caps the sustained request rate (and bursts) of the whole process.
+    - 429 / 503 responses halve the host's rate and, with a Retry-After, hold every request to the
+      host until it has passed; successful requests recover the rate step by step.
+    - A per-host semaphore caps requests in flight (per event loop: asyncio primitives are loop-bound).
+    Hosts without an entry in `limits` get `default`.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, Union[HostLimit, Mapping]]] = None,
+        default: Optional[HostLimit] = None,
+    ):
+        self.default = default or HostLimit()
+        self.limits = {
+            host: limit if isinstance(limit, HostLimit) else HostLimit(**limit)
+            for host, limit in (limits or {}).items()
+        }
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def limit_of(self, host: str) -> HostLimit:
+        return self.limits.get(host, self.default)
+
+    def _bucket(self, host: str) -> _HostBucket:
+        if host not in self._buckets:
+            self._buckets[host] = _HostBucket(self.limit_of(host))
+        return self._buckets[host]
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if host not in semaphores:
+                semaphores[host] = asyncio.Semaphore(self.limit_of(host).concurrency)
+            return semaphores[host]
+
+    def current_rate(self, url: str) -> float:
+        """Requests per second currently allowed to the host of `url` (after throttling)."""
+        with self._lock:
+            return self._bucket(host_of(url)).rate
+
+    async def wait_for_token(self, url: str) -> None:
+        with self._lock:
+            delay = self._bucket(host_of(url)).reserve(time.monotonic())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, url: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        """Feeds the outcome of a request to the host's adaptive rate."""
+        with self._lock:
+            bucket = self._bucket(host_of(url))
+            if status_code in THROTTLE_STATUS_CODES:
+                bucket.throttle(time.monotonic(), retry_after)
+                logging.warning(
+                    f"{host_of(url)} throttled us ({status_code}); rate lowered to {bucket.rate:.2f} req/s"
+                    + (f", paused {retry_after:.1f}s" if retry_after else "")
+                )
+            elif status_code < 400:
+                bucket.recover()
+
+    @contextlib.asynccontextmanager
+    async def limit(self, url: str, throttle_errors: Tuple[Type[BaseException], ...] = ()) -> AsyncIterator[None]:
+        """
+        Holds a concurrency slot and a token of the host of `url` (a URL or a bare host) while the
+        body runs. For calls made through third-party clients (pubchempy, Tavily), exceptions of
+        `throttle_errors` count as a 429 and successful bodies as a success.
+        """
+        async with self._semaphore(host_of(url)):
+            await self.wait_for_token(url)
+            try:
+                yield
+            except throttle_errors:
+                self.record(url, 429)
+                raise
+            if throttle_errors:
+                self.record(url, 200)
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Sends a request through the limiter and retries timeouts, connection errors, 429 and 5xx
+        responses. A Retry-After pauses the whole host; otherwise retries back off exponentially
+        with full jitter. Raises on the final failure or on other error statuses; a 304 (answer to
+        a conditional request) is returned as is.
+        """
+        for attempt in range(max_retries + 1):
+            retry_after = None
+            try:
+                async with self.limit(url):
+                    response = await client.request(method, url, **kwargs)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.record(url, response.status_code, retry_after)
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                error: Exception = httpx.HTTPStatusError(
+                    f"{host_of(url)} returned {response.status_code}", request=response.request, response=response
+                )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = e
+
+            if attempt == max_retries:
+                raise error
+            # With a Retry-After the host's bucket already holds the next request back
+            delay = 0.0 if retry_after is not None else random.uniform(0, backoff * 2 ** attempt)
+            logging.warning(f"{method} {url} failed ({error}); retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(configurable: Configuration) -> RateLimiter:
+    """The process-wide rate limiter, created from HTTP_RATE_LIMITS on first use."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(configurable.HTTP_RATE_LIMITS)
+        return _rate_limiter
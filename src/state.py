@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, TypedDict, Annotated, Optional
+from typing import Dict, List, TypedDict, Annotated, Optional
 import operator
 
 from typing import List, Literal
@@ -12,6 +12,8 @@ class RLD(BaseModel):
     rld_dosage_form: str = Field(..., description="The dosage form of the reference list drug product.")
     manufacturer: str = Field(..., description= "The manufacturer of the reference list drug product")
     route_of_administration: str = Field(..., description= "The route of administration of the reference list drug product")
+    appl_no: str = Field("", description= "The FDA application number of the reference list drug product in the Orange Book")
+    product_no: str = Field("", description= "The Orange Book product number within the application")
 
 class RLDReportSection(BaseModel):
     rld_section: Literal[
@@ -208,6 +210,31 @@ class PotentialRLD(BaseModel):
     image_url: str
     setid: str
 
+def merge_potential_rlds(current: Optional[list], update: Optional[list]) -> list:
+    """
+    Reducer for potential_RLDs: one group (the PotentialRLDs of one DailyMed search) per RLD
+    api_name. A group for an api_name that is already present replaces it, so a retry supersedes
+    the earlier candidates instead of piling up next to them. A bare PotentialRLD (failed search)
+    counts as a group of one.
+    """
+    def groups(value) -> list:
+        if value is None:
+            return []
+        if isinstance(value, PotentialRLD):
+            return [[value]]
+        return [group if isinstance(group, list) else [group] for group in value]
+
+    merged = groups(current)
+    positions = {group[0].api_name: i for i, group in enumerate(merged) if group}
+    for group in groups(update):
+        if group and group[0].api_name in positions:
+            merged[positions[group[0].api_name]] = group
+        else:
+            if group:
+                positions[group[0].api_name] = len(merged)
+            merged.append(group)
+    return merged
+
 class ProductReportSection(BaseModel):
     product_report_section: Literal[
         "API_name_with_UNII",
@@ -232,6 +259,64 @@ class ProductReportSection(BaseModel):
 
 
 
+class OrangeBookPatent(BaseModel):
+    patent_no: str = Field(..., description="US patent number listed in the Orange Book")
+    patent_expire_date: str = Field(..., description="Patent expiration date as published by FDA, e.g. 'Aug 24, 2026'")
+    drug_substance_claim: bool = Field(..., description="The patent claims the drug substance")
+    drug_product_claim: bool = Field(..., description="The patent claims the drug product")
+    patent_use_code: str = Field("", description="Orange Book patent use code, e.g. 'U-141'")
+    delist_requested: bool = Field(False, description="The sponsor requested the patent be delisted")
+
+class OrangeBookExclusivity(BaseModel):
+    exclusivity_code: str = Field(..., description="Orange Book exclusivity code, e.g. 'NCE' or 'ODE-123'")
+    exclusivity_date: str = Field(..., description="Exclusivity expiration date as published by FDA")
+
+class OrangeBookPatentRecord(BaseModel):
+    api_name: str
+    trade_name: str
+    appl_no: str
+    product_no: str
+    patents: List[OrangeBookPatent]
+    exclusivities: List[OrangeBookExclusivity]
+
+    @property
+    def context(self) -> str:
+        lines = [f"Orange Book record for {self.trade_name} ({self.api_name}), application {self.appl_no}, product {self.product_no}:"]
+        if not self.patents and not self.exclusivities:
+            lines.append("- No patents or exclusivities are listed.")
+        for patent in self.patents:
+            claims = [name for name, flag in (("drug substance", patent.drug_substance_claim), ("drug product", patent.drug_product_claim)) if flag]
+            lines.append(
+                f"- Patent US {patent.patent_no}, expires {patent.patent_expire_date}"
+                + (f", claims {' and '.join(claims)}" if claims else "")
+                + (f", use code {patent.patent_use_code}" if patent.patent_use_code else "")
+                + (", delisting requested" if patent.delist_requested else "")
+            )
+        for exclusivity in self.exclusivities:
+            lines.append(f"- Exclusivity {exclusivity.exclusivity_code}, expires {exclusivity.exclusivity_date}")
+        return "\n".join(lines)
+
+class CompoundProperties(BaseModel):
+    cid: int = Field(..., description="PubChem compound ID")
+    smiles: Optional[str] = Field(None, description="Isomeric SMILES")
+    molecular_formula: Optional[str] = Field(None, description="Molecular formula in Hill notation")
+    molecular_weight: Optional[float] = Field(None, description="Molecular weight in g/mol")
+    iupac_name: Optional[str] = Field(None, description="IUPAC name of compound")
+    cas_number: Optional[str] = Field(None, description="CAS number in XXXX-XX-X format")
+
+    @classmethod
+    def from_row(cls, row: dict) -> "CompoundProperties":
+        """From a PUG REST property table row."""
+        weight = row.get("MolecularWeight")
+        return cls(
+            cid=int(row["CID"]),
+            # PubChem now labels the isomeric SMILES column "SMILES"
+            smiles=row.get("IsomericSMILES") or row.get("SMILES"),
+            molecular_formula=row.get("MolecularFormula"),
+            molecular_weight=float(weight) if weight not in (None, "") else None,
+            iupac_name=row.get("IUPACName"),
+        )
+
 class PatentResearchReport(BaseModel):
     api_name: str = Field(
         ...,
@@ -569,10 +654,12 @@ class DrugDevelopmentResearchGraphState(TypedDict):
     is_supplement: Literal["Y", "N"]
     
     literature_research_api_data: Annotated[List[APILiteratureResearchData], operator.add]
+    # PubChem identifiers of every API, resolved once per study (API_name -> compound, None if unknown)
+    pubchem_compounds: Dict[str, Optional[CompoundProperties]]
     
     RLDs: List[RLD]
     feedback_decision: Literal["retry_daily_med", "go_enrich_accept", "go_enrich_blank"]
-    potential_RLDs: Annotated[List[PotentialRLD], operator.add]
+    potential_RLDs: Annotated[List[PotentialRLD], merge_potential_rlds]
     selected_RLDs: List[PotentialRLD]    
     
     product_research_report: Annotated[List[ProductReportSection], operator.add]
@@ -0,0 +1,204 @@
+"""
+Offline latency / memory benchmark for the Orange Book search nodes.
+
+Drives SearchOrangeBookSingle and SearchOrangeBookCombined with the bundled ZIP and a reproducible
+set of synthetic API / dosage form / route queries, and writes the results as JSON so runs can be
+compared between commits:
+
+    python -m tests.benchmark_orange_book --queries 300
+    python -m tests.benchmark_orange_book --compare output/benchmarks/orange_book-<old commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.orange_book import OrangeBookStore
+from src.product_research_graph.nodes import SearchOrangeBookCombined, SearchOrangeBookSingle
+from src.state import API
+
+ORANGE_BOOK_ZIP = os.path.join(os.path.dirname(__file__), "..", "databases", "orange_book_database.zip")
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "output", "benchmarks")
+
+# Suffixes and misspellings mixed into the synthetic API names, so fuzzy fallbacks are exercised too
+SALT_SUFFIXES = ["", "", "", " hydrochloride", " sodium", " fumarate"]
+UNKNOWN_APIS = ["Melatonin", "Cannabidiol", "Omega 3", "Dimeticone", "Pinaverium"]
+
+
+def make_config(zip_path: str, store_dir: str) -> SimpleNamespace:
+    # Configuration.from_runnable_config reads the `configurable` attribute of the config it gets
+    return SimpleNamespace(configurable={
+        "local_orange_book_zip_path": zip_path,
+        "orange_book_store_dir": store_dir,
+        "orange_book_reload_interval": 0,
+    })
+
+
+def synthetic_queries(n_queries: int, seed: int) -> Tuple[List[API], List[List[API]]]:
+    """
+    Single-ingredient queries sampled from real Orange Book products (with salt suffixes and a few
+    unknown APIs mixed in) and two-ingredient queries sampled from real combination products.
+    """
+    store_dir = tempfile.mkdtemp()
+    try:
+        products = OrangeBookStore.open(ORANGE_BOOK_ZIP, store_dir).products.to_dataframe()
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+    rng = random.Random(seed)
+
+    df_route = products["DF;Route"].str.split(";", n=1)
+    products["DosageForm"] = df_route.str[0]
+    products["Route"] = df_route.str[1].fillna("")
+    single = products[~products["Ingredient"].str.contains(";", regex=False)]
+    combined = products[products["Ingredient"].str.count(";") == 1]
+
+    singles = []
+    for _ in range(n_queries):
+        row = single.iloc[rng.randrange(len(single))]
+        api_name = row["Ingredient"].split()[0].title() + rng.choice(SALT_SUFFIXES)
+        if rng.random() < 0.05:
+            api_name = rng.choice(UNKNOWN_APIS)
+        singles.append(API(API_name=api_name, desired_dosage_form=row["DosageForm"], route_of_administration=row["Route"]))
+
+    combos = []
+    for _ in range(max(1, n_queries // 10)):
+        row = combined.iloc[rng.randrange(len(combined))]
+        combos.append([
+            API(API_name=name.strip().split()[0].title(), desired_dosage_form=row["DosageForm"], route_of_administration=row["Route"])
+            for name in row["Ingredient"].split(";")
+        ])
+    return singles, combos
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000.0
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def timed(coroutine) -> Tuple[Dict, float]:
+    start = time.perf_counter()
+    result = asyncio.run(coroutine)
+    return result, time.perf_counter() - start
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(n_queries: int, seed: int) -> Dict:
+    singles, combos = synthetic_queries(n_queries, seed)
+    single_node, combined_node = SearchOrangeBookSingle(), SearchOrangeBookCombined()
+    rss_before = peak_rss_mb()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        zip_path = os.path.join(tmp_dir, "orange_book.zip")
+        shutil.copy(ORANGE_BOOK_ZIP, zip_path)
+
+        # Cold: no store on disk yet (parse ZIP + write store + build index)
+        build_config = make_config(zip_path, os.path.join(tmp_dir, "build"))
+        _, cold_build = timed(single_node.run({"apis": singles[:1]}, build_config))
+
+        # Warm process start: store already on disk (memory-map + build index)
+        store_dir = os.path.join(tmp_dir, "store")
+        shutil.copytree(os.path.join(tmp_dir, "build"), store_dir)
+        config = make_config(zip_path, store_dir)
+        _, cold_load = timed(single_node.run({"apis": singles[:1]}, config))
+
+        single_latency, single_hits = [], 0
+        for api in singles:
+            result, elapsed = timed(single_node.run({"apis": [api]}, config))
+            single_latency.append(elapsed)
+            single_hits += sum(1 for rld in result["RLDs"] if rld.appl_no)
+        _, single_batch = timed(single_node.run({"apis": singles}, config))
+
+        combined_latency, combined_hits = [], 0
+        for apis in combos:
+            result, elapsed = timed(combined_node.run({"apis": apis}, config))
+            combined_latency.append(elapsed)
+            combined_hits += sum(1 for rld in result["RLDs"] if rld.appl_no)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "queries": {"single": len(singles), "combined": len(combos), "seed": seed},
+        "cold_build_s": round(cold_build, 3),
+        "cold_load_s": round(cold_load, 3),
+        "single": dict(percentiles(single_latency), hit_rate=round(single_hits / len(singles), 3), batch_s=round(single_batch, 3)),
+        "combined": dict(percentiles(combined_latency), hit_rate=round(combined_hits / len(combos), 3)),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_before_mb": rss_before,
+    }
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """Prints the relative change of every timing / memory figure against a previous run."""
+    def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+        flat = {}
+        for key, value in results.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            elif isinstance(value, (int, float)) and (key.endswith(("_s", "_ms", "_mb"))):
+                flat[prefix + key] = value
+        return flat
+
+    now, before = flatten(current), flatten(previous)
+    print(f"Compared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    for key in sorted(now.keys() & before.keys()):
+        change = (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"  {key:28s} {before[key]:>10} -> {now[key]:>10}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Orange Book search nodes offline.")
+    parser.add_argument("--queries", type=int, default=300, help="Number of single-ingredient queries.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="JSON file to write (default: output/benchmarks/orange_book-<commit>.json).")
+    parser.add_argument("--compare", help="Previous results JSON to compare with.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.queries, args.seed)
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"orange_book-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    print(f"Saved to {output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,7 @@ class CreateAnalysts:
             api_name = api_obj.API_name,
             api_desired_dosage_form = api_obj.desired_dosage_form,
             api_route_of_administration = api_obj.route_of_administration,
+            orange_book_patents = "Not available.",
         )
 
         # Generate question 
@@ -0,0 +1,441 @@
+import asyncio
+import glob
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from types import SimpleNamespace
+
+import httpx
+
+from src.configuration import SECTIONCODE_MAP, Configuration
+from src.dailymed import DailyMedClient, LabelCache
+from src.dailymed.client import DAILYMED_LABEL_URL, DAILYMED_SPLS_URL
+from src.dailymed.http_cache import HttpCache, normalise_url
+from src.dailymed.label_parser import parse_label_html_bs4, parse_label_html_lxml
+from src.dailymed.prefetch import LabelPrefetcher, rank_prefetch_candidates
+from src.dailymed.search_parser import iter_search_results_bs4, iter_search_results_lxml
+from src.dailymed.spl_index import SplIndex
+from src.dailymed.thumbnails import PIL_AVAILABLE, fetch_thumbnails
+from src import http_clients
+from src.product_research_graph.nodes.daily_med_research import DailyMedResearch
+from src.product_research_graph.product_enrichment_graph.nodes import GetCleanDrugLabelInfo
+from src.state import PotentialRLD
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "dailymed")
+
+LABEL_HTML = """
+<html><body>
+<div class="Section" data-sectioncode="34067-9"><h1>INDICATIONS</h1><p>Nausea.</p></div>
+<div class="DataElementsTables"><table><tr><td>DRONABINOL</td></tr></table></div>
+</body></html>
+"""
+
+
+class TestDailyMedClient(unittest.TestCase):
+    def run_client(self, handler, **kwargs):
+        async def fetch():
+            client = DailyMedClient(transport=httpx.MockTransport(handler), backoff=0.001, **kwargs)
+            try:
+                return await client.label_html("abc")
+            finally:
+                await client.aclose()
+        return asyncio.run(fetch())
+
+    def test_retries_transient_errors(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("reset", request=request)
+            if len(calls) == 2:
+                return httpx.Response(503)
+            return httpx.Response(200, text="<html>label</html>")
+
+        self.assertEqual(self.run_client(handler), "<html>label</html>")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(str(calls[-1].url), DAILYMED_LABEL_URL + "?setid=abc")
+
+    def test_gives_up_after_max_retries_and_not_on_client_errors(self):
+        calls = []
+
+        def unavailable(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.run_client(unavailable, max_retries=2)
+        self.assertEqual(len(calls), 3)
+
+        calls.clear()
+
+        def missing(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.run_client(missing)
+        self.assertEqual(len(calls), 1)
+
+    def test_per_host_concurrency_limit(self):
+        in_flight, peak = 0, 0
+
+        async def fetch_all():
+            async def handler(request):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return httpx.Response(200, text="ok")
+
+            client = DailyMedClient(transport=httpx.MockTransport(handler), per_host_concurrency=3)
+            try:
+                return await asyncio.gather(*(client.label_html(str(i)) for i in range(10)))
+            finally:
+                await client.aclose()
+
+        self.assertEqual(asyncio.run(fetch_all()), ["ok"] * 10)
+        self.assertEqual(peak, 3)
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def fetch(self, handler, cache, setid="abc", label_ttl=3600.0):
+        async def fetch():
+            client = DailyMedClient(transport=httpx.MockTransport(handler), cache=cache, label_ttl=label_ttl)
+            try:
+                return await client.label_html(setid)
+            finally:
+                await client.aclose()
+        return asyncio.run(fetch())
+
+    def test_normalised_url(self):
+        self.assertEqual(
+            normalise_url("HTTPS://DailyMed.nlm.nih.gov/x?b=2&a=1#frag"),
+            normalise_url("https://dailymed.nlm.nih.gov/x?a=1", params={"b": "2"}),
+        )
+
+    def test_fresh_hit_and_revalidation(self):
+        cache = HttpCache(self.cache_dir)
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, text="label v1", headers={"ETag": '"v1"'})
+
+        self.assertEqual(self.fetch(handler, cache), "label v1")
+        self.assertEqual(self.fetch(handler, cache), "label v1")
+        self.assertEqual(len(requests), 1)
+
+        # Stale: conditional request, 304 keeps the stored body
+        self.assertEqual(self.fetch(handler, cache, label_ttl=0), "label v1")
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[-1].headers["If-None-Match"], '"v1"')
+
+        # A second process sharing the directory sees the entry
+        self.assertEqual(self.fetch(handler, HttpCache(self.cache_dir)), "label v1")
+        self.assertEqual(len(requests), 2)
+
+    def test_lru_eviction_and_shared_bodies(self):
+        cache = HttpCache(self.cache_dir, max_bytes=25)
+        cache.put("https://x/a", b"a" * 10)
+        cache.put("https://x/a2", b"a" * 10)  # same content, stored once
+        cache.put("https://x/b", b"b" * 10)
+        self.assertEqual(cache.size(), 20)
+        self.assertIsNotNone(cache.get("https://x/a"))
+        cache.put("https://x/c", b"c" * 10)
+
+        # b was the least recently used distinct body
+        self.assertIsNone(cache.get("https://x/b"))
+        self.assertIsNotNone(cache.get("https://x/a"))
+        self.assertIsNotNone(cache.get("https://x/c"))
+        self.assertLessEqual(cache.size(), 25)
+        bodies = sum(len(files) for _, _, files in os.walk(os.path.join(self.cache_dir, "bodies")))
+        self.assertEqual(bodies, 2)
+
+
+class TestLabelCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_new_version_replaces_old(self):
+        cache = LabelCache(os.path.join(self.cache_dir, "labels.sqlite"))
+        cache.put("abc", "3", {"description": "v3"})
+        self.assertEqual(cache.get("abc", "3"), {"description": "v3"})
+        cache.put("abc", "4", {"description": "v4"})
+        self.assertIsNone(cache.get("abc", "3"))
+        self.assertEqual(LabelCache(cache.path).get("abc", "4"), {"description": "v4"})
+
+    def test_unchanged_label_is_not_fetched_again(self):
+        requests = []
+        spl_version = {"value": 1}
+
+        def handler(request):
+            requests.append(request.url.path)
+            if str(request.url).startswith(DAILYMED_SPLS_URL):
+                return httpx.Response(200, json={"data": [{"setid": "abc", "spl_version": spl_version["value"]}]})
+            return httpx.Response(200, text=LABEL_HTML)
+
+        # Caching of HTTP responses off, so only the label cache avoids the downloads
+        configurable = Configuration(cache_dir=self.cache_dir, dailymed_cache_enabled=False)
+        node = GetCleanDrugLabelInfo()
+
+        async def scrape():
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"dailymed": DailyMedClient(transport=httpx.MockTransport(handler))}
+            try:
+                return await node.scrape_dailymed_label_html("abc", configurable)
+            finally:
+                await http_clients._clients.pop(loop)["dailymed"].aclose()
+
+        first = asyncio.run(scrape())
+        self.assertEqual(first["indications_usage"], "INDICATIONS\nNausea.")
+        self.assertEqual(first["product_info_str"], "DRONABINOL")
+        self.assertEqual(len(requests), 2)
+
+        self.assertEqual(asyncio.run(scrape()), first)
+        self.assertEqual(requests[2:], ["/dailymed/services/v2/spls.json"])
+
+        spl_version["value"] = 2
+        asyncio.run(scrape())
+        self.assertEqual(requests[3:], ["/dailymed/services/v2/spls.json", "/dailymed/drugInfo.cfm"])
+
+
+class TestLabelParser(unittest.TestCase):
+    def test_parity_with_saved_pages(self):
+        # *.expected.json: output of the former BeautifulSoup scraper for the saved page
+        pages = sorted(glob.glob(os.path.join(FIXTURES_DIR, "label_*.html")))
+        self.assertTrue(pages)
+        for page in pages:
+            with open(page, encoding="utf-8") as f:
+                html = f.read()
+            with open(page.replace(".html", ".expected.json"), encoding="utf-8") as f:
+                expected = json.load(f)
+            for parse in (parse_label_html_lxml, parse_label_html_bs4):
+                with self.subTest(page=os.path.basename(page), parser=parse.__name__):
+                    self.assertEqual(parse(html, SECTIONCODE_MAP), expected)
+
+    def test_nested_listed_section_extracted_once(self):
+        html = """
+        <div class="Section" data-sectioncode="43685-7"><h1>5 WARNINGS AND PRECAUTIONS</h1>
+          <div class="Section" data-sectioncode="43685-7"><h2>5.1 Neuropsychiatric</h2><p>Monitor.</p></div>
+        </div>
+        <p>tail</p>
+        <div class="Section" data-sectioncode="43685-7"><h1>Addendum</h1></div>
+        """
+        for parse in (parse_label_html_lxml, parse_label_html_bs4):
+            with self.subTest(parser=parse.__name__):
+                label = parse(html, SECTIONCODE_MAP)
+                self.assertEqual(
+                    label["warnings_precautions"],
+                    "5 WARNINGS AND PRECAUTIONS\n5.1 Neuropsychiatric\nMonitor.\n\nAddendum",
+                )
+                self.assertEqual(label["product_info_str"], "")
+
+
+class TestSearchParser(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(FIXTURES_DIR, "search_dronabinol.html"), encoding="utf-8") as f:
+            self.html = f.read()
+
+    def test_parsers_agree(self):
+        results = list(iter_search_results_lxml(self.html))
+        self.assertEqual(results, list(iter_search_results_bs4(self.html)))
+        # 12 articles, one without a drug-info link
+        self.assertEqual(len(results), 11)
+
+    def test_stops_after_max_results(self):
+        node = DailyMedResearch()
+        rlds = node.parse_search_results(self.html, "Dronabinol", "Marinol", "Labeler", max_results=4)
+        self.assertEqual([rld.setid for rld in rlds], ["set-0000", "set-0001", "set-0002", "set-0004"])
+        self.assertEqual(rlds[0].title, "DRONABINOLcapsule0")
+        self.assertEqual(rlds[0].image_url, "")
+        self.assertEqual(rlds[1].image_url, "https://dailymed.nlm.nih.gov/dailymed/image.cfm?name=photo1.jpg&setid=set-0001")
+        self.assertIn("pagesize=4&", node.build_advanced_search_url("Marinol", "CAPSULE", 4))
+
+
+class TestSplIndex(unittest.TestCase):
+    SETID = "0cb2ee04-8581-46c8-a781-7be170ab5c86"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(os.path.join(FIXTURES_DIR, "spl", "marinol.xml"), "rb") as f:
+            self.xml = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def bulk_archive(self, name: str, xml: bytes) -> str:
+        """DailyMed bulk layout: an outer ZIP with one inner ZIP (XML + images) per label."""
+        inner_path = os.path.join(self.tmp_dir, "inner.zip")
+        with zipfile.ZipFile(inner_path, "w") as inner:
+            inner.writestr("8b0a5a4c.xml", xml)
+            inner.writestr("marinol-01.jpg", b"\xff\xd8")
+        source_dir = os.path.join(self.tmp_dir, name)
+        os.makedirs(source_dir)
+        with zipfile.ZipFile(os.path.join(source_dir, "dm_spl_release_human_rx_part1.zip"), "w") as outer:
+            outer.write(inner_path, f"prescription/20230215_{self.SETID}.zip")
+        return source_dir
+
+    def test_ingest_search_and_label(self):
+        index = SplIndex(os.path.join(self.tmp_dir, "spl.sqlite"))
+        counts = index.ingest(self.bulk_archive("release", self.xml))
+        self.assertEqual(counts["added"], 1)
+
+        expected = [(self.SETID, "Marinol (dronabinol) capsule")]
+        self.assertEqual(index.search("Marinol", "CAPSULE"), expected)
+        self.assertEqual(index.search("dronabinol", "caps"), expected)
+        self.assertEqual(index.search("Dronabinol", "TABLET"), [])
+        self.assertEqual(index.search("(", "CAPSULE"), [])
+
+        version, label = index.label(self.SETID, SECTIONCODE_MAP)
+        self.assertEqual(version, 12)
+        self.assertTrue(label["indications_usage"].startswith("1 INDICATIONS AND USAGE\nMARINOL is indicated"))
+        self.assertIn("5.1 Neuropsychiatric Adverse Reactions", label["warnings_precautions"])
+        self.assertIn("DRONABINOL (UNII: 7J8897W37S)\n2.5 mg", label["product_info_str"])
+        self.assertEqual(label["adverse_reactions"], "")
+        self.assertIsNone(index.label("unknown", SECTIONCODE_MAP))
+
+        # Only newer versions replace a label
+        self.assertEqual(index.ingest(self.bulk_archive("same", self.xml))["skipped"], 1)
+        newer = self.xml.replace(b'<versionNumber value="12"/>', b'<versionNumber value="13"/>').replace(b"Marinol", b"Syndros")
+        self.assertEqual(index.ingest(self.bulk_archive("update", newer))["added"], 1)
+        self.assertEqual(index.search("Marinol", "CAPSULE"), [])
+        self.assertEqual(index.label(self.SETID, SECTIONCODE_MAP)[0], 13)
+
+    def test_nodes_answer_from_index_without_network(self):
+        index_path = os.path.join(self.tmp_dir, "spl.sqlite")
+        SplIndex(index_path).ingest(os.path.join(FIXTURES_DIR, "spl"))
+        config = SimpleNamespace(configurable={
+            "dailymed_spl_index_path": index_path, "cache_dir": self.tmp_dir, "dailymed_cache_enabled": False,
+        })
+
+        def no_network(request):
+            raise AssertionError(f"unexpected request {request.url}")
+
+        async def run(coroutine):
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"dailymed": DailyMedClient(transport=httpx.MockTransport(no_network))}
+            try:
+                return await coroutine
+            finally:
+                await http_clients._clients.pop(loop)["dailymed"].aclose()
+
+        rld = SimpleNamespace(api_name="Dronabinol", brand_name="MARINOL", manufacturer="ABBVIE", rld_dosage_form="CAPSULE")
+        result = asyncio.run(run(DailyMedResearch().run({"RLD": rld}, config)))
+        [potential_rlds] = result["potential_RLDs"]
+        self.assertEqual([p.setid for p in potential_rlds], [self.SETID])
+
+        selected = SimpleNamespace(api_name="Dronabinol", title="", setid=self.SETID, image_url="")
+        doc = asyncio.run(run(GetCleanDrugLabelInfo().run({"selected_RLD": selected}, config)))["drug_label_doc"]
+        self.assertIn("Store in a cool environment", doc.how_supplied_storage_handling)
+
+
+class TestLabelPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def potential_rld(self, setid: str) -> PotentialRLD:
+        return PotentialRLD(api_name="A", brand_name="B", manufacturer="", title=setid, image_url="", setid=setid)
+
+    def test_round_robin_ranking(self):
+        potential_rlds = [
+            [self.potential_rld("a1"), self.potential_rld("a2"), self.potential_rld("a3")],
+            self.potential_rld(""),  # failed search
+            [self.potential_rld("b1"), self.potential_rld("a2")],
+        ]
+        self.assertEqual(rank_prefetch_candidates(potential_rlds, 10), ["a1", "b1", "a2", "a3"])
+        self.assertEqual(rank_prefetch_candidates(potential_rlds, 2), ["a1", "b1"])
+
+    def test_prefetch_warms_label_cache(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            if request.url.path.endswith("spls.json"):
+                return httpx.Response(200, json={"data": [{"spl_version": 1}]})
+            return httpx.Response(200, text=LABEL_HTML)
+
+        configurable = Configuration(cache_dir=self.cache_dir, dailymed_cache_enabled=False, dailymed_prefetch_max_labels=2)
+        prefetcher = LabelPrefetcher()
+        loop = prefetcher._event_loop()
+        http_clients._clients[loop] = {"dailymed": DailyMedClient(transport=httpx.MockTransport(handler))}
+
+        future = prefetcher.start("thread-1", ["s1", "s2", "s3"], configurable)
+        self.assertEqual(future.result(timeout=10), 2)
+        self.assertIs(prefetcher.start("thread-1", ["s1", "s2"], configurable), future)
+        self.assertEqual(requests.count("/dailymed/drugInfo.cfm"), 2)
+
+        # Enrichment now finds both labels parsed
+        label_cache = LabelCache(os.path.join(self.cache_dir, "dailymed_labels.sqlite"))
+        self.assertEqual(label_cache.get("s1", "1")["product_info_str"], "DRONABINOL")
+        self.assertIsNotNone(label_cache.get("s2", "1"))
+        self.assertIsNone(label_cache.get("s3", "1"))
+
+        prefetcher.cancel("thread-1")
+        self.assertNotIn("thread-1", prefetcher._jobs)
+        asyncio.run_coroutine_threadsafe(http_clients._clients.pop(loop)["dailymed"].aclose(), loop).result(timeout=10)
+
+
+@unittest.skipUnless(PIL_AVAILABLE, "Pillow is not installed")
+class TestThumbnails(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_thumbnails_are_downsized_and_cached(self):
+        from PIL import Image
+
+        photo = io.BytesIO()
+        Image.new("RGB", (1200, 900), (200, 30, 30)).save(photo, "JPEG")
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.params["name"])
+            if request.url.params["name"] == "broken.jpg":
+                return httpx.Response(200, content=b"not an image")
+            return httpx.Response(200, content=photo.getvalue())
+
+        configurable = Configuration(cache_dir=self.cache_dir, thumbnail_max_px=160)
+        urls = [f"https://dailymed.nlm.nih.gov/dailymed/image.cfm?name={name}" for name in ("a.jpg", "b.jpg", "broken.jpg")]
+
+        async def thumbnails():
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"dailymed": DailyMedClient(transport=httpx.MockTransport(handler))}
+            try:
+                return await fetch_thumbnails(urls + ["", urls[0]], configurable)
+            finally:
+                await http_clients._clients.pop(loop)["dailymed"].aclose()
+
+        paths = asyncio.run(thumbnails())
+        self.assertEqual(sorted(paths), sorted(urls[:2]))
+        with Image.open(paths[urls[0]]) as thumbnail:
+            self.assertEqual(thumbnail.size, (160, 120))
+        self.assertEqual(sorted(requests), ["a.jpg", "b.jpg", "broken.jpg"])
+
+        self.assertEqual(asyncio.run(thumbnails()), paths)
+        self.assertEqual(len(requests), 4)  # only the broken image is tried again
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+from src.configuration import Configuration
+from src.llm import LLMResponseCache, cache_key, get_chat_model
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = LLMResponseCache(os.path.join(self.cache_dir, "llm.sqlite"), max_bytes=2 ** 20)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def model(self, *responses, node="node"):
+        return GenericFakeChatModel(messages=iter(responses), cache=self.cache.for_node(node))
+
+    def test_identical_calls_are_answered_from_the_cache(self):
+        messages = [SystemMessage(content="Be brief."), HumanMessage(content="Name an API.")]
+        self.assertEqual(self.model(AIMessage(content="dronabinol")).invoke(messages).content, "dronabinol")
+        # A new model instance (every node run builds one) with no response of its own left
+        cached = self.model().invoke(messages)
+        self.assertEqual(cached.content, "dronabinol")
+        self.assertEqual(self.cache.stats(), {"node": {"hits": 1, "misses": 1}})
+
+        self.assertEqual(self.model(AIMessage(content="ibuprofen")).invoke(messages[:1]).content, "ibuprofen")
+
+    def test_key_ignores_message_ids_but_not_model_or_schema(self):
+        with_id = '[{"lc": 1, "type": "constructor", "id": ["langchain", "schema", "messages", "HumanMessage"], "kwargs": {"content": "hi", "type": "human", "id": "abc"}}]'
+        without_id = '[{"lc": 1, "type": "constructor", "id": ["langchain", "schema", "messages", "HumanMessage"], "kwargs": {"content": "hi", "type": "human"}}]'
+        self.assertEqual(cache_key(with_id, "gpt-4o-mini"), cache_key(without_id, "gpt-4o-mini"))
+        self.assertNotEqual(cache_key(with_id, "gpt-4o-mini"), cache_key(with_id, "gpt-4o"))
+        self.assertNotEqual(cache_key(with_id, "gpt-4o-mini---[('tools', 'A')]"), cache_key(with_id, "gpt-4o-mini---[('tools', 'B')]"))
+
+    def test_cached_messages_get_fresh_ids(self):
+        messages = [HumanMessage(content="Ask a question.")]
+        model = self.model(AIMessage(content="Why?", id="run-1"))
+        model.invoke(messages)
+        [generation] = self.cache.lookup(dumps(messages), model._get_llm_string())
+        self.assertEqual(generation.message.content, "Why?")
+        self.assertIsNone(generation.message.id)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        def store(i):
+            self.cache.update(f"prompt {i}", "llm", [ChatGeneration(message=AIMessage(content=str(i) * 200))])
+
+        store(0)
+        size = self.cache._connect().execute("SELECT size FROM responses").fetchone()[0]
+        self.cache.max_bytes = 3 * size
+        store(1)
+        store(2)
+        # Read prompt 0 again, so prompt 1 is now the least recently used
+        self.assertIsNotNone(self.cache.lookup("prompt 0", "llm"))
+        store(3)
+        self.assertIsNone(self.cache.lookup("prompt 1", "llm"))
+        for i in (0, 2, 3):
+            self.assertIsNotNone(self.cache.lookup(f"prompt {i}", "llm"))
+
+
+class TestGetChatModel(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_per_node_opt_out(self):
+        configurable = Configuration(cache_dir=self.cache_dir, llm_cache_disabled_nodes=["write_section"])
+        self.assertEqual(get_chat_model(configurable, "gpt-4o-mini", node="ask_question", api_key="test").cache.node, "ask_question")
+        self.assertIs(get_chat_model(configurable, "gpt-4o-mini", node="write_section", api_key="test").cache, False)
+        self.assertIs(get_chat_model(configurable, "gpt-4o-mini", node="ask_question", temperature=0.7, api_key="test").cache, False)
+        self.assertIs(get_chat_model(Configuration(llm_cache_enabled=False), "gpt-4o-mini", node="ask_question", api_key="test").cache, False)
+
+
+if __name__ == "__main__":
+    unittest.main()
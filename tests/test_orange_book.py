@@ -0,0 +1,299 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from src.orange_book import (
+    OrangeBookIndex,
+    OrangeBookPatentIndex,
+    OrangeBookStore,
+    get_orange_book_index,
+    refresh_orange_book_index,
+    rollback_orange_book,
+    update_orange_book,
+    zip_content_hash,
+)
+from src.state import RLD
+
+ORANGE_BOOK_ZIP = os.path.join(os.path.dirname(__file__), "..", "databases", "orange_book_database.zip")
+
+
+class TestOrangeBookStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store_dir = tempfile.mkdtemp()
+        cls.store = OrangeBookStore.open(ORANGE_BOOK_ZIP, cls.store_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.store_dir, ignore_errors=True)
+
+    def test_store_is_keyed_by_content_hash(self):
+        self.assertEqual(self.store.content_hash, zip_content_hash(ORANGE_BOOK_ZIP))
+        self.assertTrue(os.path.isdir(os.path.join(self.store_dir, self.store.content_hash)))
+
+    def test_products_match_csv_parse(self):
+        with zipfile.ZipFile(ORANGE_BOOK_ZIP) as zip_ref:
+            text = zip_ref.read("products.txt").decode("ascii", errors="replace")
+        expected = list(csv.DictReader(text.splitlines(), delimiter="~"))
+
+        df = self.store.products.to_dataframe()
+        self.assertEqual(list(df.columns), list(expected[0].keys()))
+        self.assertEqual(len(df), len(expected))
+        for i in (0, 1, len(expected) // 2, len(expected) - 1):
+            self.assertEqual(df.iloc[i].to_dict(), expected[i])
+            self.assertEqual(self.store.products.row(i), expected[i])
+
+    def test_streaming_parser_keeps_quotes_and_narrow_codes(self):
+        trade_names = self.store.products["Trade_Name"]
+        self.assertIn('HY-PAM "25"', trade_names.values)
+        self.assertEqual(trade_names.codes.dtype.name, "uint16")
+        self.assertEqual(self.store.products["RLD"].codes.dtype.name, "uint8")
+
+    def test_reopen_memory_maps_existing_store(self):
+        reopened = OrangeBookStore.open(ORANGE_BOOK_ZIP, self.store_dir)
+        self.assertEqual(reopened.path, self.store.path)
+        self.assertEqual(reopened.products["Ingredient"].codes.__class__.__name__, "memmap")
+
+
+class TestInvertedIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store_dir = tempfile.mkdtemp()
+        cls.index = OrangeBookIndex(OrangeBookStore.open(ORANGE_BOOK_ZIP, cls.store_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.store_dir, ignore_errors=True)
+
+    def assert_same_as_str_contains(self, column, needle, mask):
+        expected = self.index.products[column].str.lower().str.contains(needle.lower(), regex=False, na=False)
+        self.assertTrue((expected.to_numpy() == mask).all(), f"{column} / {needle!r}")
+
+    def test_substring_masks_match_pandas(self):
+        for needle in ("dronabinol", "ACETAZOL", "statin", "ol", "a", "", "no-such-ingredient"):
+            self.assert_same_as_str_contains("Ingredient", needle, self.index.ingredient_mask(needle))
+        for needle in ("marinol", "crest"):
+            self.assert_same_as_str_contains("Trade_Name", needle, self.index.trade_name_mask(needle))
+        for needle in ("capsule", "tablet, extended", "aerosol, foam"):
+            self.assert_same_as_str_contains("DosageForm", needle, self.index.dosage_form_mask(needle))
+        for needle in ("oral", "rect", "subcutaneous"):
+            self.assert_same_as_str_contains("Route", needle, self.index.route_mask(needle))
+
+    def test_all_ingredients_is_intersection(self):
+        mask = self.index.all_ingredients_mask(["amlodipine", "atorvastatin"])
+        expected = self.index.ingredient_mask("amlodipine") & self.index.ingredient_mask("atorvastatin")
+        self.assertTrue(mask.any())
+        self.assertTrue((mask == expected).all())
+
+    def test_batch_query_matches_single_queries(self):
+        queries = [
+            ("Dronabinol", "CAPSULE", "ORAL"),
+            ("Acetazolamide", "TABLET", "ORAL"),
+            ("budesonide", "AEROSOL, FOAM", "RECTAL"),
+            ("Melatonin", "SOLUTION", "ORAL"),
+            ("Dronabinol", "CAPSULE", "ORAL"),
+        ]
+        row_ids = self.index.find_single_rlds(queries)
+        self.assertEqual(len(row_ids), len(queries))
+        self.assertIsNone(row_ids[3])
+        self.assertEqual(self.index.row(row_ids[0])["Trade_Name"], "MARINOL")
+
+        for (api_name, dosage_form, route), row_id in zip(queries, row_ids):
+            mask = (
+                self.index.is_not_dscn
+                & ~self.index.is_combination
+                & self.index.ingredient_mask(api_name)
+                & self.index.dosage_form_mask(dosage_form)
+                & self.index.route_mask(route)
+            )
+            self.assertEqual(row_id, self.index.first_rld_or_rs(mask))
+
+
+class TestDosageFormVocabulary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store_dir = tempfile.mkdtemp()
+        cls.index = OrangeBookIndex(OrangeBookStore.open(ORANGE_BOOK_ZIP, cls.store_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.store_dir, ignore_errors=True)
+
+    def dosage_forms(self, queries, match):
+        return [None if row_id is None else self.index.row(row_id)["DF;Route"] for row_id in self.index.find_single_rlds(queries, match)]
+
+    def test_exact_match_does_not_select_variants(self):
+        queries = [("Amlodipine", "TABLET", "ORAL"), ("Paliperidone", "TABLET", "ORAL")]
+        self.assertEqual(self.dosage_forms(queries, "substring")[0], "TABLET, ORALLY DISINTEGRATING;ORAL")
+        self.assertEqual(self.dosage_forms(queries, "exact"), ["TABLET;ORAL", None])
+        self.assertEqual(self.dosage_forms(queries, "exact_or_family"), ["TABLET;ORAL", "TABLET, EXTENDED RELEASE;ORAL"])
+
+    def test_route_compatibility(self):
+        queries = [("Enoxaparin", "INJECTABLE", "INJECTION")]
+        self.assertEqual(self.dosage_forms(queries, "substring"), [None])
+        self.assertEqual(self.dosage_forms(queries, "exact"), ["INJECTABLE;INTRAVENOUS, SUBCUTANEOUS"])
+
+    def test_vocabulary_codes(self):
+        vocabulary = self.index.vocabulary
+        self.assertEqual(vocabulary.families[vocabulary.family_of[vocabulary.dosage_form_code("CAPSULE, PELLETS")]], "capsule")
+        self.assertIsNone(vocabulary.dosage_form_code("no such form"))
+        self.assertIsNone(vocabulary.route_mask("no such route"))
+
+
+class TestFuzzyMatching(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store_dir = tempfile.mkdtemp()
+        cls.index = OrangeBookIndex(OrangeBookStore.open(ORANGE_BOOK_ZIP, cls.store_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.store_dir, ignore_errors=True)
+
+    def test_salts_synonyms_and_typos_are_ranked_first(self):
+        name, score = self.index.ingredient_candidates("Dronabinol Hydrochloride")[0]
+        self.assertEqual(name, "dronabinol")
+        self.assertAlmostEqual(score, 1.0, places=5)
+        self.assertEqual(self.index.ingredient_candidates("Paracetamol")[0][0], "acetaminophen")
+        self.assertEqual(self.index.ingredient_candidates("atorvastatine")[0][0], "atorvastatin")
+        self.assertEqual(self.index.ingredient_candidates("Melatonin"), [])
+
+    def test_fuzzy_pass_only_fills_misses(self):
+        queries = [
+            ("Dronabinol Hydrochloride", "CAPSULE", "ORAL"),
+            ("Salbutamol sulphate", "AEROSOL, METERED", "INHALATION"),
+            ("Acetazolamide", "TABLET", "ORAL"),
+            ("Melatonin", "SOLUTION", "ORAL"),
+        ]
+        exact = self.index.find_single_rlds(queries)
+        fuzzy = self.index.find_single_rlds_fuzzy(queries)
+        self.assertEqual(exact[:2], [None, None])
+        self.assertEqual(self.index.row(fuzzy[0])["Trade_Name"], "MARINOL")
+        self.assertEqual(self.index.row(fuzzy[1])["Ingredient"], "ALBUTEROL SULFATE")
+        self.assertEqual(fuzzy[2:], exact[2:])
+
+
+class TestOrangeBookPatentIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store_dir = tempfile.mkdtemp()
+        cls.patents = OrangeBookPatentIndex(OrangeBookStore.open(ORANGE_BOOK_ZIP, cls.store_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.store_dir, ignore_errors=True)
+
+    def test_patents_and_exclusivities_joined_by_product(self):
+        rld = RLD(
+            api_name="Vonoprazan", brand_name="VOQUEZNA", rld_dosage_form="tablet", manufacturer="",
+            route_of_administration="oral", appl_no="215151", product_no="1",
+        )
+        record = self.patents.record_for_rld(rld)
+        self.assertEqual(record.product_no, "1")
+        self.assertEqual(len(record.patents), 2)
+        self.assertEqual(
+            {e.exclusivity_code for e in record.exclusivities},
+            {"NP", "NCE", "I-948"},
+        )
+        self.assertIn("Exclusivity NCE, expires May 3, 2027", record.context)
+
+    def test_unknown_product_has_no_facts(self):
+        self.assertEqual(self.patents.lookup("999999", "001"), ([], []))
+
+
+class TestSharedOrangeBookIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.tmp_dir, "orange_book.zip")
+        self.store_dir = os.path.join(self.tmp_dir, "store")
+        shutil.copy(ORANGE_BOOK_ZIP, self.zip_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_index_is_shared_and_read_only(self):
+        index = get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0)
+        self.assertIs(get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0), index)
+
+        columns_before = list(index.products.columns)
+        mask = index.ingredient_mask("dronabinol") & index.dosage_form_mask("capsule") & index.route_mask("oral")
+        self.assertFalse(index.rows(mask).empty)
+        self.assertEqual(list(index.products.columns), columns_before)
+
+    def test_changed_zip_is_swapped_in(self):
+        old_index = get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0)
+
+        # Rewrite the ZIP with the first product dropped, as a new FDA release would
+        with zipfile.ZipFile(ORANGE_BOOK_ZIP) as src:
+            members = {name: src.read(name) for name in src.namelist()}
+        lines = members["products.txt"].split(b"\r\n")
+        members["products.txt"] = b"\r\n".join(lines[:1] + lines[2:])
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as dst:
+            for name, data in members.items():
+                dst.writestr(name, data)
+
+        refresh_orange_book_index(self.zip_path, self.store_dir, block=True)
+        new_index = get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0)
+        self.assertIsNot(new_index, old_index)
+        self.assertEqual(len(new_index), len(old_index) - 1)
+
+
+class TestOrangeBookUpdate(unittest.TestCase):
+    QUERIES = [
+        ("Dronabinol", "CAPSULE", "ORAL"),
+        ("Acetazolamide", "TABLET", "ORAL"),
+        ("Newthing", "TABLET", "ORAL"),
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.tmp_dir, "orange_book.zip")
+        self.store_dir = os.path.join(self.tmp_dir, "store")
+        shutil.copy(ORANGE_BOOK_ZIP, self.zip_path)
+
+        # Next "monthly release": MARINOL loses its RLD flag, one product is dropped, one is added
+        with zipfile.ZipFile(ORANGE_BOOK_ZIP) as src:
+            members = {name: src.read(name) for name in src.namelist()}
+        lines = members["products.txt"].split(b"\r\n")
+        marinol = next(i for i, line in enumerate(lines) if b"~MARINOL~" in line)
+        lines[marinol] = lines[marinol].replace(b"~Yes~", b"~No~", 1)
+        del lines[5]
+        lines.append(b"NEWTHING~TABLET;ORAL~NEWBRAND~ACME~1MG~N~999999~001~~Oct 1, 2026~Yes~Yes~RX~ACME INC")
+        members["products.txt"] = b"\r\n".join(lines)
+        self.new_zip_path = os.path.join(self.tmp_dir, "new_release.zip")
+        with zipfile.ZipFile(self.new_zip_path, "w", zipfile.ZIP_DEFLATED) as dst:
+            for name, data in members.items():
+                dst.writestr(name, data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_update_matches_full_build_and_rolls_back(self):
+        old_index = get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0)
+        old_answers = old_index.find_single_rlds(self.QUERIES)
+
+        store = update_orange_book(self.new_zip_path, self.zip_path, self.store_dir)
+        self.assertEqual(store.meta["diff"]["products"], {"inserted": 1, "updated": 1, "deleted": 1})
+        self.assertEqual(zip_content_hash(self.zip_path), zip_content_hash(self.new_zip_path))
+
+        full_store = OrangeBookStore.open(self.new_zip_path, os.path.join(self.tmp_dir, "full"))
+        for table in ("products", "patent", "exclusivity"):
+            self.assertTrue(store.table(table).to_dataframe().equals(full_store.table(table).to_dataframe()), table)
+
+        # Only the lookup touched by the changed MARINOL row is dropped; the other moves one row up
+        new_index = get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0)
+        self.assertIsNot(new_index, old_index)
+        self.assertEqual(new_index._rld_cache[("acetazolamide", "tablet", "oral", "substring")], old_answers[1] - 1)
+        self.assertNotIn(("dronabinol", "capsule", "oral", "substring"), new_index._rld_cache)
+        self.assertEqual(new_index.find_single_rlds(self.QUERIES), OrangeBookIndex(full_store).find_single_rlds(self.QUERIES))
+
+        rollback_orange_book(self.zip_path, self.store_dir)
+        self.assertEqual(zip_content_hash(self.zip_path), zip_content_hash(ORANGE_BOOK_ZIP))
+        self.assertEqual(get_orange_book_index(self.zip_path, self.store_dir, reload_interval=0).find_single_rlds(self.QUERIES), old_answers)
+
+
+if __name__ == "__main__":
+    unittest.main()
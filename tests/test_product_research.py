@@ -0,0 +1,42 @@
+import unittest
+
+from langgraph.constants import Send
+
+from src.product_research_graph.edges import RouteProductEnrichment
+from src.product_research_graph.nodes import FormulatorFeedbackProductResearch
+from src.state import RLD, PotentialRLD, merge_potential_rlds
+
+
+def make_rld(api_name: str, brand_name: str, dosage_form: str = "CAPSULE") -> RLD:
+    return RLD(api_name=api_name, brand_name=brand_name, rld_dosage_form=dosage_form, manufacturer="", route_of_administration="ORAL")
+
+
+def make_potential(api_name: str, setid: str) -> PotentialRLD:
+    return PotentialRLD(api_name=api_name, brand_name=api_name, manufacturer="", title=setid, image_url="", setid=setid)
+
+
+class TestRetryDelta(unittest.TestCase):
+    def test_reducer_replaces_groups_by_api_name(self):
+        state = merge_potential_rlds([], [[make_potential("A", "a1"), make_potential("A", "a2")]])
+        state = merge_potential_rlds(state, make_potential("B", ""))  # failed search
+        state = merge_potential_rlds(state, [[make_potential("B", "b1")]])
+        state = merge_potential_rlds(state, [[make_potential("A", "a3")]])
+        self.assertEqual([[p.setid for p in group] for group in state], [["a3"], ["b1"]])
+
+    def test_only_changed_rlds_are_researched(self):
+        previous = [make_rld("Dronabinol", "MARINOL"), make_rld("Acetazolamide", "DIAMOX")]
+        updated = [make_rld("Dronabinol", "MARINOL"), make_rld("Acetazolamide", "DIAMOX", "TABLET"), make_rld("Melatonin", "Melatonin")]
+        changed = FormulatorFeedbackProductResearch().changed_RLDs(previous, updated)
+        self.assertEqual([rld.api_name for rld in changed], ["Acetazolamide", "Melatonin"])
+
+        route = RouteProductEnrichment()
+        sends = route.run({"feedback_decision": "retry_daily_med", "RLDs": updated, "RLDs_to_research": changed}, {})
+        self.assertEqual([send.arg["RLD"].api_name for send in sends], ["Acetazolamide", "Melatonin"])
+        self.assertTrue(all(isinstance(send, Send) and send.node == "daily_med_research" for send in sends))
+
+        unchanged = {"feedback_decision": "retry_daily_med", "RLDs": previous, "RLDs_to_research": []}
+        self.assertEqual(route.run(unchanged, {}), "formulator_feedback_product_research")
+
+
+if __name__ == "__main__":
+    unittest.main()
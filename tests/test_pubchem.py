@@ -0,0 +1,233 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import httpx
+
+from src import http_clients, rate_limit
+from src.configuration import Configuration
+from src.literature_research_agent.nodes import SearchExternalAPIs
+from src.edges import InitializeLiteratureResearch
+from src.nodes import ResolvePubChemCompounds
+from src.pubchem import PubChemCache, PubChemResolver
+from src.pubchem.resolver import is_cas_number
+from src.pubchem.warm import read_portfolio, warm_pubchem_cache
+from src.rate_limit import HostLimit, RateLimiter
+from src.state import API
+
+DRONABINOL_PROPERTIES = {
+    "PropertyTable": {"Properties": [{
+        "CID": 16078,
+        "MolecularFormula": "C21H30O2",
+        "MolecularWeight": "314.5",
+        "SMILES": "CCCCCC1=CC(=C2[C@@H]3C=C(CC[C@H]3C(OC2=C1)(C)C)C)O",
+        "IUPACName": "(6aR,10aR)-6,6,9-trimethyl-3-pentyl-6a,7,8,10a-tetrahydrobenzo[c]chromen-1-ol",
+    }]}
+}
+
+
+def pug_view(*strings):
+    return {"Record": {"Section": [{"Information": [
+        {"Value": {"StringWithMarkup": [{"String": s}]}} for s in strings
+    ]}]}}
+
+
+ASPIRIN_ROW = {"CID": 2244, "MolecularFormula": "C9H8O4", "MolecularWeight": "180.16", "SMILES": "CC(=O)OC1=CC=CC=C1C(=O)O", "IUPACName": "2-acetyloxybenzoic acid"}
+
+
+def api(name):
+    return API(API_name=name, route_of_administration="ORAL", desired_dosage_form="CAPSULE")
+
+
+def pubchem_handler(requests):
+    def handler(request):
+        requests.append(request)
+        path, heading = request.url.path, request.url.params.get("heading")
+        if path.startswith("/rest/pug/compound/name/dronabinol/property/"):
+            return httpx.Response(200, json=DRONABINOL_PROPERTIES)
+        if path.startswith("/rest/pug/compound/cid/2244,16078/property/"):
+            rows = [ASPIRIN_ROW] + DRONABINOL_PROPERTIES["PropertyTable"]["Properties"]
+            return httpx.Response(200, json={"PropertyTable": {"Properties": rows}})
+        if path == "/rest/pug_view/data/compound/16078/JSON":
+            if heading == "CAS":
+                return httpx.Response(200, json=pug_view("1972-08-3", "1972-08-3", "not-a-cas"))
+            if heading == "Melting Point":
+                return httpx.Response(200, json=pug_view("Not measured", "66 °C"))
+            if heading == "Solubility":
+                return httpx.Response(200, json=pug_view("Insoluble in water"))
+        return httpx.Response(404, json={"Fault": {"Code": "PUGVIEW.NotFound"}})
+    return handler
+
+
+class TestPubChemResolver(unittest.TestCase):
+    def resolve(self, name):
+        requests = []
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(pubchem_handler(requests))) as client:
+                return await PubChemResolver(client, RateLimiter()).resolve(name)
+
+        return asyncio.run(run()), requests
+
+    def test_resolves_properties_and_cas_in_two_requests(self):
+        compound, requests = self.resolve("dronabinol")
+        self.assertEqual(compound.cid, 16078)
+        self.assertEqual(compound.molecular_formula, "C21H30O2")
+        self.assertEqual(compound.molecular_weight, 314.5)
+        self.assertTrue(compound.smiles.startswith("CCCCCC1"))
+        self.assertEqual(compound.cas_number, "1972-08-3")
+        self.assertEqual(len(requests), 2)
+        self.assertIn("IsomericSMILES,MolecularFormula,MolecularWeight,IUPACName", str(requests[0].url))
+
+    def test_unknown_name_is_none(self):
+        compound, requests = self.resolve("not a drug")
+        self.assertIsNone(compound)
+        self.assertEqual(len(requests), 1)
+        self.assertIn("not%20a%20drug", str(requests[0].url))
+
+    def test_cas_check_digit(self):
+        self.assertTrue(is_cas_number("1972-08-3"))
+        self.assertTrue(is_cas_number("50-78-2"))
+        self.assertFalse(is_cas_number("1972-08-4"))
+        self.assertFalse(is_cas_number("DTXSID"))
+
+
+class TestSearchExternalAPIs(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        # Not PubChem's real 5 req/s: the mock answers instantly
+        rate_limit._rate_limiter = RateLimiter(default=HostLimit(rate=1000.0, burst=1000, concurrency=10))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        rate_limit._rate_limiter = None
+
+    def run_node(self, api_names, requests, **configurable):
+        node = SearchExternalAPIs()
+        config = SimpleNamespace(configurable={"cache_dir": self.cache_dir, **configurable})
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"pubchem": httpx.AsyncClient(transport=httpx.MockTransport(pubchem_handler(requests)))}
+            try:
+                # The first API alone, then the others concurrently, all on the same pooled client
+                first = await node.run({"API": api(api_names[0])}, config)
+                others = await asyncio.gather(*(node.run({"API": api(name)}, config) for name in api_names[1:]))
+                self.assertFalse(http_clients._clients[loop]["pubchem"].is_closed)
+                return [first, *others]
+            finally:
+                await http_clients.close_http_clients()
+
+        return [result["api_external_APIkey_data"] for result in asyncio.run(run())]
+
+    def test_node_uses_one_property_request_and_no_synonym_list(self):
+        requests = []
+        [result] = self.run_node(["dronabinol"], requests)
+
+        self.assertEqual(result.cas_number, "1972-08-3")
+        self.assertEqual(result.molecular_weight, 314.5)
+        self.assertEqual(result.molecular_formula, "C21H30O2")
+        self.assertEqual(result.melting_point, "66 °C")
+        self.assertEqual(result.solubility, "Insoluble in water")
+        self.assertEqual(result.pka, "Información no disponible")
+        # 1 property table + 1 CAS heading + 7 property headings, nothing else
+        self.assertEqual(len(requests), 9)
+        self.assertFalse(any("synonyms" in str(r.url) for r in requests))
+
+    def test_later_apis_reuse_the_pooled_client(self):
+        requests = []
+        results = self.run_node(["dronabinol", "dronabinol", "dronabinol"], requests, pubchem_cache_enabled=False)
+        self.assertEqual([r.cas_number for r in results], ["1972-08-3"] * 3)
+        self.assertEqual(len(requests), 27)
+
+    def test_known_api_needs_no_pubchem_requests(self):
+        requests = []
+        [first] = self.run_node(["dronabinol"], requests)
+        self.assertEqual(len(requests), 9)
+
+        # Found headings and the ones PubChem answered 404 for are both cached
+        requests.clear()
+        [second] = self.run_node(["Dronabinol "], requests)
+        self.assertEqual(requests, [])
+        self.assertEqual(second, first)
+
+    def test_warm_up_preloads_the_portfolio(self):
+        requests = []
+        portfolio = os.path.join(self.cache_dir, "portfolio.txt")
+        with open(portfolio, "w") as f:
+            f.write("# APIs\ndronabinol\n\nunobtainium  # not in PubChem\ndronabinol\n")
+        names = read_portfolio(portfolio)
+        self.assertEqual(names, ["dronabinol", "unobtainium"])
+
+        async def warm():
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"pubchem": httpx.AsyncClient(transport=httpx.MockTransport(pubchem_handler(requests)))}
+            return await warm_pubchem_cache(names, Configuration(cache_dir=self.cache_dir))
+
+        self.assertEqual(asyncio.run(warm()), ["unobtainium"])
+        self.assertEqual(len(requests), 10)
+
+        requests.clear()
+        self.run_node(["dronabinol"], requests)
+        self.assertEqual(requests, [])
+
+
+class TestBatchResolution(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        rate_limit._rate_limiter = RateLimiter(default=HostLimit(rate=1000.0, burst=1000, concurrency=10))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        rate_limit._rate_limiter = None
+
+    def test_known_cids_are_refreshed_in_one_request(self):
+        requests = []
+        # Every entry is stale at once, but the names' CIDs are still known
+        cache = PubChemCache(os.path.join(self.cache_dir, "pubchem.sqlite"), ttl=-1)
+        cache.put_properties("Aspirin", ASPIRIN_ROW)
+        cache.put_properties("dronabinol", DRONABINOL_PROPERTIES["PropertyTable"]["Properties"][0])
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(pubchem_handler(requests))) as client:
+                return await PubChemResolver(client, RateLimiter(), cache=cache).compounds_by_names(["dronabinol", "aspirin", "unobtainium"])
+
+        compounds = asyncio.run(run())
+        self.assertEqual(compounds["aspirin"].molecular_formula, "C9H8O4")
+        self.assertEqual(compounds["dronabinol"].cid, 16078)
+        self.assertIsNone(compounds["unobtainium"])
+        self.assertEqual(
+            sorted(r.url.path.split("/property/")[0] for r in requests),
+            ["/rest/pug/compound/cid/2244,16078", "/rest/pug/compound/name/unobtainium"],
+        )
+
+    def test_study_resolves_every_api_once_and_branches_read_their_slice(self):
+        requests = []
+        config = SimpleNamespace(configurable={"cache_dir": self.cache_dir, "pubchem_cache_enabled": False})
+        state = {"apis": [api("dronabinol"), api("unobtainium")], "product_information": None}
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            http_clients._clients[loop] = {"pubchem": httpx.AsyncClient(transport=httpx.MockTransport(pubchem_handler(requests)))}
+            try:
+                state.update(await ResolvePubChemCompounds().run(state, config))
+                sends = InitializeLiteratureResearch().run(state, config)
+                requests.clear()
+                return sends, await SearchExternalAPIs().run(sends[0].arg, config)
+            finally:
+                await http_clients.close_http_clients()
+
+        sends, result = asyncio.run(run())
+        self.assertEqual(state["pubchem_compounds"]["dronabinol"].cas_number, "1972-08-3")
+        self.assertEqual([send.arg["pubchem_compound"] for send in sends], [state["pubchem_compounds"]["dronabinol"], None])
+        self.assertEqual(result["api_external_APIkey_data"].cas_number, "1972-08-3")
+        # The branch only reads the property headings
+        self.assertEqual(len(requests), 7)
+        self.assertTrue(all(r.url.path.startswith("/rest/pug_view/") for r in requests))
+
+
+if __name__ == "__main__":
+    unittest.main()
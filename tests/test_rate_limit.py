@@ -0,0 +1,111 @@
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+
+import httpx
+
+from src.rate_limit import HostLimit, RateLimiter, parse_retry_after
+
+URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/aspirin/cids/JSON"
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_token_bucket_spaces_requests_after_the_burst(self):
+        limiter = RateLimiter({"pubchem.ncbi.nlm.nih.gov": HostLimit(rate=50.0, burst=2, concurrency=10)})
+
+        async def acquire_all():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.wait_for_token(URL) for _ in range(7)))
+            return time.monotonic() - start
+
+        # 2 tokens of burst, then 5 more at 50 req/s
+        self.assertGreaterEqual(asyncio.run(acquire_all()), 0.09)
+
+    def test_hosts_are_limited_independently(self):
+        limiter = RateLimiter(default=HostLimit(rate=1.0, burst=1))
+
+        async def acquire():
+            start = time.monotonic()
+            await limiter.wait_for_token("https://a.example/x")
+            await limiter.wait_for_token("https://b.example/x")
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(acquire()), 0.5)
+
+    def test_concurrency_cap(self):
+        limiter = RateLimiter(default=HostLimit(rate=1000.0, burst=1000, concurrency=2))
+        in_flight, peak = 0, 0
+
+        async def call():
+            nonlocal in_flight, peak
+            async with limiter.limit(URL):
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        async def call_all():
+            await asyncio.gather(*(call() for _ in range(8)))
+
+        asyncio.run(call_all())
+        self.assertEqual(peak, 2)
+
+    def test_retry_after_pauses_the_host_and_lowers_its_rate(self):
+        limiter = RateLimiter(default=HostLimit(rate=100.0, burst=100))
+        calls = []
+
+        def handler(request):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "1"})
+            return httpx.Response(200, json={"ok": True})
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await limiter.request(client, "GET", URL, backoff=0.001)
+
+        self.assertEqual(asyncio.run(fetch()).json(), {"ok": True})
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.9)
+        self.assertLess(limiter.current_rate(URL), 100.0)
+
+    def test_client_errors_are_not_retried(self):
+        limiter = RateLimiter()
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await limiter.request(client, "GET", URL)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(fetch())
+        self.assertEqual(len(calls), 1)
+
+    def test_throttle_errors_of_third_party_clients(self):
+        limiter = RateLimiter(default=HostLimit(rate=8.0, burst=8))
+
+        class Busy(Exception):
+            pass
+
+        async def call():
+            async with limiter.limit("api.tavily.com", throttle_errors=(Busy,)):
+                raise Busy()
+
+        with self.assertRaises(Busy):
+            asyncio.run(call())
+        self.assertEqual(limiter.current_rate("api.tavily.com"), 4.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+
+
+if __name__ == "__main__":
+    unittest.main()